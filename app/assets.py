@@ -0,0 +1,137 @@
+# app/assets.py
+"""
+Cache delle immagini dell'interfaccia.
+
+- request(nome, (w, h), callback): pixmap già scalata. Se è in memoria la
+  callback parte subito; altrimenti l'immagine viene caricata e scalata in
+  un QThreadPool (QImage è usabile fuori dal thread UI) e la callback arriva
+  nel thread UI appena pronta.
+- Cache su disco (TWI_HOME/cache/assets): immagine già scalata, grezza
+  ARGB32 (niente decodifica PNG), con chiave nome + dimensione + mtime e
+  lunghezza del file sorgente: cambiato il PNG, la voce vecchia non vale più.
+- preload(): avvia in background i caricamenti (es. lo stato "on" dei
+  pulsanti, così il primo clic non tocca il disco).
+"""
+import os, struct, threading
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QColor
+
+from app import settings
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS_DIR   = os.path.join(PROJECT_ROOT, "assets", "images")
+CACHE_DIR    = os.path.join(settings.DATA_DIR, "cache", "assets")
+
+_HDR = struct.Struct("<4sII")
+_MAGIC = b"TWIa"
+_PLACEHOLDER = QColor(58, 63, 68)
+
+def _cache_path(name: str, size, st) -> str:
+    stem = os.path.splitext(name)[0]
+    return os.path.join(CACHE_DIR, "%s-%dx%d-%x-%x.argb" % (stem, size[0], size[1], st.st_mtime_ns, st.st_size))
+
+def _read_cached(path: str):
+    try:
+        with open(path, "rb") as f:
+            magic, w, h = _HDR.unpack(f.read(_HDR.size))
+            data = f.read()
+    except (OSError, struct.error):
+        return None
+    if magic != _MAGIC or len(data) != 4 * w * h:
+        return None
+    return QImage(data, w, h, 4 * w, QImage.Format_ARGB32_Premultiplied).copy()
+
+def _write_cached(path: str, img: QImage):
+    img = img.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+    w, h = img.width(), img.height()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        stem = os.path.basename(path).rsplit("-", 2)[0]
+        for old in os.listdir(CACHE_DIR):            # versioni vecchie della stessa immagine/dimensione
+            if old.rsplit("-", 2)[0] == stem and old != os.path.basename(path):
+                os.remove(os.path.join(CACHE_DIR, old))
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HDR.pack(_MAGIC, w, h))
+            f.write(img.constBits().asstring(img.sizeInBytes()))     # ARGB32: righe senza padding
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+def load_image(name: str, size) -> QImage:
+    """QImage scalata a size (w, h): cache su disco o PNG sorgente. None se manca."""
+    src = os.path.join(ASSETS_DIR, name)
+    try: st = os.stat(src)
+    except OSError: return None
+    cp = _cache_path(name, size, st)
+    img = _read_cached(cp)
+    if img is not None:
+        return img
+    img = QImage(src)
+    if img.isNull():
+        return None
+    if (img.width(), img.height()) != tuple(size):
+        img = img.scaled(size[0], size[1], Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    _write_cached(cp, img)
+    return img
+
+class _Job(QRunnable):
+    def __init__(self, cache, key):
+        super().__init__()
+        self.cache = cache; self.key = key
+    def run(self):
+        img = load_image(*self.key)
+        self.cache._loaded.emit(self.key, img)
+
+class AssetCache(QObject):
+    _loaded = pyqtSignal(object, object)    # (nome, size), QImage | None
+
+    def __init__(self):
+        super().__init__()
+        self._pix = {}               # (nome, size) -> QPixmap
+        self._waiting = {}           # (nome, size) -> [callback]
+        self._lock = threading.Lock()
+        self._pool = QThreadPool.globalInstance()
+        self._loaded.connect(self._on_loaded)
+
+    def placeholder(self, size) -> QPixmap:
+        pm = QPixmap(*size); pm.fill(_PLACEHOLDER)
+        return pm
+
+    def request(self, name: str, size, callback=None):
+        key = (name, (int(size[0]), int(size[1])))
+        pm = self._pix.get(key)
+        if pm is not None:
+            if callback: callback(pm)
+            return
+        with self._lock:
+            cbs = self._waiting.get(key)
+            first = cbs is None
+            if first: cbs = self._waiting[key] = []
+            if callback: cbs.append(callback)
+        if first:
+            self._pool.start(_Job(self, key))
+
+    def preload(self, items):
+        for name, size in items:
+            self.request(name, size)
+
+    def _on_loaded(self, key, img):
+        pm = QPixmap.fromImage(img) if img is not None else self.placeholder(key[1])
+        self._pix[key] = pm
+        with self._lock:
+            cbs = self._waiting.pop(key, [])
+        for cb in cbs:
+            try: cb(pm)
+            except RuntimeError: pass        # widget già distrutto
+
+    def wait(self, msecs: int = -1):
+        """Attende i caricamenti in corso (test, chiusura)."""
+        self._pool.waitForDone(msecs)
+
+_CACHE = None
+
+def cache() -> AssetCache:
+    global _CACHE
+    if _CACHE is None: _CACHE = AssetCache()
+    return _CACHE
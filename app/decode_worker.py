@@ -0,0 +1,59 @@
+# app/decode_worker.py
+"""
+Thread del decoder: decoder, classificatore e correttore fuori dal thread UI.
+
+- submit(ev) riceve, per ogni lotto del client, il sottoinsieme degli
+  eventi (array EVENT_DTYPE) che riguarda il filo centrale e la TX locale,
+  più i tempi dei laterali per gli allarmi: una sola put() in coda, da
+  qualsiasi thread.
+- Il thread applica gli eventi in ordine con handler(ev) e, senza eventi per
+  idle_s secondi, chiama idle(now) (chiusura dei caratteri per timeout).
+- Il testo esce dal decoder con le callback già thread-safe (TextSink,
+  segnali Qt).
+- call(fn): fn() gira nel thread del decoder, in ordine con gli eventi
+  (operazioni sullo stato del classificatore, es. registrazione del fist).
+"""
+import queue, threading
+from cw import clock
+
+class DecodeWorker:
+    def __init__(self, handler, idle=None, idle_s: float = 0.033):
+        self.handler = handler
+        self.idle = idle
+        self.idle_s = float(idle_s)
+        self.batches = 0
+        self._q = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="DecodeWorker", daemon=True)
+        self._thread.start()
+
+    def submit(self, ev):
+        if len(ev): self._q.put(ev)
+
+    def call(self, fn):
+        self._q.put(fn)
+
+    def stop(self):
+        self._q.put(None)
+        self._thread.join(timeout=2.0)
+
+    def _run(self):
+        last_idle = clock.now()
+        while True:
+            try:
+                ev = self._q.get(timeout=self.idle_s)
+            except queue.Empty:
+                ev = ()
+            if ev is None:
+                return
+            if callable(ev):
+                try: ev()
+                except Exception as e: print("Decoder: errore comando:", e)
+            elif len(ev):
+                try: self.handler(ev)
+                except Exception as e: print("Decoder: errore evento:", e)
+                self.batches += 1
+            now = clock.now()
+            if self.idle and now - last_idle >= self.idle_s:
+                last_idle = now
+                try: self.idle(now)
+                except Exception as e: print("Decoder: errore tick:", e)
@@ -0,0 +1,194 @@
+# app/decoder/batch_decoder.py
+"""
+Decodifica batch (offline) di sessioni intere, tutto vettorizzato con NumPy.
+
+Ingresso: array di durate con segno in secondi (+mark / -space), come le
+sequenze per-pacchetto del client (ma in secondi).
+Uscita:   (testo, tempi) — un timestamp d'inizio per ogni carattere del testo.
+
+- durate quantizzate in bin logaritmici (5%) e istogrammi per blocco
+- mark:  2-means (dot/dash) sull'istogramma del blocco; blocchi ambigui
+         (tutti dot o tutti dash) usano la finestra scorrevole ±1 blocco
+- space: 3-means (elemento/lettera/parola) sulle finestre scorrevoli
+- codici lettera: bit dei dash accumulati con reduceat, tabella a 256 voci
+I dati passano poche volte in memoria: il clustering lavora sugli istogrammi.
+"""
+from __future__ import annotations
+import numpy as np
+
+from app.decoder.morse_decoder import MORSE_TO_ASCII
+
+INTRA, CHAR, WORD = 0, 1, 2
+_MAX_CODE = 7
+
+# bin logaritmici: 5 ms .. ~3 s
+_LOG_LO   = float(np.log(0.005))
+_LOG_STEP = 0.05
+_NBIN     = 128
+_CENTERS  = _LOG_LO + (np.arange(_NBIN) + 0.5) * _LOG_STEP
+
+# codice con bit sentinella: 1<<len | bit (dash=1, MSB = primo elemento)
+def _build_lut():
+    lut = np.full(1 << (_MAX_CODE + 1), ord('□'), dtype=np.uint32)
+    for code, ch in MORSE_TO_ASCII.items():
+        v = 1
+        for e in code:
+            v = (v << 1) | (e == '-')
+        lut[v] = ord(ch)
+    return lut
+
+_LUT = _build_lut()
+
+def _merge_runs(d: np.ndarray) -> np.ndarray:
+    """Somma durate consecutive dello stesso segno (sequenza alternata)."""
+    if d.size < 2: return d
+    neg = d < 0
+    chg = neg[1:] != neg[:-1]
+    if chg.all(): return d
+    return np.add.reduceat(d, np.flatnonzero(np.r_[True, chg]))
+
+def _quantize_blocks(x: np.ndarray, window: int):
+    """
+    Bin logaritmici di x come matrice (blocchi, window) e istogramma per blocco.
+    Il padding dell'ultimo blocco usa il bin fittizio _NBIN (fuori istogramma).
+    """
+    nblk = (x.size + window - 1) // window
+    q = np.full(nblk * window, _NBIN, dtype=np.int32)
+    q[:x.size] = np.clip((np.log(x.astype(np.float32)) - _LOG_LO) * (1.0 / _LOG_STEP), 0, _NBIN - 1)
+    q = q.reshape(nblk, window)
+    flat = (q + (np.arange(nblk, dtype=np.int32) * (_NBIN + 1))[:, None]).ravel()
+    H = np.bincount(flat, minlength=nblk * (_NBIN + 1)).reshape(nblk, _NBIN + 1)[:, :_NBIN]
+    return q, H
+
+def _slide(a: np.ndarray) -> np.ndarray:
+    """Somma di ogni riga con le righe vicine (finestra di 3 blocchi)."""
+    w = a.copy()
+    w[1:] += a[:-1]; w[:-1] += a[1:]
+    return w
+
+def _thr_bins(c: np.ndarray) -> np.ndarray:
+    """Soglie tra centri adiacenti come indice del primo bin della classe superiore."""
+    t = 0.5 * (c[:, :-1] + c[:, 1:])
+    return np.clip(np.ceil((t - _LOG_LO) / _LOG_STEP - 0.5), 0, _NBIN).astype(np.int64)
+
+def _kmeans_hist(H: np.ndarray, init: np.ndarray, iters: int = 8) -> np.ndarray:
+    """
+    k-means 1-D per riga sugli istogrammi (centri in log-secondi).
+    Con centri ordinati l'assegnazione è una soglia: le somme per cluster sono
+    differenze di somme cumulative. I cluster vuoti restano fermi.
+    """
+    nrow = H.shape[0]
+    # cumulative intere (veloci); somma dei centri = LO*n + STEP*(somma bin + n/2)
+    Cn = np.zeros((nrow, _NBIN + 1), dtype=np.int64); Cb = np.zeros_like(Cn)
+    np.cumsum(H, axis=1, out=Cn[:, 1:])
+    np.cumsum(H * np.arange(_NBIN), axis=1, out=Cb[:, 1:])
+    Cn = Cn.ravel(); Cb = Cb.ravel()
+    base = (np.arange(nrow) * (_NBIN + 1))[:, None]
+    lo = np.zeros((nrow, 1), dtype=np.int64); hi = np.full((nrow, 1), _NBIN)
+    c = np.array(init, dtype=np.float64)
+    for _ in range(iters):
+        edges = np.hstack((lo, _thr_bins(c), hi)) + base
+        n = np.diff(Cn.take(edges), axis=1)
+        b = np.diff(Cb.take(edges), axis=1)
+        mean = _LOG_LO + _LOG_STEP * (b / np.maximum(n, 1) + 0.5)
+        c = np.where(n > 0, mean, c)
+        c.sort(axis=1)
+    return c
+
+def _percentile_hist(H: np.ndarray, p: float) -> np.ndarray:
+    """Percentile per riga (centro del bin); righe vuote -> NaN."""
+    C = np.cumsum(H, axis=1)
+    tot = C[:, -1]
+    idx = np.argmax(C >= np.maximum(1, p * tot)[:, None], axis=1)
+    return np.where(tot > 0, _CENTERS[idx], np.nan)
+
+def decode_durations(durations, t0: float = 0.0, window: int = 128,
+                     min_seg: float = 0.010):
+    """
+    Decodifica un array di durate con segno (secondi).
+    window: numero di mark per blocco (le finestre coprono i blocchi vicini ±1).
+    Ritorna (testo, tempi[np.float64]) con len(tempi) == len(testo).
+    """
+    d = np.asarray(durations, dtype=np.float64).ravel()
+    # glitch: mark troppo brevi diventano silenzio
+    d = np.where(d < min_seg, -np.abs(d), d)
+    d = _merge_runs(d[d != 0.0])
+    # la sessione inizia dal primo mark; dopo il merge la sequenza alterna
+    first = np.flatnonzero(d[:2] > 0)
+    if first.size == 0:
+        return "", np.empty(0)
+    d = d[first[0]:]
+    starts = t0 + np.r_[0.0, np.cumsum(np.abs(d))[:-1]]
+
+    marks = d[0::2]; m_ts = starts[0::2]
+    nm = marks.size
+    sp = -d[1::2]; s_ts = starts[1::2]
+    ns = sp.size
+
+    # ── mark: dot/dash per blocco ──
+    qm, Hm = _quantize_blocks(marks, window)
+    # seed: dot dal 10° percentile del blocco (segue i cambi di velocità)
+    lo = _percentile_hist(Hm, 0.10)
+    cm = _kmeans_hist(Hm, np.c_[lo, lo + np.log(3.0)])
+    # blocchi ambigui (tutti dot o tutti dash): finestra scorrevole ±1 blocco
+    bad = (cm[:, 1] - cm[:, 0]) < np.log(1.8)
+    if bad.any():
+        Wm = _slide(Hm)[bad]
+        lo = _percentile_hist(Wm, 0.10)
+        cm[bad] = _kmeans_hist(Wm, np.c_[lo, lo + np.log(3.0)])
+        bad = (cm[:, 1] - cm[:, 0]) < np.log(1.8)
+    # ancora ambigui: modello mediano della sessione
+    if bad.any():
+        cm[bad] = np.median(cm[~bad], axis=0) if (~bad).any() else cm[bad][0, 0] + np.log([1.0, 3.0])
+    dash_bm = qm >= _thr_bins(cm)
+    is_dash = dash_bm.ravel()[:nm]
+    # dit per blocco: media pesata dot e dash/3 (nel log)
+    real = qm < _NBIN
+    n_dash = np.count_nonzero(dash_bm & real, axis=1)
+    n_blk = np.count_nonzero(real, axis=1)
+    log_dit = ((n_blk - n_dash) * cm[:, 0] + n_dash * (cm[:, 1] - np.log(3.0))) / np.maximum(n_blk, 1)
+
+    # ── space: elemento/lettera/parola (lo space i segue il mark i) ──
+    s_cls = np.zeros(0, dtype=np.int8)
+    if ns:
+        qs, Hs = _quantize_blocks(sp, window)
+        nbs = qs.shape[0]
+        seed = log_dit[:nbs, None] + np.log([1.0, 3.0, 7.0])
+        cs = _kmeans_hist(_slide(Hs), seed, iters=6)
+        # separazione minima tra classi, altrimenti soglie ITU
+        bad = ((cs[:, 1] - cs[:, 0]) < np.log(1.8)) | ((cs[:, 2] - cs[:, 1]) < np.log(1.5))
+        cs[bad] = seed[bad]
+        tb = _thr_bins(cs)
+        s_cls = ((qs >= tb[:, :1]).view(np.int8) + (qs >= tb[:, 1:]).view(np.int8)).ravel()[:ns]
+
+    # ── lettere ──
+    brk = np.zeros(nm, dtype=bool); brk[:ns] = s_cls >= CHAR
+    char_id = np.r_[0, np.cumsum(brk[:-1])]
+    nch = int(char_id[-1]) + 1
+    ln = np.bincount(char_id, minlength=nch)
+    last_mark = np.cumsum(ln) - 1
+    first_mark = last_mark - ln + 1
+    # bit del dash pesato con la distanza dalla fine della lettera
+    shift = np.minimum(last_mark[char_id] - np.arange(nm), 62)
+    bits = np.add.reduceat(is_dash.astype(np.int64) << shift, first_mark)
+    code = (1 << np.minimum(ln, _MAX_CODE + 1)) + bits
+    cp = np.where(ln <= _MAX_CODE, _LUT[np.minimum(code, _LUT.size - 1)], ord('□'))
+    ch_ts = m_ts[first_mark]
+
+    # ── spazi di parola: dopo l'ultimo mark della lettera ──
+    wsp = np.flatnonzero(s_cls == WORD)
+    word_after = np.zeros(nch, dtype=bool)
+    w_ts = np.zeros(nch)
+    word_after[char_id[wsp]] = True
+    w_ts[char_id[wsp]] = s_ts[wsp]
+
+    out_pos = np.arange(nch) + np.r_[0, np.cumsum(word_after)[:-1]]
+    total = nch + int(word_after.sum())
+    out_cp = np.full(total, ord(' '), dtype=np.uint32)
+    out_ts = np.empty(total)
+    out_cp[out_pos] = cp
+    out_ts[out_pos] = ch_ts
+    out_ts[out_pos[word_after] + 1] = w_ts[word_after]
+
+    text = out_cp.astype('<u4').tobytes().decode('utf-32-le')
+    return text, out_ts
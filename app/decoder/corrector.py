@@ -0,0 +1,89 @@
+# app/decoder/corrector.py
+"""
+Correzione a posteriori delle parole decodificate (opzionale, TWI_CORRECT=1).
+
+Per ogni elemento sentito si tiene anche l'alternativa: quanto il mark era
+vicino al confine dot/dash e quanto lo space era vicino al confine
+elemento/lettera (margine nel log, in unità di SIGMA). Chiusa la parola,
+l'osservazione ("-.-.|--.-" + costi) viene cercata nel dizionario MorseTrie
+con Levenshtein pesato sugli elementi: gli scambi E/T, I/S/H, lettere
+spezzate o fuse costano poco solo se il segnale era davvero ambiguo.
+
+Il dizionario (TWI_HOME/words.trie, vedi morse_trie) si apre solo alla prima
+parola da correggere; senza file si usa una piccola lista interna.
+"""
+from __future__ import annotations
+import math, os
+
+from app.decoder.morse_decoder import MORSE_TO_ASCII
+from app.decoder.morse_trie import MorseTrie, encode
+
+# Q-code, abbreviazioni e parole tipiche di un QSO
+BUILTIN_WORDS = """
+CQ DE K KN SK AR BK R TU TNX TKS FB OM YL XYL UR RST 5NN 599 579 NAME OP HR HW CPY ES 73 88
+GM GA GE GN DR PSE AGN WX RIG ANT PWR TEST SOS OK BT HI ABT FER GUD NR QSO QRZ QTH QSL QRM
+QRN QSB QRP QRO QRT QRV QSY QRL QRS QRQ QTR QRX QSK QRG QRU QSP QTC QRA CL CUAGN CUL BCNU SRI
+RPT INFO VY HPE ES WID SIG ALL FM TO AND THE IS IN MY YOUR FOR WORKED LOG BURO EQSL LOTW
+""".split()
+
+SIGMA = 0.20                     # dispersione tipica del log-durata
+_LOG_MID = 0.5*math.log(3.0)     # confine dot/dash e elemento/lettera
+_LOG_WORD = 0.5*math.log(21.0)   # confine lettera/parola
+_MAX_COST = 3.0
+
+def _cost(x: float, mid: float) -> float:
+    return min(_MAX_COST, abs(x - mid)/SIGMA)
+
+class MorseCorrector:
+    def __init__(self, dict_path: str | None = None, on_correct=None, budget: float = 2.0):
+        self.dict_path = dict_path
+        self.on_correct = on_correct      # (grezza, corretta, candidati)
+        self.budget = float(budget)
+        self._trie = None
+        self._reset_word()
+
+    def _reset_word(self):
+        self._code = ""                   # codice della lettera corrente
+        self._elems = []; self._sub = []; self._merge = []
+
+    @property
+    def trie(self) -> MorseTrie:
+        if self._trie is None:
+            if self.dict_path and os.path.exists(self.dict_path):
+                self._trie = MorseTrie(self.dict_path)
+            else:
+                self._trie = MorseTrie(data=encode(BUILTIN_WORDS))
+        return self._trie
+
+    # --- ingresso: durate a tempi certi + dit corrente del decoder ---
+    def mark_ms(self, ms: float, dit: float):
+        if ms <= 0 or dit <= 0: return
+        x = math.log(ms/1000.0/dit)
+        e = '.' if x < _LOG_MID else '-'
+        self._code += e
+        self._elems.append(e); self._sub.append(_cost(x, _LOG_MID))
+
+    def space_ms(self, ms: float, dit: float):
+        if ms <= 0 or dit <= 0 or not self._elems: return
+        x = math.log(ms/1000.0/dit)
+        if x >= _LOG_WORD:
+            self.flush()
+        elif x >= _LOG_MID and self._code:
+            self._elems.append('|'); self._merge.append(_cost(x, _LOG_MID))
+            self._code = ""
+
+    def flush(self):
+        """Chiude la parola in corso e propone l'eventuale correzione."""
+        elems = "".join(self._elems).strip('|')
+        sub, merge = self._sub, self._merge[:elems.count('|')]
+        self._reset_word()
+        if not elems: return None
+        raw = "".join(MORSE_TO_ASCII.get(c, '□') for c in elems.split('|'))
+        if len(raw) < 2 or ('□' not in raw and raw in self.trie):
+            return None
+        # serve solo la migliore: con limit=1 la ricerca si chiude al primo stadio
+        cands = self.trie.search(elems, sub, merge, budget=self.budget, limit=1)
+        if cands and cands[0][1] != raw:
+            if self.on_correct: self.on_correct(raw, cands[0][1], cands)
+            return cands[0][1]
+        return None
@@ -1,8 +1,10 @@
 # app/decoder/morse_decoder.py
 from __future__ import annotations
-import time
 from collections import deque
 
+from cw import clock
+from cw.speed_change import SpeedChangeDetector
+
 MORSE_TO_ASCII = {
     '.-':'A','-...':'B','-.-.':'C','-..':'D','.':'E','..-.':'F','--.':'G','....':'H','..':'I',
     '.---':'J','-.-':'K','.-..':'L','--':'M','-.':'N','---':'O','.--.':'P','--.-':'Q','.-.':'R',
@@ -15,9 +17,10 @@ MORSE_TO_ASCII = {
 class AdaptiveDecoder:
     """
     Decoder CW adattivo con:
-    - stima 'dit' (media dei mark brevi)
+    - stima 'dit' (media mobile dei mark brevi, somma incrementale)
     - hint dal player (hint_dot_ms, force_gap_ms)
     - chiusura lettere/parole dinamica
+    - cambio stazione: SpeedChangeDetector riaggancia subito il dit
     """
     def __init__(self, on_symbol=None, on_char=None, on_text=None):
         self.on_symbol = on_symbol
@@ -28,7 +31,10 @@ class AdaptiveDecoder:
         self._up_ts = None
         self._symbols: list[str] = []
         self._dit_hist = deque(maxlen=24)
+        self._dit_sum = 0.0
         self._dit = 0.060
+        self._marks: list[float] = []     # durate dei mark della lettera corrente
+        self._speed = SpeedChangeDetector()
 
         self._INTRA = 1.5
         self._CHAR  = 3.5
@@ -42,8 +48,7 @@ class AdaptiveDecoder:
         dur = float(ms)/1000.0
         if dur <= 0 or dur > self._MAX_SEG: return
         if dur <= 2.0 * self._dit:
-            self._dit_hist.append(dur)
-            self._dit = max(0.020, min(0.150, sum(self._dit_hist) / max(1, len(self._dit_hist))))
+            self._push_dit(dur)
 
     def force_gap_ms(self, ms: float):
         off_dur = float(ms)/1000.0
@@ -52,7 +57,7 @@ class AdaptiveDecoder:
     # --- API: key edges classici (compat) ---
     def key_edge(self, is_down: bool, ts: float | None = None):
         if ts is None:
-            ts = time.time()
+            ts = clock.now()
         if is_down:
             if self._up_ts is not None:
                 off_dur = max(0.0, min(self._MAX_SEG, ts - self._up_ts))
@@ -69,7 +74,7 @@ class AdaptiveDecoder:
 
     def idle_tick(self, now_ts: float | None = None):
         if self._up_ts is None: return
-        if now_ts is None: now_ts = time.time()
+        if now_ts is None: now_ts = clock.now()
         off_dur = now_ts - self._up_ts
         if off_dur >= self._WORD * self._dit:
             self._flush_char()
@@ -80,16 +85,48 @@ class AdaptiveDecoder:
     def get_wpm(self) -> float:
         return 1.2 / max(1e-6, self._dit)
 
+    # --- stato per l'avvio a caldo (cw/wire_cache.py) ---
+    def get_state(self) -> dict:
+        return {"dit": round(self._dit, 5)}
+
+    def set_state(self, st: dict):
+        """Riparte dal dit salvato; lettera in corso e rilevatore di velocità azzerati."""
+        dit = st.get("dit")
+        if not dit: return
+        self._down_ts = self._up_ts = None
+        self._symbols.clear(); self._marks.clear()
+        self._speed.reset()
+        self._reseed(max(0.020, min(0.150, float(dit))))
+
     # --- interni ---
+    def _push_dit(self, dur: float):
+        if len(self._dit_hist) == self._dit_hist.maxlen:
+            self._dit_sum -= self._dit_hist[0]
+        self._dit_hist.append(dur)
+        self._dit_sum += dur
+        self._dit = max(0.020, min(0.150, self._dit_sum / len(self._dit_hist)))
+
+    def _reseed(self, dit: float):
+        """Nuova velocità: riparti dal dit stimato e riclassifica la lettera in corso."""
+        self._dit_hist.clear(); self._dit_sum = 0.0
+        self._push_dit(dit)
+        self._symbols = ['.' if d < 2.4 * self._dit else '-' for d in self._marks]
+
     def _classify_mark(self, dur: float):
+        new_dit = self._speed.mark(dur, self._dit)
+        if new_dit is not None:
+            self._reseed(new_dit)
         if dur <= 2.0 * self._dit:
-            self._dit_hist.append(dur)
-            self._dit = max(0.020, min(0.150, sum(self._dit_hist) / max(1, len(self._dit_hist))))
+            self._push_dit(dur)
         symbol = '.' if dur < 2.4 * self._dit else '-'
         self._symbols.append(symbol)
+        self._marks.append(dur)
         if self.on_symbol: self.on_symbol(symbol)
 
     def _consume_space(self, off_dur: float):
+        new_dit = self._speed.space(off_dur, self._dit)
+        if new_dit is not None:
+            self._reseed(new_dit)
         if off_dur < self._INTRA * self._dit:
             return
         elif off_dur < self._CHAR * self._dit:
@@ -106,6 +143,7 @@ class AdaptiveDecoder:
         if self.on_char: self.on_char(ch)
         if self.on_text: self.on_text(ch)
         self._symbols.clear()
+        self._marks.clear()
 
 # wrapper compat (API feed/tick) usato da main_app
 class AdaptiveCWDecoder:
@@ -116,3 +154,5 @@ class AdaptiveCWDecoder:
     def get_wpm(self) -> float: return self._dec.get_wpm()
     def hint_dot_ms(self, ms: float): self._dec.hint_dot_ms(ms)
     def force_gap_ms(self, ms: float): self._dec.force_gap_ms(ms)
+    def get_state(self) -> dict: return self._dec.get_state()
+    def set_state(self, st: dict): self._dec.set_state(st)
@@ -0,0 +1,241 @@
+# app/decoder/morse_trie.py
+"""
+Dizionario compatto (nominativi, Q-code, parole comuni) come trie su file,
+letto con mmap + memoryview: nessun parsing all'avvio, le pagine vengono
+caricate dal sistema operativo solo quando servono.
+
+Formato (little-endian, tutto uint32 salvo i caratteri):
+  header  b"MTRI", versione, n_nodi, n_archi, n_parole
+  nodi    3*n_nodi:  primo arco, numero archi, id parola + 1 (0 = nessuna)
+  archi   n_archi:   nodo figlio
+  char    n_archi byte (ASCII), padding a 4
+  offset  n_parole + 1 nel blob
+  blob    parole UTF-8 concatenate
+L'id parola è l'ordine nel file sorgente (prima = più probabile).
+
+Ricerca: Levenshtein pesato nello spazio degli ELEMENTI Morse. Scendendo un
+arco (carattere) si consumano i suoi dot/dash aggiornando una riga DP sparsa
+sulle posizioni dell'osservazione; le celle oltre il budget vengono scartate,
+per cui si esplora solo la parte del trie compatibile con ciò che si è sentito.
+I nodi si espandono in ordine di costo minimo della riga (limite inferiore
+di ogni completamento, i costi non calano): trovate `limit` parole il budget
+scende al costo della peggiore e la ricerca finisce appena la coda lo supera.
+max_steps limita comunque gli archi valutati (risultato migliore finora).
+"""
+from __future__ import annotations
+import heapq, mmap, os, struct
+
+from app.decoder.morse_decoder import MORSE_TO_ASCII
+
+ASCII_TO_MORSE = {ch: code for code, ch in MORSE_TO_ASCII.items()}
+_MAGIC = b"MTRI"
+_HDR = struct.Struct("<4s4I")
+
+# costi di edit (in "deviazioni standard" circa)
+INS_COST   = 1.5     # elemento del candidato non sentito
+DEL_COST   = 1.5     # elemento sentito in più (glitch)
+SPLIT_COST = 1.0     # confine di lettera non sentito
+_NO_EDIT   = min(INS_COST, DEL_COST) - 1e-9   # sotto: nessuna inserzione/cancellazione
+
+def encode(words) -> bytes:
+    """Trie di `words` (ordine = priorità) nel formato su file. Le parole non codificabili vengono saltate."""
+    root = {}
+    order = []
+    for w in words:
+        w = str(w).strip().upper()
+        if not w or any(ch not in ASCII_TO_MORSE for ch in w): continue
+        node = root
+        for ch in w:
+            node = node.setdefault(ch, {})
+        if None not in node:
+            node[None] = len(order); order.append(w)
+    nodes = []; chars = bytearray()
+    edges = []
+    # BFS: i figli di ogni nodo sono contigui
+    queue = [root]; i = 0
+    while i < len(queue):
+        node = queue[i]; i += 1
+        keys = sorted(k for k in node if k is not None)
+        nodes.append((len(edges), len(keys), node.get(None, -1) + 1))
+        for k in keys:
+            edges.append(len(queue)); chars.append(ord(k)); queue.append(node[k])
+    blob = bytearray(); offs = [0]
+    for w in order:
+        blob += w.encode("utf-8"); offs.append(len(blob))
+    chars += b"\0" * (-len(chars) % 4)
+    return b"".join((
+        _HDR.pack(_MAGIC, 1, len(nodes), len(edges), len(order)),
+        struct.pack(f"<{3*len(nodes)}I", *(v for n in nodes for v in n)),
+        struct.pack(f"<{len(edges)}I", *edges),
+        bytes(chars),
+        struct.pack(f"<{len(offs)}I", *offs),
+        bytes(blob)))
+
+def build(words, path: str):
+    """Scrive il trie di `words` in `path` (scrittura atomica)."""
+    data = encode(words)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+class MorseTrie:
+    """Trie su file (mmap) o su bytes; l'apertura avviene alla prima ricerca."""
+    def __init__(self, path: str | None = None, data: bytes | None = None):
+        self.path = path
+        self._data = data
+        self._mm = None
+        self._nodes = None
+
+    def _open(self):
+        if self._nodes is not None: return
+        if self._data is None:
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            buf = memoryview(self._mm)
+        else:
+            buf = memoryview(self._data)
+        magic, ver, nn, ne, nw = _HDR.unpack_from(buf, 0)
+        if magic != _MAGIC or ver != 1:
+            raise ValueError("dizionario Morse non valido")
+        o = _HDR.size
+        self._nodes = buf[o:o + 12*nn].cast("I"); o += 12*nn
+        self._child = buf[o:o + 4*ne].cast("I"); o += 4*ne
+        self._chars = bytes(buf[o:o + ne]); o += ne + (-ne % 4)
+        self._offs = buf[o:o + 4*(nw + 1)].cast("I"); o += 4*(nw + 1)
+        self._blob = buf[o:]
+        # codice Morse di ogni arco (tabella per byte)
+        self._codes = [ASCII_TO_MORSE.get(chr(b), "") for b in range(256)]
+
+    def __len__(self):
+        self._open()
+        return len(self._offs) - 1
+
+    def word(self, wid: int) -> str:
+        self._open()
+        return bytes(self._blob[self._offs[wid]:self._offs[wid + 1]]).decode("utf-8")
+
+    def __contains__(self, word: str) -> bool:
+        self._open()
+        n = 0
+        for ch in word.upper():
+            base, cnt = self._nodes[3*n], self._nodes[3*n + 1]
+            b = ord(ch)
+            # figli ordinati: ricerca binaria sui caratteri
+            lo, hi = base, base + cnt
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._chars[mid] < b: lo = mid + 1
+                else: hi = mid
+            if lo == base + cnt or self._chars[lo] != b: return False
+            n = self._child[lo]
+        return self._nodes[3*n + 2] != 0
+
+    def search(self, elems: str, sub, merge, budget: float = 2.0, limit: int = 3, max_steps: int = 1000):
+        """
+        elems: elementi osservati ('.'/'-') con '|' tra le lettere, es. "-.-.|--.-"
+        sub:   costo di scambio dot<->dash per ogni elemento (len = elementi)
+        merge: costo di fondere le due lettere ai lati di ogni '|'
+        Ritorna [(costo, parola)] ordinati, al più `limit`, entro `budget`.
+        max_steps: archi valutati al massimo (oltre, i migliori trovati fin lì).
+        """
+        self._open()
+        obs = []; bound = {0}; mcost = {}; k = 0
+        for e in elems:
+            if e == '|':
+                bound.add(len(obs)); mcost[len(obs)] = merge[k]; k += 1
+            else:
+                obs.append(e)
+        bound.add(len(obs))
+        # prima sotto i costi di inserzione/cancellazione (solo scambi, molto più
+        # veloce), poi, se mancano parole, con tutto il budget
+        steps = [max_steps]
+        for cap in sorted({min(budget, _NO_EDIT), budget}):
+            best = self._search(obs, sub, bound, mcost, cap, limit, steps)
+            if len(best) >= limit or steps[0] <= 0: break
+        return [(c, self.word(wid)) for c, wid in best]
+
+    def _search(self, obs, sub, bound, mcost, cap, limit, steps):
+        N = len(obs); seen = "".join(obs)
+        msum = [0.0]           # msum[j] = costi di fusione dei confini 1..j
+        for j in range(1, N + 1): msum.append(msum[-1] + mcost.get(j, 0.0))
+        nodes = self._nodes; child = self._child; chars = self._chars; codes = self._codes
+        best = []      # (costo, id), al più `limit`
+        def close(row):
+            # elementi osservati saltati (glitch)
+            if min(row.values(), default=cap) > cap - DEL_COST: return row
+            for j in sorted(row):
+                c = row[j] + DEL_COST
+                while j < N and c <= cap and c < row.get(j + 1, cap + 1):
+                    j += 1; row[j] = c; c += DEL_COST
+            return row
+        # Transizioni di una lettera da una sola cella, calcolate al bisogno col
+        # budget corrente (che scende soltanto: restano valide fino alla fine).
+        trans = {}     # (codice, j) -> ((j', costo), ...)
+        part = {}      # (prefisso del codice, j) -> riga: i codici condividono i prefissi
+        def letter(code, j0):
+            if cap < _NO_EDIT:
+                # niente inserzioni né cancellazioni: la lettera copre obs[j0:j0+len]
+                j2 = j0 + len(code); t = ()
+                if j2 <= N:
+                    c = msum[j2 - 1] - msum[j0]
+                    if seen[j0:j2] != code:
+                        c += sum(s for o, e, s in zip(seen[j0:j2], code, sub[j0:j2]) if o != e)
+                    if c <= cap: t = ((j2, c),)
+                trans[code, j0] = t
+                return t
+            if len(code) > 1:
+                r = part.get((code[:-1], j0))
+                if r is None:
+                    letter(code[:-1], j0); r = part[code[:-1], j0]
+            else:
+                r = {j0: 0.0}
+            e = code[-1]; first = len(code) == 1
+            nr = {}
+            for j, c in r.items():
+                if c <= cap - INS_COST and c + INS_COST < nr.get(j, cap + 1): nr[j] = c + INS_COST
+                if j < N:
+                    v = c if obs[j] == e else c + sub[j]
+                    if not first and j in mcost: v += mcost[j]
+                    if v <= cap and v < nr.get(j + 1, cap + 1): nr[j + 1] = v
+            r = part[code, j0] = close(nr) if nr else nr
+            t = trans[code, j0] = tuple(r.items())
+            return t
+        def step(row, code):
+            # inizio lettera: confine non sentito -> SPLIT; poi min-plus con le transizioni
+            r = {}
+            for j, c in row.items():
+                if j not in bound: c += SPLIT_COST
+                if c > cap: continue
+                t = trans.get((code, j))
+                if t is None: t = letter(code, j)
+                for j2, d in t:
+                    v = c + d
+                    # a metà lettera resta almeno un confine non sentito da pagare
+                    if v <= cap - (0.0 if j2 in bound else SPLIT_COST) and v < r.get(j2, cap + 1): r[j2] = v
+            return r
+        heap = [(0.0, 0, 0, close({0: 0.0}))]; seq = 1
+        while heap and steps[0] > 0:
+            lb, _, n, row = heapq.heappop(heap)
+            if lb > cap: break
+            wid = nodes[3*n + 2]
+            if wid and row.get(N, cap + 1) <= cap:
+                best.append((row[N], wid - 1)); best.sort()
+                if len(best) >= limit:
+                    del best[limit:]; cap = best[-1][0]
+            base, cnt = nodes[3*n], nodes[3*n + 1]; steps[0] -= cnt
+            for k in range(base, base + cnt):
+                r = step(row, codes[chars[k]])
+                if r:
+                    lb = min(c if j in bound else c + SPLIT_COST for j, c in r.items())
+                    heapq.heappush(heap, (lb, seq, child[k], r)); seq += 1
+        return best
+
+if __name__ == "__main__":
+    # python -m app.decoder.morse_trie parole.txt dizionario.trie
+    import sys
+    src, dst = sys.argv[1], sys.argv[2]
+    with open(src, "r", encoding="utf-8") as f:
+        build((ln.split("#", 1)[0] for ln in f), dst)
+    print("ok:", len(MorseTrie(dst)), "parole")
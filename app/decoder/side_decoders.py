@@ -0,0 +1,72 @@
+# app/decoder/side_decoders.py
+"""
+Decodifica leggera dei fili laterali, solo per gli allarmi a parole chiave.
+
+- Un AdaptiveDecoder per filo attivo, alimentato dalle sequenze di tempi
+  dei pacchetti (EV_SEQ + n EV_TIMING, ms con segno): fronti virtuali su
+  un cursore di tempo per filo, senza audio, classificatore o archivio.
+- Il blocco tempi parte dal primo mark: la pausa prima del pacchetto si
+  ricava dall'arrivo (il pacchetto finisce quando arriva) e chiude lettere
+  e parole come sul filo centrale.
+- tick(now) chiude la parola in corso dei fili fermi; dopo IDLE_S secondi
+  senza pacchetti il decoder del filo si scarta: i decoder sono al più
+  quanti i fili attivi della scansione.
+- Il filo centrale (set_center) si salta: lo decodifica il motore.
+- on_text(wire, text) viene chiamato dal thread che esegue feed()/tick().
+"""
+import numpy as np
+
+from app.decoder.morse_decoder import AdaptiveDecoder
+from cw.events import EV_SEQ
+
+class _Wire:
+    __slots__ = ("dec", "cur", "seen", "open")
+
+    def __init__(self, wire: int, on_text):
+        self.cur = float("-inf"); self.seen = 0.0; self.open = False
+        def text(s: str):
+            if s == ' ': self.open = False          # parola chiusa: niente più tick
+            on_text(wire, s)
+        self.dec = AdaptiveDecoder(on_text=text)
+
+class SideDecoders:
+    IDLE_S = 30.0
+
+    def __init__(self, on_text):
+        self.on_text = on_text
+        self._center = None
+        self._wires = {}          # filo -> _Wire
+
+    def set_center(self, wire: int):
+        self._center = int(wire)
+        self._wires.pop(self._center, None)
+
+    def feed(self, ev):
+        """Lotto EVENT_DTYPE: ogni EV_SEQ (value = n) è seguito dai suoi n EV_TIMING."""
+        kind = ev["kind"]; vals = ev["value"].tolist()
+        for i in np.flatnonzero(kind == EV_SEQ).tolist():
+            w = int(ev["wire"][i])
+            if w != self._center:
+                n = int(vals[i])
+                self._seq(w, vals[i+1:i+1+n], float(ev["t"][i]))
+
+    def tick(self, now: float):
+        for w, st in list(self._wires.items()):
+            if st.open: st.dec.idle_tick(now)
+            if now - st.seen >= self.IDLE_S: del self._wires[w]
+
+    def __len__(self):
+        return len(self._wires)
+
+    def _seq(self, w: int, seq, t: float):
+        st = self._wires.get(w)
+        if st is None:
+            st = self._wires[w] = _Wire(w, self.on_text)
+        dec = st.dec
+        c = max(st.cur, t - sum(abs(v) for v in seq)/1000.0)
+        for v in seq:
+            if v > 0:
+                dec.key_edge(True, c); c += v/1000.0; dec.key_edge(False, c)
+            else:
+                c -= v/1000.0
+        st.cur = c; st.seen = t; st.open = True
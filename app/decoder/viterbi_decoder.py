@@ -0,0 +1,289 @@
+# app/decoder/viterbi_decoder.py
+"""
+Decoder CW probabilistico (HMM + Viterbi con beam search).
+
+- Ogni classe di durata è una gaussiana adattiva sul log della durata:
+    mark  -> DOT (1), DASH (3)
+    space -> INTRA (1), CHAR (3), WORD (7)
+  media_c = log(dit) + log(ratio_c): la velocità (dit) si adatta in fretta,
+  i rapporti di classe e le varianze lentamente (EMA); un cambio netto di
+  velocità (SpeedChangeDetector) risemina subito il dit.
+- Decodifica con un beam limitato di ipotesi (codice corrente + testo non
+  ancora confermato), vincolate ai codici Morse validi.
+- I caratteri vengono confermati con un piccolo lookahead: appena tutte le
+  ipotesi concordano, oppure quando la migliore supera LOOKAHEAD caratteri.
+
+Stessa API di AdaptiveDecoder (key_edge/idle_tick) e del wrapper
+AdaptiveCWDecoder (feed/tick). Memoria per filo costante: BEAM ipotesi,
+codici <= 7 elementi, al più LOOKAHEAD+1 caratteri pendenti.
+"""
+from __future__ import annotations
+import math
+
+from app.decoder.morse_decoder import MORSE_TO_ASCII
+from cw import clock
+from cw.speed_change import SpeedChangeDetector
+
+DOT, DASH, INTRA, CHAR, WORD = range(5)
+
+_RATIOS = (1.0, 3.0, 1.0, 3.0, 7.0)
+_PRIORS = (0.55, 0.45, 0.60, 0.30, 0.10)
+_SYM    = ('.', '-')
+
+# tutti i prefissi dei codici validi (vincolo del beam)
+_PREFIXES = frozenset(code[:i] for code in MORSE_TO_ASCII for i in range(1, len(code) + 1))
+_MAX_CODE = max(len(c) for c in MORSE_TO_ASCII)
+
+_BAD_CODE = math.log(1e-4)   # penalità per codice fuori alfabeto (-> '□')
+_PRUNE    = 14.0             # ipotesi oltre questa distanza log dalla migliore: via
+
+class ViterbiDecoder:
+    """
+    Decoder HMM/Viterbi con beam search:
+    - gaussiane adattive per classe (log-durata)
+    - beam vincolato ai codici Morse validi
+    - commit dei caratteri con lookahead limitato
+    """
+    BEAM      = 12
+    LOOKAHEAD = 2
+
+    def __init__(self, on_symbol=None, on_char=None, on_text=None, dit: float = 0.060):
+        self.on_symbol = on_symbol
+        self.on_char = on_char
+        self.on_text = on_text
+
+        self._MIN_SEG = 0.010
+        self._MAX_SEG = 1.200
+
+        # modello: log(dit) + log(ratio) per classe, varianza per classe
+        self._log_dit = math.log(dit)
+        self._log_ratio = [math.log(r) for r in _RATIOS]
+        self._var = [0.30 ** 2] * 5
+        self._log_prior = [math.log(p) for p in _PRIORS]
+        self._speed = SpeedChangeDetector()
+
+        # beam: {(code, pending): score}
+        self._beam = {('', ''): 0.0}
+
+        self._down_ts = None
+        self._up_ts = None
+        self._gap_closed = 0     # 0=aperto, CHAR=lettera chiusa in idle, WORD=anche la parola
+
+    # --- API: key edges classici (compat) ---
+    def key_edge(self, is_down: bool, ts: float | None = None):
+        if ts is None:
+            ts = clock.now()
+        if is_down:
+            if self._up_ts is not None:
+                off_dur = max(0.0, min(self._MAX_SEG, ts - self._up_ts))
+                self._consume_space(off_dur)
+            self._down_ts = ts
+            self._up_ts = None
+        else:
+            if self._down_ts is None:
+                return
+            on_dur = max(0.0, min(self._MAX_SEG, ts - self._down_ts))
+            if on_dur >= self._MIN_SEG:
+                self._consume_mark(on_dur)
+            self._down_ts = None
+            self._up_ts = ts
+            self._gap_closed = 0
+
+    def idle_tick(self, now_ts: float | None = None):
+        if self._up_ts is None: return
+        if now_ts is None: now_ts = clock.now()
+        off_dur = now_ts - self._up_ts
+        if self._gap_closed < WORD and off_dur >= self._threshold(CHAR, WORD):
+            if self._gap_closed < CHAR:
+                self._close_char()
+            self._emit(' ')
+            self._gap_closed = WORD
+        elif self._gap_closed < CHAR and off_dur >= self._threshold(INTRA, CHAR):
+            self._close_char()
+            self._gap_closed = CHAR
+
+    # --- hint dalla pipeline a tempi certi ---
+    def hint_dot_ms(self, ms: float):
+        dur = float(ms)/1000.0
+        if dur <= 0 or dur > self._MAX_SEG: return
+        x = math.log(dur)
+        if self._loglik(DOT, x) >= self._loglik(DASH, x):
+            self._adapt(DOT, x)
+
+    def force_gap_ms(self, ms: float):
+        off_dur = float(ms)/1000.0
+        if off_dur >= self._MIN_SEG:
+            self._consume_space(min(self._MAX_SEG, off_dur))
+
+    def get_wpm(self) -> float:
+        return 1.2 / max(1e-6, self.get_dit())
+
+    def get_dit(self) -> float:
+        return math.exp(self._log_dit)
+
+    # --- stato per l'avvio a caldo (cw/wire_cache.py) ---
+    def get_state(self) -> dict:
+        return {"dit": round(self.get_dit(), 5),
+                "ratios": [round(math.exp(r), 4) for r in self._log_ratio],
+                "var": [round(v, 5) for v in self._var]}
+
+    def set_state(self, st: dict):
+        """Riparte dal modello salvato; beam e rilevatore di velocità azzerati."""
+        dit = st.get("dit")
+        if not dit: return
+        self._log_dit = math.log(max(0.020, min(0.150, float(dit))))
+        ratios, var = st.get("ratios"), st.get("var")
+        if ratios and len(ratios) == len(_RATIOS):
+            self._log_ratio = [math.log(max(1e-3, float(r))) for r in ratios]
+        if var and len(var) == len(_RATIOS):
+            self._var = [min(0.60 ** 2, max(0.12 ** 2, float(v))) for v in var]
+        self._speed.reset()
+        self._beam = {('', ''): 0.0}
+        self._down_ts = self._up_ts = None
+        self._gap_closed = 0
+
+    # --- modello ---
+    def _loglik(self, c: int, x: float) -> float:
+        d = x - (self._log_dit + self._log_ratio[c])
+        v = self._var[c]
+        return self._log_prior[c] - 0.5 * (d * d / v + math.log(v))
+
+    def _threshold(self, a: int, b: int) -> float:
+        # confine (in secondi) tra due classi adiacenti: media geometrica
+        la = self._log_dit + self._log_ratio[a]
+        lb = self._log_dit + self._log_ratio[b]
+        return math.exp(0.5 * (la + lb))
+
+    def _adapt(self, c: int, x: float):
+        d = x - (self._log_dit + self._log_ratio[c])
+        # velocità: veloce; varianza: lenta; rapporto di classe: molto lento
+        self._log_dit = min(math.log(0.150), max(math.log(0.020), self._log_dit + 0.20 * d))
+        self._var[c] = min(0.60 ** 2, max(0.12 ** 2, 0.95 * self._var[c] + 0.05 * d * d))
+        if c not in (DOT, INTRA):
+            r = self._log_ratio[c] + 0.03 * d
+            # mantieni le classi ordinate e separate
+            lo = self._log_ratio[c - 1] + math.log(1.6)
+            self._log_ratio[c] = max(lo, min(math.log(_RATIOS[c] * 1.6), r))
+
+    # --- beam ---
+    def _consume_mark(self, dur: float):
+        new_dit = self._speed.mark(dur, self.get_dit())
+        if new_dit is not None:
+            self._log_dit = math.log(new_dit)
+        x = math.log(dur)
+        ll = (self._loglik(DOT, x), self._loglik(DASH, x))
+        best_by_class = [None, None]
+        nxt = {}
+        for (code, pending), score in self._beam.items():
+            if len(code) >= _MAX_CODE:
+                continue
+            for c in (DOT, DASH):
+                ncode = code + _SYM[c]
+                s = score + ll[c]
+                if ncode not in _PREFIXES:
+                    s += _BAD_CODE
+                key = (ncode, pending)
+                if s > nxt.get(key, -math.inf):
+                    nxt[key] = s
+                    if best_by_class[c] is None or s > best_by_class[c]:
+                        best_by_class[c] = s
+        if not nxt:
+            # codice troppo lungo su tutte le ipotesi: chiudi e riparti
+            self._close_char()
+            return self._consume_mark(dur)
+        self._set_beam(nxt)
+        c = DOT if (best_by_class[DASH] is None or
+                    (best_by_class[DOT] is not None and best_by_class[DOT] >= best_by_class[DASH])) else DASH
+        self._adapt(c, x)
+        if self.on_symbol: self.on_symbol(_SYM[c])
+
+    def _consume_space(self, dur: float):
+        if dur < self._MIN_SEG: return
+        new_dit = self._speed.space(dur, self.get_dit())
+        if new_dit is not None:
+            self._log_dit = math.log(new_dit)
+        closed = self._gap_closed
+        self._gap_closed = 0
+        x = math.log(dur)
+        if closed:
+            # lettera già chiusa in idle: aggiungi solo lo spazio di parola mancante
+            if closed < WORD and self._loglik(WORD, x) > self._loglik(CHAR, x):
+                self._emit(' ')
+            c = WORD if self._loglik(WORD, x) > self._loglik(CHAR, x) else CHAR
+            self._adapt(c, x)
+            return
+
+        ll = (self._loglik(INTRA, x), self._loglik(CHAR, x), self._loglik(WORD, x))
+        best_by_class = {}
+        nxt = {}
+        for (code, pending), score in self._beam.items():
+            for c, l in zip((INTRA, CHAR, WORD), ll):
+                s = score + l
+                if c == INTRA:
+                    key = (code, pending)
+                else:
+                    ch = ''
+                    if code:
+                        ch = MORSE_TO_ASCII.get(code)
+                        if ch is None:
+                            ch = '□'; s += _BAD_CODE
+                    add = ch + (' ' if c == WORD and (ch or (pending and pending[-1] != ' ')) else '')
+                    key = ('', pending + add)
+                if s > nxt.get(key, -math.inf):
+                    nxt[key] = s
+                    if s > best_by_class.get(c, -math.inf):
+                        best_by_class[c] = s
+        self._set_beam(nxt)
+        self._adapt(max(best_by_class, key=best_by_class.get), x)
+        self._commit()
+
+    def _set_beam(self, nxt: dict):
+        top = sorted(nxt.items(), key=lambda kv: kv[1], reverse=True)[:self.BEAM]
+        best = top[0][1]
+        # normalizza i punteggi per evitare deriva numerica
+        self._beam = {k: s - best for k, s in top if best - s <= _PRUNE}
+
+    def _commit(self):
+        """Conferma il prefisso comune; oltre LOOKAHEAD forza la migliore."""
+        pendings = [p for (_, p) in self._beam]
+        common = pendings[0]
+        for p in pendings[1:]:
+            i = 0
+            n = min(len(common), len(p))
+            while i < n and common[i] == p[i]: i += 1
+            common = common[:i]
+            if not common: break
+        (best_code, best_pend), _ = max(self._beam.items(), key=lambda kv: kv[1])
+        if len(best_pend) - len(common) > self.LOOKAHEAD:
+            common = best_pend[:len(best_pend) - self.LOOKAHEAD]
+            self._beam = {k: s for k, s in self._beam.items() if k[1].startswith(common)}
+        if common:
+            n = len(common)
+            self._beam = {(code, p[n:]): s for (code, p), s in self._beam.items()}
+            self._emit(common)
+
+    def _close_char(self):
+        """Gap lungo in idle: chiudi la lettera e conferma la migliore ipotesi."""
+        (code, pending), _ = max(self._beam.items(), key=lambda kv: kv[1])
+        if code:
+            pending += MORSE_TO_ASCII.get(code, '□')
+        self._beam = {('', ''): 0.0}
+        if pending:
+            self._emit(pending)
+
+    def _emit(self, text: str):
+        for ch in text:
+            if ch != ' ' and self.on_char: self.on_char(ch)
+            if self.on_text: self.on_text(ch)
+
+# wrapper compat (API feed/tick) come AdaptiveCWDecoder
+class ViterbiCWDecoder:
+    def __init__(self, on_symbol=None, on_text=None):
+        self._dec = ViterbiDecoder(on_symbol=on_symbol, on_char=None, on_text=on_text)
+    def feed(self, is_on: bool, t: float): self._dec.key_edge(bool(is_on), t)
+    def tick(self, t: float): self._dec.idle_tick(t)
+    def get_wpm(self) -> float: return self._dec.get_wpm()
+    def hint_dot_ms(self, ms: float): self._dec.hint_dot_ms(ms)
+    def force_gap_ms(self, ms: float): self._dec.force_gap_ms(ms)
+    def get_state(self) -> dict: return self._dec.get_state()
+    def set_state(self, st: dict): self._dec.set_state(st)
@@ -0,0 +1,322 @@
+# app/engine.py
+"""
+Motore di ricezione: client di rete, riproduzione dei tempi, decoder e audio.
+
+- Gira nel processo della GUI (thread, TWI_ENGINE=thread) oppure in un
+  processo a parte (app/engine_process.py): stessa classe, cambia solo il
+  sink degli eventi (EventBus o ring in memoria condivisa).
+- Nel sink vanno i lotti del client (fronti, envelope, tempi) e l'uscita
+  del decoder (EV_TEXT, EV_SYMBOL): la GUI li svuota una volta per frame.
+- Il gate audio RX agisce nel thread di rete (CenterAudioGate), il lotto
+  del filo centrale passa subito al thread del decoder: né il suono né la
+  decodifica aspettano il frame della GUI.
+- Allarmi a parole chiave su tutti i fili della scansione: il testo del
+  filo centrale dal decoder principale, quello dei laterali da
+  SideDecoders (tempi per-pacchetto, un decoder leggero per filo attivo),
+  ognuno con il proprio numero di filo.
+- Tasto seriale (TWI_KEY): il suo thread vive dove vive il motore, quindi
+  con TWI_ENGINE=process i fronti non risentono del GIL della GUI.
+  Con TWI_KEYER=A|B i contatti vanno al keyer iambico, che chiama tx_key
+  sulla sua griglia di elementi (sidetone, disegno e decoder della TX).
+- Avvio a caldo (TWI_WARMSTART): lo stato appreso del filo centrale va in
+  WireStateCache al cambio di filo, ogni SNAPSHOT_S e alla chiusura; il
+  cambio di filo (anche il primo, all'avvio) risemina decoder,
+  classificatore e dot del client dalla cache.
+- Senza Qt: importabile nel processo motore.
+"""
+import time
+import numpy as np
+
+from app import settings
+from app.decode_worker import DecodeWorker
+from app.decoder.morse_decoder import AdaptiveCWDecoder
+from app.decoder.side_decoders import SideDecoders
+from cw.audio_engine import AudioEngine
+from cw.sender_classifier import SenderClassifier
+from cw.fist_index import FistIndex
+from cw.keyword_alert import KeywordAlert
+from cw.events import (EventBus, make_events, EV_CENTER_KEY, EV_MARK, EV_SPACE, EV_ELEM,
+                       EV_TX, EV_RESET, EV_TEXT, EV_SYMBOL, EV_SEQ, EV_TIMING)
+from net.cwcom_client import CWComClient
+from cw import clock
+
+VERSION = "TWI Modular 4.4"
+
+class CenterAudioGate:
+    """Gate audio del filo centrale con hard-mute: nessun suono finché siamo dentro lo space."""
+    CENTER_KINDS = (EV_CENTER_KEY, EV_MARK, EV_SPACE, EV_ELEM)
+
+    def __init__(self, audio):
+        self.audio = audio
+        self.reset()
+
+    def reset(self):
+        self._timing_seen_ts = 0.0     # ultimo mark/space (s) — “modalità tempi”
+        self._hard_mute_until = 0.0    # silenzio forzato fino a (s)
+
+    def _gate(self, want_on: bool, now: float):
+        if want_on and now < self._hard_mute_until:
+            self.audio.rx_key(False, now)
+            return
+        self.audio.rx_key(bool(want_on), now)
+
+    def feed(self, ev):
+        if ev["kind"][0] not in self.CENTER_KINDS:          # mai misti con i laterali
+            return
+        for t, k, _, v in ev.tolist():
+            if k == EV_MARK:                                 # tempi per-pacchetto: AUTOREVOLI
+                self._timing_seen_ts = t
+                self._hard_mute_until = 0.0                  # fine dello space: sblocca
+                self._gate(True, t)                          # tono ON
+            elif k == EV_SPACE:
+                self._timing_seen_ts = t
+                self._gate(False, t)                         # tono OFF
+                # hard mute: evita riaccensioni spurie durante lo space
+                self._hard_mute_until = t + min(0.5, 0.9 * (v/1000.0))
+            elif k == EV_CENTER_KEY and t - self._timing_seen_ts >= 0.5:
+                self._gate(v > 0.5, t)                       # fronti FALLBACK (per-arrival)
+
+class Engine:
+    DECODE_KINDS = (EV_CENTER_KEY, EV_MARK, EV_SPACE, EV_TX, EV_RESET)
+    SIDE_KINDS = (EV_SEQ, EV_TIMING)   # tempi dei fili laterali (solo allarmi)
+    SNAPSHOT_S = 10.0      # stato del filo centrale nella cache ogni N s
+    MIN_MARKS = 12         # fronti di mark del filo prima di salvarne lo stato
+
+    def __init__(self, callsign: str, on_title=None, sink=None, volume: int = 55):
+        self.callsign = callsign
+        self.on_title = on_title
+        self.sink = sink if sink is not None else EventBus()
+        self.client = None
+        self._center = 133             # filo del testo in uscita (ordine del thread decoder)
+
+        self.audio = AudioEngine(tone_hz=600.0, samplerate=48000, volume=volume)
+        self.gate = CenterAudioGate(self.audio)
+
+        # Decoder + classificatore (TWI_DECODER=viterbi per il motore HMM)
+        decoder_cls = AdaptiveCWDecoder
+        if settings.DECODER_ENGINE == "viterbi":
+            from app.decoder.viterbi_decoder import ViterbiCWDecoder as decoder_cls
+        self.decoder = decoder_cls(on_symbol=self._on_symbol, on_text=self._on_decoded_text)
+        self.classifier = SenderClassifier(index=FistIndex.load(settings.OPERATORS_DB))
+        self._src_mode = "—"; self._src_op = None
+
+        # Allarmi su nominativi/parole chiave (automa ricostruito in background)
+        self.alerts = KeywordAlert(on_match=self._on_alert)
+        own = [callsign] if callsign != "TWI Client" else []
+        self.alerts.set_terms(settings.watch_terms() + own)
+        self.side = SideDecoders(on_text=self.alerts.feed)
+        self.side.set_center(self._center)
+
+        # Correzione a dizionario (opzionale; il dizionario si apre al primo uso)
+        self.corrector = None
+        if settings.CORRECT:
+            from app.decoder.corrector import MorseCorrector
+            self.corrector = MorseCorrector(settings.DICT_FILE, on_correct=self._on_correction)
+
+        # Archivio del traffico (scrittura in un thread a parte)
+        self.archive = None
+        if settings.ARCHIVE:
+            from archive.traffic_archive import TrafficArchive
+            self.archive = TrafficArchive(settings.ARCHIVE_DIR)
+
+        # Stato per filo (avvio a caldo)
+        self.wire_cache = None
+        if settings.WARM_START:
+            from cw.wire_cache import WireStateCache
+            self.wire_cache = WireStateCache(settings.WIRE_CACHE_FILE)
+        self._marks_seen = 0; self._snap_t = 0.0
+
+        self.worker = DecodeWorker(self._decode_events, idle=self._idle)
+
+        # Tasto seriale: qualsiasi contatto chiuso = tasto giù; paddle -> keyer iambico
+        self.key = None; self._key_mask = 0; self.keyer = None
+        if settings.KEY_PORT:
+            from cw.serial_key import SerialKey, parse_port
+            port, mode = parse_port(settings.KEY_PORT)
+            on_edge = self._on_key_edge
+            if settings.KEYER:
+                from cw.iambic_keyer import IambicKeyer
+                self.keyer = IambicKeyer(self.tx_key, wpm=settings.KEYER_WPM, mode=settings.KEYER,
+                                         weight=settings.KEYER_WEIGHT)
+                on_edge = self.keyer.paddle_edge
+            try:
+                self.key = SerialKey(port, on_edge, lines=settings.KEY_LINES, mode=mode,
+                                     debounce_ms=settings.KEY_DEBOUNCE_MS).start()
+            except (OSError, ValueError, ImportError) as e:
+                print("Tasto seriale non disponibile:", e)
+
+    # ─────────────────────────── comandi (dalla GUI o dal canale di controllo)
+    def start_audio(self):
+        self.audio.start()
+
+    def connect(self, host: str, center: int):
+        self.disconnect()
+        self.set_center(center)
+        self.client = CWComClient(host=host, center_wire=center, on_events=self._on_events,
+                                  span=settings.SPAN, audio=False, callsign=self.callsign, version=VERSION)
+        self._seed_client(center)
+        try: self.client.start()
+        except Exception as e: print("Errore avvio client:", e)
+
+    def disconnect(self):
+        if self.client:
+            try: self.client.stop()
+            except: pass
+        self.client = None
+        self.gate.reset()
+        self.audio.rx_key(False); self.audio.tx_key(False)
+
+    def set_center(self, wire: int):
+        if self.client:
+            self.client.set_center_wire(wire); self._seed_client(wire)
+        self.worker.submit(make_events(clock.now(), [(EV_RESET, int(wire), 0.0)]))
+
+    def _seed_client(self, wire: int):
+        st = self.wire_cache.get(wire) if self.wire_cache else None
+        dit = st and st.get("dec", {}).get("dit")
+        if dit: self.client.seed_dot_est(dit)
+
+    def enroll(self, name: str):
+        """Registra il fist del filo centrale come operatore `name` e salva l'indice."""
+        self.worker.call(lambda: self._enroll(name))
+
+    def set_volume(self, vol: int):
+        self.audio.set_volume(vol)
+        try:
+            if self.client: self.client.set_volume(vol)
+        except: pass
+
+    def tx_key(self, is_on: bool, t: float = None):
+        if t is None: t = clock.now()
+        self.audio.tx_key(bool(is_on), t)
+        ev = make_events(t, [(EV_TX, 0, 1.0 if is_on else 0.0)])
+        self.sink.push_array(ev)                 # la GUI lo disegna sul corpo centrale
+        self.worker.submit(ev)
+
+    def drain(self):
+        return self.sink.drain()
+
+    @property
+    def dropped(self) -> int:
+        return self.sink.dropped
+
+    def close(self):
+        if self.key: self.key.stop()
+        if self.keyer: self.keyer.stop()
+        self.disconnect()
+        self.worker.stop()
+        if self.wire_cache:
+            self._snapshot(clock.now()); self.wire_cache.close()
+        if self.archive: self.archive.close()
+        self.audio.stop()
+        for k, (n, p50, mx) in self.audio.latency().items():
+            print(f"Audio {k}: {n} fronti, evento -> DAC p50 {p50:.1f} ms, max {mx:.1f} ms")
+
+    # ─────────────────────────── thread di rete
+    def _on_events(self, ev):
+        self.sink.push_array(ev)
+        self.gate.feed(ev)
+        dec = np.isin(ev["kind"], self.DECODE_KINDS + self.SIDE_KINDS)
+        if dec.any():
+            self.worker.submit(ev[dec])
+
+    # ─────────────────────────── thread del tasto seriale
+    def _on_key_edge(self, line: int, closed: bool, t: float):
+        was = self._key_mask != 0
+        self._key_mask = self._key_mask | (1 << line) if closed else self._key_mask & ~(1 << line)
+        if (self._key_mask != 0) != was:
+            self.tx_key(not was, t)
+
+    # ─────────────────────────── thread del decoder
+    def _decode_events(self, ev):
+        """Decoder, classificatore, correttore, release audio; laterali a SideDecoders."""
+        side = np.isin(ev["kind"], self.SIDE_KINDS)
+        if side.any():
+            self.side.feed(ev[side]); ev = ev[~side]
+        for t, k, w, v in ev.tolist():
+            if k == EV_CENTER_KEY or k == EV_TX:
+                self.decoder.feed(v > 0.5, t)
+                if k == EV_CENTER_KEY and v > 0.5:          # mark del filo (non la nostra TX)
+                    self._marks_seen += 1
+                    if t - self._snap_t >= self.SNAPSHOT_S: self._snapshot(t)
+            elif k == EV_MARK:
+                self.decoder.hint_dot_ms(v)
+                self.classifier.update_mark_ms(v); self._maybe_update_mode_badge()
+                # aggiorna release in base al dot
+                try:
+                    wpm = self.decoder.get_wpm(); dot = 1.2 / max(1e-6, wpm)
+                    self.audio.set_dot_seconds(dot)
+                    if self.corrector: self.corrector.mark_ms(v, dot)
+                except: pass
+            elif k == EV_SPACE:
+                self.decoder.force_gap_ms(v)
+                self.classifier.update_space_ms(v); self._maybe_update_mode_badge()
+                if self.corrector:
+                    self.corrector.space_ms(v, 1.2 / max(1e-6, self.decoder.get_wpm()))
+            elif k == EV_RESET:
+                self._snapshot(t)
+                self._center = w; self.side.set_center(w)
+                self.classifier.reset(); self._src_mode = "—"; self._src_op = None
+                self._warm_start(w)
+
+    def _idle(self, now: float):
+        self.decoder.tick(now); self.side.tick(now)
+
+    def _enroll(self, name: str):
+        name = name.strip().upper()
+        if not name: return
+        if not self.classifier.enroll(name):
+            self._title(f"TWO_Morse — fist del filo {self._center} ancora insufficiente per {name}")
+            return
+        try: self.classifier.index.save(settings.OPERATORS_DB)
+        except OSError as e: print("Indice operatori: salvataggio non riuscito:", e)
+        self.classifier.operator = (name, 0.0); self._maybe_update_mode_badge()
+        self._title(f"TWO_Morse — operatore {name} registrato (filo {self._center})")
+
+    def _snapshot(self, t: float):
+        """Stato appreso del filo centrale nella cache (dopo almeno MIN_MARKS mark)."""
+        self._snap_t = t
+        if self.wire_cache is None or self._marks_seen < self.MIN_MARKS: return
+        self.wire_cache.put(self._center, {"dec": self.decoder.get_state(),
+                                           "cls": self.classifier.get_state()})
+
+    def _warm_start(self, wire: int):
+        self._marks_seen = 0
+        st = self.wire_cache.get(wire) if self.wire_cache else None
+        if not st: return
+        self.decoder.set_state(st.get("dec", {}))
+        self.classifier.set_state(st.get("cls", {}))
+        try: self.audio.set_dot_seconds(1.2 / max(1e-6, self.decoder.get_wpm()))
+        except: pass
+        self._maybe_update_mode_badge()
+
+    def _emit_text(self, text: str):
+        self.sink.push_array(make_events(clock.now(), [(EV_TEXT, self._center, ord(c)) for c in text]))
+
+    def _on_symbol(self, sym: str):
+        self.sink.push_array(make_events(clock.now(), [(EV_SYMBOL, self._center, 0.0 if sym == '.' else 1.0)]))
+
+    def _on_decoded_text(self, text: str):
+        self.alerts.feed(self._center, text)
+        if self.archive:
+            self.archive.append(self._center, text, wpm=self.decoder.get_wpm(), mode=self.classifier.get()[0])
+        self._emit_text(text)
+
+    def _on_correction(self, raw: str, fixed: str, cands):
+        self._emit_text(f"⟨{fixed}⟩ ")
+
+    def _on_alert(self, wire: int, term: str, ts: float):
+        print(f"[ALERT] filo {wire}: {term} @ {time.strftime('%H:%M:%S', time.localtime(ts))}")
+        self._title(f"TWO_Morse — ALERT: {term} sul filo {wire}")
+
+    def _maybe_update_mode_badge(self):
+        mode, wpm = self.classifier.get()
+        op = self.classifier.get_operator()
+        name = op[0] if op else None
+        if (mode != self._src_mode or name != self._src_op) and mode in ("AUTO","HUMAN"):
+            self._src_mode = mode; self._src_op = name
+            who = f" — {name}?" if name else ""
+            self._title(f"TWO_Morse — RX: {mode} ~{int(round(wpm))} WPM{who}")
+
+    def _title(self, s: str):
+        if self.on_title: self.on_title(s)
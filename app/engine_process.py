@@ -0,0 +1,157 @@
+# app/engine_process.py
+"""
+Motore di ricezione in un processo a parte (TWI_ENGINE=process).
+
+- Il processo motore esegue Engine (client, riproduzione, decoder, audio)
+  con un proprio GIL: il costo dei frame della GUI non sposta più i fronti
+  né il gate audio, e la decodifica usa un altro core.
+- Eventi verso la GUI: ShmEventRing, ring di record EVENT_DTYPE in
+  multiprocessing.shared_memory. Un solo consumatore (la GUI); i thread
+  produttori del motore si serializzano con un lock locale, quindi tra i
+  due processi resta un ring SPSC senza lock: intestazione con contatori
+  monotoni di testa/coda e scarti, poi i record.
+- Canale di controllo: una Pipe. GUI -> motore: ("connect", host, centro),
+  ("disconnect",), ("center", filo), ("volume", v), ("tx", on, t),
+  ("enroll", nome), ("close",).
+  Motore -> GUI: ("title", testo).
+- clock.now() è perf_counter, orologio monotono di sistema (CLOCK_MONOTONIC,
+  QueryPerformanceCounter): gli istanti dei record valgono anche nella GUI.
+  Un orologio iniettato con clock.set_clock() resta nel processo GUI.
+"""
+import multiprocessing as mp
+import threading
+import numpy as np
+from multiprocessing import shared_memory
+
+from cw.events import EVENT_DTYPE
+
+_HDR = 64              # head, tail, dropped, capacity (int64) + riserva
+
+class ShmEventRing:
+    def __init__(self, name: str = None, capacity: int = 1 << 16):
+        if name is None:
+            n = 1
+            while n < int(capacity): n <<= 1
+            self.shm = shared_memory.SharedMemory(create=True, size=_HDR + n * EVENT_DTYPE.itemsize)
+            self._hdr = np.ndarray(4, dtype=np.int64, buffer=self.shm.buf)
+            self._hdr[:] = (0, 0, 0, n)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self._hdr = np.ndarray(4, dtype=np.int64, buffer=self.shm.buf)
+            n = int(self._hdr[3])
+        self.name = self.shm.name
+        self.capacity = n
+        self._mask = n - 1
+        self._buf = np.ndarray(n, dtype=EVENT_DTYPE, buffer=self.shm.buf, offset=_HDR)
+        self._lock = threading.Lock()          # solo tra i thread produttori del motore
+
+    # --- produttore (processo motore) ---
+    def push_array(self, ev) -> bool:
+        n = len(ev)
+        if not n: return True
+        with self._lock:
+            head, tail = int(self._hdr[0]), int(self._hdr[1])
+            if tail - head + n > self.capacity:
+                self._hdr[2] += n
+                return False
+            i = tail & self._mask; first = min(n, self.capacity - i)
+            self._buf[i:i + first] = ev[:first]
+            if first < n: self._buf[:n - first] = ev[first:]
+            self._hdr[1] = tail + n            # pubblica dopo i dati
+        return True
+
+    # --- consumatore (GUI) ---
+    def drain(self) -> np.ndarray:
+        head, tail = int(self._hdr[0]), int(self._hdr[1])
+        if head == tail:
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        i, j = head & self._mask, tail & self._mask
+        if i < j: out = self._buf[i:j].copy()
+        else:     out = np.concatenate((self._buf[i:], self._buf[:j]))
+        self._hdr[0] = tail
+        return out
+
+    @property
+    def dropped(self) -> int:
+        return int(self._hdr[2])
+
+    def close(self, unlink: bool = False):
+        self._hdr = self._buf = None           # niente viste vive sul buffer prima di chiudere
+        self.shm.close()
+        if unlink:
+            try: self.shm.unlink()
+            except FileNotFoundError: pass
+
+def _engine_main(shm_name: str, conn, callsign: str, volume: int):
+    """Corpo del processo motore: Engine sul ring condiviso, comandi dalla Pipe."""
+    from app.engine import Engine
+    ring = ShmEventRing(shm_name)
+    send_lock = threading.Lock()
+    def on_title(s):
+        with send_lock:
+            try: conn.send(("title", s))
+            except (OSError, EOFError): pass
+    eng = Engine(callsign, on_title=on_title, sink=ring, volume=volume)
+    eng.start_audio()
+    try:
+        while True:
+            try: msg = conn.recv()
+            except (EOFError, OSError): break          # GUI terminata
+            cmd = msg[0]
+            if   cmd == "connect":    eng.connect(msg[1], msg[2])
+            elif cmd == "disconnect": eng.disconnect()
+            elif cmd == "center":     eng.set_center(msg[1])
+            elif cmd == "volume":     eng.set_volume(msg[1])
+            elif cmd == "tx":         eng.tx_key(msg[1], msg[2])
+            elif cmd == "enroll":     eng.enroll(msg[1])
+            elif cmd == "close":      break
+    finally:
+        eng.close()
+        ring.close()
+
+class EngineProcess:
+    """Lato GUI del motore in processo: stessa interfaccia di Engine."""
+    def __init__(self, callsign: str, on_title=None, volume: int = 55, capacity: int = 1 << 16):
+        self.on_title = on_title
+        self.ring = ShmEventRing(capacity=capacity)
+        self._conn, child = mp.Pipe()
+        ctx = mp.get_context("spawn")          # niente fork del processo Qt
+        self.proc = ctx.Process(target=_engine_main, name="TWI-engine", daemon=True,
+                                args=(self.ring.name, child, callsign, int(volume)))
+        self.proc.start()
+        child.close()
+        self._alive = True
+
+    def _send(self, *msg):
+        if not self._alive: return
+        try: self._conn.send(msg)
+        except (OSError, EOFError, BrokenPipeError):
+            self._alive = False; print("Motore: processo terminato")
+
+    def start_audio(self): pass                # l'audio si apre nel processo motore
+    def connect(self, host: str, center: int): self._send("connect", host, int(center))
+    def disconnect(self):                      self._send("disconnect")
+    def set_center(self, wire: int):           self._send("center", int(wire))
+    def set_volume(self, vol: int):            self._send("volume", int(vol))
+    def tx_key(self, is_on: bool, t: float = None): self._send("tx", bool(is_on), t)
+    def enroll(self, name: str):               self._send("enroll", str(name))
+
+    def drain(self):
+        try:
+            while self._alive and self._conn.poll():
+                msg = self._conn.recv()
+                if msg[0] == "title" and self.on_title: self.on_title(msg[1])
+        except (OSError, EOFError):
+            self._alive = False; print("Motore: processo terminato")
+        return self.ring.drain()
+
+    @property
+    def dropped(self) -> int:
+        return self.ring.dropped
+
+    def close(self):
+        self._send("close")
+        self.proc.join(timeout=3.0)
+        if self.proc.is_alive(): self.proc.terminate()
+        self._conn.close()
+        self.ring.close(unlink=True)
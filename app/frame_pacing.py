@@ -0,0 +1,70 @@
+# app/frame_pacing.py
+"""
+Griglia di tempo del waterfall e statistiche dei frame.
+
+RowClock: le righe avanzano a passo fisso (ROW_DT) sul tempo reale, non sui
+tick del timer UI. A ogni frame advance() dice quante righe sono maturate dal
+frame precedente (0, 1 o più dopo un rallentamento): l'asse dei tempi resta
+esatto. Oltre max_rows (un'intera schermata) si salta avanti.
+
+FrameStats: intervalli tra frame e righe per frame sugli ultimi N frame.
+"""
+from collections import deque
+import numpy as np
+
+ROW_DT = 1.0 / 30.0
+
+class RowClock:
+    def __init__(self, dt: float = ROW_DT, max_rows: int = 400):
+        self.dt = float(dt)
+        self.max_rows = int(max_rows)
+        self._t = None              # inizio della prossima riga
+
+    def reset(self, now: float = None):
+        self._t = now
+
+    def advance(self, now: float):
+        """(inizio della prima riga, numero di righe) maturate fino a now."""
+        if self._t is None:
+            self._t = now
+            return now, 0
+        n = int((now - self._t) / self.dt)
+        if n > self.max_rows:
+            self._t += (n - self.max_rows) * self.dt
+            n = self.max_rows
+        t0 = self._t
+        self._t += n * self.dt
+        return t0, n
+
+class FrameStats:
+    def __init__(self, window: int = 300, target_dt: float = ROW_DT):
+        self.target_dt = float(target_dt)
+        self._dt = deque(maxlen=window)
+        self._rows = deque(maxlen=window)
+        self._last = None
+
+    def frame(self, now: float, rows: int = 0):
+        if self._last is not None:
+            self._dt.append(now - self._last)
+            self._rows.append(rows)
+        self._last = now
+
+    def summary(self) -> dict:
+        if not self._dt:
+            return {"fps": 0.0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0,
+                    "late": 0, "rows_per_frame": 0.0}
+        d = np.fromiter(self._dt, dtype=np.float64)
+        p50, p95, p99 = np.percentile(d, (50, 95, 99))
+        return {
+            "fps": len(d) / max(1e-9, float(d.sum())),
+            "mean_ms": 1e3 * float(d.mean()),
+            "p50_ms": 1e3 * float(p50), "p95_ms": 1e3 * float(p95), "p99_ms": 1e3 * float(p99),
+            "max_ms": 1e3 * float(d.max()),
+            "late": int(np.count_nonzero(d > 1.5 * self.target_dt)),
+            "rows_per_frame": float(np.mean(self._rows)),
+        }
+
+    def __str__(self):
+        s = self.summary()
+        return ("{fps:.1f} fps  media {mean_ms:.1f} ms  p95 {p95_ms:.1f}  p99 {p99_ms:.1f}  "
+                "max {max_ms:.1f}  in ritardo {late}  righe/frame {rows_per_frame:.2f}").format(**s)
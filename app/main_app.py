@@ -1,8 +1,12 @@
 # app/main_app.py
-import sys, os, numpy as np
-from time import perf_counter
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QInputDialog
+import sys, os
+from app import startup                 # t0 dell'avvio: prima degli import pesanti
+import numpy as np
+from datetime import datetime, timedelta
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QInputDialog, QShortcut
+from PyQt5.QtGui import QKeySequence
 from PyQt5.QtCore import QTimer, QObject, pyqtSignal
+startup.mark("import Qt + NumPy")
 
 from app.ui_layout import build_ui, COORDS
 from app.widgets.waterfall import Waterfall
@@ -10,25 +14,46 @@ from app.widgets.needle_meter import NeedleSMeter
 from app.widgets.marker_bar import MarkerBar
 from app.widgets.channel_scale import ChannelScale
 
-from net.cwcom_client import CWComClient
 from cw.activity_probe import ActivityProbe
-from app.decoder.morse_decoder import AdaptiveCWDecoder
+from app import settings
 from cw.cw_tx_encoder import TxEncoder
 from cw.tx_input import TxInput
-from cw.audio_engine import AudioEngine
-from cw.sender_classifier import SenderClassifier
+from cw.wire_timeline import KeyTimeline
+from app.frame_pacing import RowClock, FrameStats, ROW_DT
+from app.profiler import Profiler
+from app.text_sink import TextSink
+from app.engine import Engine
+from cw.events import (EV_ENV, EV_KEY, EV_LEVEL, EV_CENTER_KEY, EV_MARK, EV_SPACE,
+                       EV_SEQ, EV_TIMING, EV_TX, EV_TEXT, EV_SYMBOL)
+from cw import clock
+# sottosistemi opzionali (Viterbi, correttore, archivio, storico waterfall,
+# overlay del profiler, motore in processo) importati solo se attivati
+startup.mark("import moduli app")
 
 def _cols_evenly_spaced(ncols:int, width:int):
     if ncols <= 1: return [width//2]
     step = width / float(ncols + 1)
     return [int((i+1)*step) for i in range(ncols)]
 
+def _parse_when(s:str):
+    """'HH:MM[:SS]' (oggi, o ieri se nel futuro) oppure 'AAAA-MM-GG HH:MM[:SS]' -> epoch."""
+    s = s.strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try: return datetime.strptime(s, fmt).timestamp()
+        except ValueError: pass
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try: t = datetime.strptime(s, fmt).time()
+        except ValueError: continue
+        d = datetime.combine(datetime.now().date(), t)
+        if d > datetime.now(): d -= timedelta(days=1)
+        return d.timestamp()
+    return None
+
 def wires_around(center:int, span:int=5):
     start = max(1, int(center) - span)
     return list(range(start, start + 2*span + 1))
 
 class UiBus(QObject):
-    append_text = pyqtSignal(str)
     set_title   = pyqtSignal(str)
 
 class MainWindow(QMainWindow):
@@ -37,11 +62,14 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("TWO_Morse"); self.setFixedSize(1600, 700)
         self.app = app
 
+        startup.mark("QApplication")
         callsign, ok = QInputDialog.getText(self, "Callsign", "Inserisci il tuo nominativo (es. IZ6198SWL):")
         self.callsign = callsign.strip() if ok and callsign.strip() else "TWI Client"
+        startup.mark("nominativo", interactive=True)
 
         central = QWidget(); self.setCentralWidget(central)
         self.ui, self.coords = build_ui(central)
+        startup.mark("build_ui")
 
         # Waterfall (ridotto 15 px per marker+barra)
         wf_x, wf_y, wf_w, wf_h_orig = self.coords["waterfall"]
@@ -49,6 +77,15 @@ class MainWindow(QMainWindow):
         self.waterfall = Waterfall(wf_w, wf_h, central)
         self.waterfall.setGeometry(wf_x, wf_y, wf_w, wf_h)
         self.waterfall.set_running(False); self.waterfall.raise_()
+        self.waterfall.set_colormap(settings.COLORMAP)
+        # Storico su disco (TWI_WF_HISTORY ore): rotella, Ctrl+rotella, Ctrl+G
+        self.wf_history = None
+        if settings.WF_HISTORY_HOURS > 0:
+            from archive.waterfall_history import WaterfallHistory
+            self.wf_history = WaterfallHistory(settings.WF_HISTORY_FILE, wf_w,
+                                               int(settings.WF_HISTORY_HOURS * 3600 / ROW_DT))
+            self.waterfall.set_history(self.wf_history)
+            QShortcut(QKeySequence("Ctrl+G"), self, activated=self._jump_to_time)
 
         # Marker + scala canali
         mb_h = 14
@@ -57,7 +94,7 @@ class MainWindow(QMainWindow):
         self.marker.set_fraction(0.5)
 
         cs_h = 22
-        self.chan_scale = ChannelScale(wf_w, cs_h, central, span=5)
+        self.chan_scale = ChannelScale(wf_w, cs_h, central, span=settings.SPAN)
         self.chan_scale.setGeometry(wf_x, wf_y + wf_h + mb_h + 0, wf_w, cs_h)
         self.chan_scale.set_center_channel(133)
 
@@ -66,51 +103,64 @@ class MainWindow(QMainWindow):
         self.smeter.setGeometry(*self.coords["smeter"])
         self.smeter.set_level(0,0)
 
+        # Profiler (TWI_PROFILE): fasi del tick + paint dei widget
+        self.profiler = Profiler(settings.PROFILE)
+        for name, wdg in (("waterfall.paint", self.waterfall), ("scale.paint", self.chan_scale),
+                          ("smeter.paint", self.smeter)):
+            self.profiler.wrap(wdg, "paintEvent", name)
+        self.prof_overlay = None
+        if settings.PROFILE:
+            from app.widgets.profiler_overlay import ProfilerOverlay
+            self.prof_overlay = ProfilerOverlay(self.profiler, central)
+            self.prof_overlay.move(wf_x + 4, wf_y + 4)
+            QShortcut(QKeySequence("Ctrl+P"), self,
+                      activated=lambda: self.prof_overlay.setVisible(not self.prof_overlay.isVisible()))
+
+        # Ctrl+E: registra il fist del filo centrale nell'indice operatori
+        QShortcut(QKeySequence("Ctrl+E"), self, activated=self._enroll_operator)
+
         # Stato
         self._center = 133
         self._s_target = 0.0; self._s_ema = 0.0
-        self._center_gate = 0.0
-        self._center_gate_target = 0.0
+        # corpo centrale: mark con timestamp, righe su griglia di tempo fissa
+        self.center_tl = KeyTimeline()
+        self.row_clock = RowClock(max_rows=wf_h)
+        self.frame_stats = FrameStats(); self._stats_ts = 0.0
+        self._wf_geo = None             # geometria colonne/corpo, per (centro, larghezza)
+
+        # Testo decodificato: a lotti per frame, documento limitato
+        self.text_sink = TextSink(self.ui["decoder_box"], preview=self.ui["decoder_preview"])
 
         # Laterali
-        self.probe = ActivityProbe(
-            center_wire=self._center,
-            scenic=True,
-            env_threshold=0.03,
-            scenic_mode="active",
-            scenic_prob_active=0.42
-        )
-
-        # Decoder + classificatore
-        self.decoder = AdaptiveCWDecoder(
-            on_symbol=lambda s: self._append_decoder(s),
-            on_text=lambda t: self._append_decoder(t)
-        )
-        self.classifier = SenderClassifier(); self._src_mode = "—"
+        self.probe = ActivityProbe(center_wire=self._center)
 
         # TX locale
         self.encoder = TxEncoder(on_tx_event=self._on_tx_event)
         self.tx_input = TxInput(self.app)
         self.tx_input.bind_spacebar(self.encoder.key_down, self.encoder.key_up)
 
-        # Audio CW
-        self.audio = AudioEngine(tone_hz=600.0, samplerate=48000, volume=55)
-        self.audio.start()
-
         # Bus segnali UI (thread-safe)
         self._bus = UiBus()
-        self._bus.append_text.connect(self._append_decoder_on_ui)
         self._bus.set_title.connect(self._set_title_on_ui)
 
-        # —— Stato anti-beep negli spazi ——
-        self._timing_seen_ts = 0.0     # ultimo arrivo di mark/space (s) — “modalità tempi”
-        self._hard_mute_until = 0.0    # silenzio forzato fino a (s)
+        # Motore RX: client, riproduzione, decoder, allarmi, archivio e audio.
+        # Thread di questo processo, oppure un processo a parte
+        # (TWI_ENGINE=process). Gli eventi si svuotano una volta per frame.
+        if settings.ENGINE == "process":
+            from app.engine_process import EngineProcess
+            self.engine = EngineProcess(self.callsign, on_title=self._bus.set_title.emit)
+        else:
+            self.engine = Engine(self.callsign, on_title=self._bus.set_title.emit)
+        self.engine.set_center(self._center)
+        self._timing_ev_t = 0.0        # ultimo mark/space già applicato (istante evento)
+        QTimer.singleShot(0, self.engine.start_audio)     # PortAudio aperto dopo il primo frame
 
-        self.client = None
         self._wire_ui()
 
         self._ui_timer = QTimer(self); self._ui_timer.setInterval(33)
         self._ui_timer.timeout.connect(self._ui_tick); self._ui_timer.start()
+        self._first_frame = True
+        startup.mark("MainWindow")
 
         if not self.ui["server_input"].text().strip():
             self.ui["server_input"].setText("http://5.250.190.24")
@@ -136,164 +186,153 @@ class MainWindow(QMainWindow):
     def _set_center(self, v:int):
         self._center = int(v)
         self.probe.set_center(self._center)
-        if self.client: self.client.set_center_wire(self._center)
+        self._wf_geo = None
+        self.engine.set_center(self._center)
         self.marker.set_fraction(0.5)
         self.chan_scale.set_center_channel(self._center)
 
     def _on_knob_vol(self, vol:int):
-        self.audio.set_volume(vol)
-        try:
-            if self.client: self.client.set_volume(vol)
-        except: pass
-
-    def _audio_gate(self, want_on: bool):
-        """Gate audio con hard-mute: nessun suono finché siamo dentro lo space."""
-        now = perf_counter()
-        if want_on and now < self._hard_mute_until:
-            self.audio.rx_key(False)
-            return
-        self.audio.rx_key(bool(want_on))
-
-    def _using_timings(self) -> bool:
-        """Siamo in modalità 'tempi' se abbiamo visto mark/space negli ultimi 0.5 s."""
-        return (perf_counter() - self._timing_seen_ts) < 0.5
+        self.engine.set_volume(vol)
 
     # ─────────────────────────── connect / client
     def _on_connect(self, on:bool):
         host = self.ui["server_input"].text().strip()
         if on:
-            self._start_client(host, self._center)
+            self.engine.connect(host, self._center)
             self.waterfall.set_running(True)
         else:
-            self._stop_client()
+            self.engine.disconnect()
             self.waterfall.set_running(False); self.waterfall.clear()
             self.smeter.set_level(0.0, 0.0)
-            self._center_gate = self._center_gate_target = 0.0
-            self._hard_mute_until = 0.0
-            self.audio.rx_key(False); self.audio.tx_key(False)
-
-    def _start_client(self, host:str, center:int):
-        self._stop_client()
-
-        def cb_env(wire, env): self.probe.update_env(int(wire), float(env))
-        def cb_key(wire, is_on): self.probe.update_env(int(wire), float(self.probe.env.get(int(wire),0.0)), key_on=bool(is_on))
-        def cb_s(level, over): self._s_target = float(level)
-
-        # ——— Fronti FALLBACK (per-arrival): usali solo se NON abbiamo tempi recenti ———
-        def cb_center_key(is_on):
-            self.decoder.feed(bool(is_on), perf_counter())
-            if not self._using_timings():
-                self._audio_gate(bool(is_on))
-                self._center_gate_target = 1.0 if is_on else 0.0
-
-        def cb_center_sym(sym): self._append_decoder(sym)
-
-        # ——— Tempi per-pacchetto: AUTOREVOLI (audio + gate UI) ———
-        def cb_center_mark_ms(ms):
-            now = perf_counter()
-            self._timing_seen_ts = now
-            self._hard_mute_until = 0.0             # fine dello space: sblocca
-            self._audio_gate(True)                  # tono ON
-            self._center_gate_target = 1.0          # illumina corpo centrale
-            # decoder + classifier
-            self.decoder.hint_dot_ms(ms)
-            self.classifier.update_mark_ms(ms); self._maybe_update_mode_badge()
-            # aggiorna release in base al dot
-            try:
-                wpm = self.decoder.get_wpm(); dot = 1.2 / max(1e-6, wpm)
-                self.audio.set_dot_seconds(dot)
-            except: pass
-            # piccolo bump S-meter
-            self._s_target = min(1.0, 0.85*self._s_target + 0.35)
-
-        def cb_center_space_ms(ms):
-            now = perf_counter()
-            self._timing_seen_ts = now
-            self._audio_gate(False)                 # tono OFF
-            self._center_gate_target = 0.0          # spegni corpo centrale
-            self.decoder.force_gap_ms(ms)
-            self.classifier.update_space_ms(ms); self._maybe_update_mode_badge()
-            # hard mute: evita riaccensioni spurie durante lo space
-            self._hard_mute_until = now + min(0.5, 0.9 * (float(ms)/1000.0))
-
-        self.client = CWComClient(
-            host=host, center_wire=center,
-            on_env=cb_env, on_key=cb_key,
-            on_center_level=cb_s,
-            on_center_element=cb_center_sym,
-            on_center_keying=cb_center_key,
-            on_center_mark_ms=cb_center_mark_ms,
-            on_center_space_ms=cb_center_space_ms,
-            span=5, audio=False, callsign=self.callsign, version="TWI Modular 4.4"
-        )
-        try: self.client.start()
-        except Exception as e: print("Errore avvio client:", e)
-
-    def _stop_client(self):
-        if self.client:
-            try: self.client.stop()
-            except: pass
-        self.client = None
+            self._apply_events(self.engine.drain())     # testo ancora in coda; i fronti si azzerano sotto
+            self.center_tl.clear(); self.probe.clear(); self.row_clock.reset()
 
     def _on_tx_event(self, is_on:bool, t_now:float):
-        self.decoder.feed(is_on, t_now)
-        self._center_gate_target = 1.0 if is_on else 0.0
-        self.audio.tx_key(bool(is_on))
+        self.engine.tx_key(bool(is_on), t_now)  # sidetone + decoder; il corpo centrale arriva come EV_TX
         # TODO: TX verso server
 
-    # ====== Decoder text: thread-safe ======
-    def _append_decoder(self, text:str): self._bus.append_text.emit(text)
-    def _append_decoder_on_ui(self, text:str):
-        if not self.ui["btn_decoder"].isChecked(): return
-        box = self.ui["decoder_box"]
-        tc = box.textCursor(); tc.movePosition(tc.End)
-        box.setTextCursor(tc); box.insertPlainText(text)
-
     # ====== Titlebar: thread-safe ======
-    def _maybe_update_mode_badge(self):
-        mode, wpm = self.classifier.get()
-        if mode != self._src_mode and mode in ("AUTO","HUMAN"):
-            self._src_mode = mode
-            self._bus.set_title.emit(f"TWO_Morse — RX: {mode} ~{int(round(wpm))} WPM")
     def _set_title_on_ui(self, s:str):
         self.setWindowTitle(s)
 
-    # ─────────────────────────── UI tick
-    def _ui_tick(self):
-        now = perf_counter()
-        self.decoder.tick(now)
+    # ─────────────────────────── eventi
+    def _apply_events(self, ev):
+        """Thread UI: un lotto di eventi -> probe, timeline centrale, S-meter, testo."""
+        kind = ev["kind"]
+        env = kind == EV_ENV
+        if env.any():                                # solo l'ultimo valore per filo conta
+            self.probe.env.update(zip(ev["wire"][env].tolist(), ev["value"][env].tolist()))
+        rest = np.flatnonzero(~env & (kind != EV_TIMING))
+        if not rest.size:
+            return
+        t_, k_, w_, v_ = (ev[f][rest].tolist() for f in ("t", "kind", "wire", "value"))
+        pos = rest.tolist()
+        for j in range(len(pos)):
+            t, k, w, v = t_[j], k_[j], w_[j], v_[j]
+            if k == EV_KEY:
+                self.probe.update_env(w, self.probe.env.get(w, 0.0), key_on=v > 0.5, t=t)
+            elif k == EV_SEQ:
+                i = pos[j] + 1
+                self.probe.add_timings(w, ev["value"][i:i + int(v)].astype(np.int32).tolist(), t)
+            elif k == EV_LEVEL:
+                self._s_target = v
+            elif k == EV_MARK:
+                self._timing_ev_t = t
+                self.center_tl.mark(t, v/1000.0)     # corpo centrale sul waterfall
+                self._s_target = min(1.0, 0.85*self._s_target + 0.35)   # piccolo bump S-meter
+            elif k == EV_SPACE:
+                self._timing_ev_t = t
+            elif k == EV_CENTER_KEY:
+                self._s_target = v                   # S-meter dai fronti, niente polling del livello
+                if t - self._timing_ev_t >= 0.5:
+                    self.center_tl.key(v > 0.5, t)
+            elif k == EV_TX:
+                self.center_tl.key(v > 0.5, t)
+            elif k == EV_TEXT:
+                self.text_sink.append(chr(int(v)))
+            elif k == EV_SYMBOL:
+                self.text_sink.symbol('-' if v > 0.5 else '.')
 
-        # Waterfall: laterali + “corpo” centrale agganciato al gate
-        if self.ui["btn_connect"].isChecked():
-            w = self.waterfall.width()
-            wires = wires_around(self._center, 5)
+    # ─────────────────────────── UI tick
+    def _wf_geometry(self, w:int):
+        """Colonne dei fili e sprite del corpo centrale: ricalcolati solo se cambiano centro o larghezza."""
+        if self._wf_geo is None or self._wf_geo[0] != (self._center, w):
+            wires = wires_around(self._center, settings.SPAN)
             cols  = _cols_evenly_spaced(len(wires), w)
             self.probe.set_columns({wire:x for wire,x in zip(wires, cols)})
-
-            line = self.probe.next_line(w)
-
-            # animazione gate con attack/release
-            up, dn = 0.62, 0.18
-            self._center_gate += (self._center_gate_target - self._center_gate) * (up if self._center_gate_target > self._center_gate else dn)
-            self._center_gate = float(np.clip(self._center_gate, 0.0, 1.0))
-
             x = cols[len(cols)//2]; half = 3
             x1 = max(0, x-half); x2 = min(w-1, x+half)
-            ci = self._center_gate
-            if ci > 0.05:
-                width_px = x2 - x1 + 1
-                ramp = np.linspace(0.55, 1.0, num=(half+1), dtype=np.float32)
-                prof = (np.concatenate([ramp[:-1], ramp[::-1]])
-                        if width_px == 2*half+1 else np.ones(width_px, dtype=np.float32))
-                line[x1:x2+1] = np.maximum(line[x1:x2+1],
-                                           (0.18 + 0.82*ci) * prof[:width_px])
+            width_px = x2 - x1 + 1
+            ramp = np.linspace(0.55, 1.0, num=(half+1), dtype=np.float32)
+            prof = (np.concatenate([ramp[:-1], ramp[::-1]])
+                    if width_px == 2*half+1 else np.ones(width_px, dtype=np.float32))
+            self._wf_geo = ((self._center, w), (x1, x2, prof[:width_px]))
+        return self._wf_geo[1]
 
-            self.waterfall.push_line(line)
+    def _ui_tick(self):
+        P = self.profiler; P.frame_start()
+        now = clock.now()
+        ev = self.engine.drain()
+        if len(ev): self._apply_events(ev)
+        P.lap("tick.events")
+
+        # Waterfall: tutte le righe maturate dall'ultimo frame (griglia fissa)
+        rows = 0
+        if self.ui["btn_connect"].isChecked():
+            t0, rows = self.row_clock.advance(now)
+            if rows:
+                w = self.waterfall.width()
+                x1, x2, prof = self._wf_geometry(w)
+                lines = self.probe.render(t0, self.row_clock.dt, rows, w, now)
+
+                # corpo centrale: frazione esatta di tasto giù in ogni riga
+                cov = self.center_tl.coverage(t0, self.row_clock.dt, rows, now)
+                lit = cov > 0.05
+                if lit.any():
+                    body = (0.18 + 0.82*cov[lit])[:, None] * prof[None, :]
+                    lines[lit, x1:x2+1] = np.maximum(lines[lit, x1:x2+1], body)
+                P.lap("tick.render")
+
+                self.waterfall.push_lines(lines, clock.wall(t0), self.row_clock.dt)
+                P.lap("tick.waterfall")
+        self.frame_stats.frame(now, rows)
+        if settings.SHOW_FPS and now - self._stats_ts > 5.0:
+            self._stats_ts = now
+            print("[waterfall]", self.frame_stats, "eventi persi:", self.engine.dropped)
 
         # S-meter: attack veloce, release morbido
         k = 0.58 if self._s_target > self._s_ema else 0.12
         self._s_ema += (self._s_target - self._s_ema) * k
         self.smeter.set_level(self._s_ema, 0.0)
+        P.lap("tick.smeter")
+
+        # Testo del decoder: un solo inserimento per frame
+        self.text_sink.flush(self.ui["btn_decoder"].isChecked())
+        P.lap("tick.text")
+
+    def _jump_to_time(self):
+        s, ok = QInputDialog.getText(self, "Storico waterfall", "Vai a (HH:MM[:SS] o AAAA-MM-GG HH:MM):")
+        ts = _parse_when(s) if ok else None
+        if ts is not None: self.waterfall.jump_to(ts)
+
+    def _enroll_operator(self):
+        s, ok = QInputDialog.getText(self, "Indice operatori", f"Nominativo di chi trasmette sul filo {self._center}:")
+        if ok and s.strip(): self.engine.enroll(s)
+
+    def paintEvent(self, ev):
+        super().paintEvent(ev)
+        if self._first_frame:
+            self._first_frame = False
+            startup.mark("primo frame")
+            if settings.STARTUP_REPORT: print(startup.report(settings.STARTUP_BUDGET_MS))
+
+    def closeEvent(self, ev):
+        self.engine.close()
+        if self.wf_history: self.wf_history.close()
+        if settings.PROFILE and settings.PROFILE_DUMP:
+            try: self.profiler.dump(settings.PROFILE_DUMP)
+            except OSError as e: print("Profiler: dump non riuscito:", e)
+        super().closeEvent(ev)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,104 @@
+# app/profiler.py
+"""
+Profiler dei frame UI (TWI_PROFILE=1).
+
+- frame_start() apre un frame, lap(nome) chiude la fase corrente del tick
+  (tempo dall'ultimo lap), wrap(obj, attr, nome) cronometra un metodo
+  d'istanza (paintEvent dei widget, inserimento testo del decoder).
+- Per fase: ultimi N tempi (ms) -> percentili p50/p99 e massimo; intervalli
+  tra frame con FrameStats. worst() = fase con p99 più alto.
+- Eventi grezzi (frame, fase, inizio, durata) in un ring limitato:
+  dump(path) scrive CSV oppure, con estensione .json, un trace in formato
+  Chrome (chrome://tracing, Perfetto).
+- Disabilitato: frame_start()/lap() ritornano subito e wrap() non installa
+  nulla, quindi i widget restano con i loro metodi originali.
+"""
+import csv, json, os
+from collections import deque
+from time import perf_counter
+import numpy as np
+
+from app.frame_pacing import FrameStats
+
+class Profiler:
+    def __init__(self, enabled: bool = False, window: int = 600, max_events: int = 200000):
+        self.enabled = bool(enabled)
+        self.window = int(window)
+        self.frames = FrameStats(window)
+        self._stages = {}                           # fase -> deque di ms
+        self._events = deque(maxlen=max_events)     # (frame, fase, inizio s, durata s)
+        self._frame = 0
+        self._lap = 0.0
+        self._origin = perf_counter()
+
+    def frame_start(self):
+        if not self.enabled: return
+        now = perf_counter()
+        self._frame += 1
+        self.frames.frame(now)
+        self._lap = now
+
+    def lap(self, name: str):
+        if not self.enabled: return
+        now = perf_counter()
+        self._record(name, self._lap, now)
+        self._lap = now
+
+    def _record(self, name: str, t0: float, t1: float):
+        d = self._stages.get(name)
+        if d is None: d = self._stages[name] = deque(maxlen=self.window)
+        d.append(1e3 * (t1 - t0))
+        self._events.append((self._frame, name, t0, t1 - t0))
+
+    def wrap(self, obj, attr: str, name: str):
+        """Sostituisce obj.attr con la versione cronometrata (solo se abilitato)."""
+        if not self.enabled: return
+        fn = getattr(obj, attr)
+        def timed(*a, **k):
+            t0 = perf_counter()
+            try: return fn(*a, **k)
+            finally: self._record(name, t0, perf_counter())
+        setattr(obj, attr, timed)
+
+    # --- lettura ---
+    def stages(self) -> dict:
+        """fase -> (p50, p99, max) in ms."""
+        out = {}
+        for name, d in self._stages.items():
+            if not d: continue
+            a = np.fromiter(d, dtype=np.float64, count=len(d))
+            p50, p99 = np.percentile(a, (50, 99))
+            out[name] = (float(p50), float(p99), float(a.max()))
+        return out
+
+    def worst(self):
+        st = self.stages()
+        if not st: return None
+        name = max(st, key=lambda k: st[k][1])
+        return name, st[name][1]
+
+    def text(self) -> str:
+        f = self.frames.summary()
+        s = "{:.1f} fps  frame p50 {:.1f}  p99 {:.1f} ms".format(f["fps"], f["p50_ms"], f["p99_ms"])
+        w = self.worst()
+        if w: s += "\npeggiore: {} p99 {:.2f} ms".format(*w)
+        for name, (p50, p99, mx) in sorted(self.stages().items()):
+            s += "\n  {:<16} {:6.2f} {:6.2f} {:7.2f}".format(name, p50, p99, mx)
+        return s
+
+    def dump(self, path: str):
+        """CSV (frame, fase, inizio_s, durata_ms) o trace Chrome se path finisce in .json."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        ev = list(self._events)
+        if path.lower().endswith(".json"):
+            trace = [{"name": n, "ph": "X", "pid": 1, "tid": 1, "cat": n.split(".")[0],
+                      "ts": 1e6 * (t0 - self._origin), "dur": 1e6 * d, "args": {"frame": fr}}
+                     for fr, n, t0, d in ev]
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                wr = csv.writer(f)
+                wr.writerow(("frame", "stage", "start_s", "dur_ms"))
+                for fr, n, t0, d in ev:
+                    wr.writerow((fr, n, "%.6f" % (t0 - self._origin), "%.4f" % (1e3 * d)))
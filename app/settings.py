@@ -0,0 +1,83 @@
+# app/settings.py
+"""
+Opzioni di avvio lette dall'ambiente (nessun file di config per ora).
+  TWI_DECODER = adaptive | viterbi
+  TWI_HOME    = cartella dati (default ~/.twi_morse): indice operatori, ecc.
+  TWI_WATCH   = termini da sorvegliare, separati da virgola (+ TWI_HOME/watch.txt)
+  TWI_CORRECT = 1 per la correzione a dizionario (TWI_HOME/words.trie)
+  TWI_ARCHIVE = 0 per non archiviare il traffico decodificato (TWI_HOME/archive)
+  TWI_COLORMAP = cold | sdr | inferno | viridis | gray (palette del waterfall)
+  TWI_FPS     = 1 per stampare le statistiche dei frame del waterfall
+  TWI_PROFILE = 1 per il profiler dei frame UI (overlay, Ctrl+P lo nasconde)
+  TWI_PROFILE_DUMP = file .csv o .json (trace Chrome) scritto all'uscita col profiler attivo
+  TWI_STARTUP = 1 per il resoconto dei tempi di avvio (TWI_STARTUP_BUDGET = ms, default 1500)
+  TWI_SPAN    = fili scansionati per lato attorno al centrale (default 5, fino a 200)
+  TWI_WF_HISTORY = ore di storico del waterfall su disco (TWI_HOME/waterfall.ring; 0 = no)
+  TWI_ENGINE  = thread | process (rete, decoder e audio in un processo a parte)
+  TWI_KEY     = porta seriale del tasto (/dev/ttyUSB0, COM3; bytes:/dev/pts/N = stato come byte)
+  TWI_KEY_LINES = linee dei contatti, separate da virgola (default CTS; paddle es. DSR,CTS)
+  TWI_KEY_DEBOUNCE = debounce del tasto in ms (default 3)
+  TWI_KEYER   = A | B per il keyer iambico sul paddle (linee: punto, linea; default tasto verticale)
+  TWI_KEYER_WPM = velocità del keyer (default 25), TWI_KEYER_WEIGHT = peso 25..75 (default 50)
+  TWI_WARMSTART = 0 per non ricordare velocità e fist per filo (TWI_HOME/wires.json)
+"""
+import os
+
+DECODER_ENGINE = os.environ.get("TWI_DECODER", "adaptive").strip().lower()
+CORRECT = os.environ.get("TWI_CORRECT", "0").strip().lower() in ("1", "on", "true", "yes")
+ARCHIVE = os.environ.get("TWI_ARCHIVE", "1").strip().lower() in ("1", "on", "true", "yes")
+COLORMAP = os.environ.get("TWI_COLORMAP", "cold").strip().lower()
+SHOW_FPS = os.environ.get("TWI_FPS", "0").strip().lower() in ("1", "on", "true", "yes")
+PROFILE = os.environ.get("TWI_PROFILE", "0").strip().lower() in ("1", "on", "true", "yes")
+STARTUP_REPORT = os.environ.get("TWI_STARTUP", "0").strip().lower() in ("1", "on", "true", "yes")
+try:
+    STARTUP_BUDGET_MS = float(os.environ.get("TWI_STARTUP_BUDGET", "1500"))
+except ValueError:
+    STARTUP_BUDGET_MS = 1500.0
+PROFILE_DUMP = os.path.expanduser(os.environ.get("TWI_PROFILE_DUMP", "").strip())
+try:
+    SPAN = max(0, min(200, int(os.environ.get("TWI_SPAN", "5"))))
+except ValueError:
+    SPAN = 5
+try:
+    WF_HISTORY_HOURS = max(0.0, float(os.environ.get("TWI_WF_HISTORY", "0")))
+except ValueError:
+    WF_HISTORY_HOURS = 0.0
+
+ENGINE = os.environ.get("TWI_ENGINE", "thread").strip().lower()
+KEY_PORT = os.environ.get("TWI_KEY", "").strip()
+KEY_LINES = [l.strip().upper() for l in os.environ.get("TWI_KEY_LINES", "CTS").split(",") if l.strip()]
+try:
+    KEY_DEBOUNCE_MS = max(0.0, float(os.environ.get("TWI_KEY_DEBOUNCE", "3")))
+except ValueError:
+    KEY_DEBOUNCE_MS = 3.0
+WARM_START = os.environ.get("TWI_WARMSTART", "1").strip().lower() in ("1", "on", "true", "yes")
+KEYER = os.environ.get("TWI_KEYER", "").strip().upper()
+if KEYER not in ("A", "B"): KEYER = ""
+try:
+    KEYER_WPM = max(5.0, min(60.0, float(os.environ.get("TWI_KEYER_WPM", "25"))))
+except ValueError:
+    KEYER_WPM = 25.0
+try:
+    KEYER_WEIGHT = max(25.0, min(75.0, float(os.environ.get("TWI_KEYER_WEIGHT", "50"))))
+except ValueError:
+    KEYER_WEIGHT = 50.0
+
+DATA_DIR = os.path.expanduser(os.environ.get("TWI_HOME", "~/.twi_morse"))
+OPERATORS_DB = os.path.join(DATA_DIR, "operators.json")
+DICT_FILE = os.path.join(DATA_DIR, "words.trie")
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+WF_HISTORY_FILE = os.path.join(DATA_DIR, "waterfall.ring")
+WIRE_CACHE_FILE = os.path.join(DATA_DIR, "wires.json")
+
+WATCH_FILE = os.path.join(DATA_DIR, "watch.txt")
+
+def watch_terms():
+    """Watch-list: TWI_WATCH + una riga per termine in watch.txt (# = commento)."""
+    terms = [t for t in os.environ.get("TWI_WATCH", "SOS,QRZ").split(",") if t.strip()]
+    try:
+        with open(WATCH_FILE, "r", encoding="utf-8") as f:
+            terms += [ln.split("#", 1)[0] for ln in f if ln.split("#", 1)[0].strip()]
+    except OSError:
+        pass
+    return terms
@@ -0,0 +1,28 @@
+# app/startup.py
+"""
+Tempi di avvio fino al primo frame (TWI_STARTUP=1 per il resoconto).
+
+T0 è l'istante del primo import di questo modulo: va importato prima dei
+moduli pesanti. mark(nome) chiude una fase; le fasi interattive (es. il
+dialogo del nominativo) sono mostrate ma escluse dal totale confrontato
+con il budget (TWI_STARTUP_BUDGET, ms).
+"""
+from time import perf_counter
+
+T0 = perf_counter()
+_marks = []            # (nome, t, interattiva)
+
+def mark(name: str, interactive: bool = False):
+    _marks.append((name, perf_counter(), bool(interactive)))
+
+def report(budget_ms: float = None) -> str:
+    lines = ["[avvio]"]; prev = T0; total = 0.0
+    for name, t, inter in _marks:
+        ms = 1e3 * (t - prev); prev = t
+        if not inter: total += ms
+        lines.append("  {:<22} {:8.1f} ms{}".format(name, ms, "  (attesa utente)" if inter else ""))
+    line = "  {:<22} {:8.1f} ms".format("totale", total)
+    if budget_ms:
+        line += "  budget {:.0f} ms{}".format(budget_ms, "  SFORATO" if total > budget_ms else "")
+    lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,80 @@
+# app/text_sink.py
+"""
+Uscita testo del decoder, a lotti e con memoria limitata.
+
+- append() (caratteri confermati) e symbol() (anteprima dei punti/linee del
+  carattere in corso) si chiamano da qualsiasi thread: solo un append in
+  lista sotto lock, nessun segnale Qt per carattere.
+- flush(), una volta per frame dal thread UI, inserisce tutto il lotto con
+  un solo insertText in fondo al documento e aggiorna l'anteprima (etichetta
+  separata: i simboli non finiscono nel testo).
+- Il testo è spezzato in righe di line_chars caratteri (a capo su uno spazio
+  se possibile, altrimenti forzato); il documento tiene al più max_blocks
+  righe (QPlainTextEdit.setMaximumBlockCount), le righe complete restano in
+  un ring di ring_lines righe (history()).
+"""
+import threading
+from collections import deque
+from PyQt5.QtGui import QTextCursor
+
+class TextSink:
+    PREVIEW_MAX = 12
+
+    def __init__(self, box, preview=None, max_blocks: int = 500, line_chars: int = 96,
+                 ring_lines: int = 5000):
+        self.box = box
+        self.preview = preview
+        self.line_chars = int(line_chars)
+        box.setMaximumBlockCount(int(max_blocks))
+        self.lines = deque(maxlen=int(ring_lines))   # righe complete (anche quelle uscite dal documento)
+        self._line = []                              # riga in corso
+        self._pending = []
+        self._sym = ""; self._sym_dirty = False
+        self._lock = threading.Lock()
+
+    # --- da qualsiasi thread ---
+    def append(self, text: str):
+        if not text: return
+        with self._lock:
+            self._pending.append(text)
+            if self._sym: self._sym = ""; self._sym_dirty = True
+
+    def symbol(self, sym: str):
+        with self._lock:
+            self._sym = (self._sym + sym)[-self.PREVIEW_MAX:]; self._sym_dirty = True
+
+    # --- thread UI ---
+    def flush(self, show: bool = True):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            sym = self._sym if self._sym_dirty else None
+            self._sym_dirty = False
+        if sym is not None and self.preview is not None:
+            self.preview.setText(sym)
+        if not batch or not show:
+            return
+        text = self._wrap("".join(batch))
+        bar = self.box.verticalScrollBar()
+        at_end = bar.value() >= bar.maximum() - 2
+        tc = QTextCursor(self.box.document())
+        tc.movePosition(QTextCursor.End)
+        tc.insertText(text)
+        if at_end: bar.setValue(bar.maximum())
+
+    def _wrap(self, text: str) -> str:
+        out = []; line = self._line; n = self.line_chars
+        for ch in text:
+            if ch == "\n" or (ch == " " and len(line) >= n) or len(line) >= n + 16:
+                self.lines.append("".join(line)); line.clear(); out.append("\n")
+                if ch in " \n": continue
+            line.append(ch); out.append(ch)
+        return "".join(out)
+
+    def history(self) -> str:
+        """Testo confermato nel ring (righe vecchie comprese)."""
+        return "\n".join(list(self.lines) + ["".join(self._line)])
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear(); self._sym = ""; self._sym_dirty = True
+        self._line.clear(); self.box.clear()
@@ -1,9 +1,9 @@
 # app/ui_layout.py
 import os
 from PyQt5.QtWidgets import QWidget, QLabel, QLineEdit, QPlainTextEdit
-from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
 from app.widgets.image_buttons import ImageButton, ImageToggleButton, RotatingKnob
+from app import assets
 
 # Root del progetto = .../TWI_Morse
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -21,6 +21,7 @@ COORDS = dict(
     btn_server    =(1256, 420,  81,  43),
     decoder_toggle=( 249, 492,  81,  43),
     decoder_box   =(  77, 547, 806,  57),
+    decoder_preview=( 337, 500, 160,  26),
     knob_rf       =( 926, 416, 280, 280),
     knob_vol      =(1236, 520, 120, 120),
     btn_vertical  =(1373, 348,  81,  43),
@@ -35,9 +36,9 @@ def build_ui(parent: QWidget):
     # Sfondo chassis
     bg = QLabel(parent); bg.setGeometry(0,0,1600,700)
     if os.path.exists(CHASSIS):
-        pm = QPixmap(CHASSIS)
-        bg.setPixmap(pm)
+        bg.setStyleSheet("background:#111;")             # finché il chassis non è pronto
         bg.setScaledContents(True)
+        assets.cache().request(os.path.basename(CHASSIS), (1600, 700), bg.setPixmap)
     else:
         bg.setStyleSheet("background:#111;")
     widgets["bg"] = bg
@@ -79,6 +80,10 @@ def build_ui(parent: QWidget):
     widgets["decoder_box"] = QPlainTextEdit(parent)
     widgets["decoder_box"].setGeometry(*COORDS["decoder_box"]); widgets["decoder_box"].setReadOnly(True)
     widgets["decoder_box"].setStyleSheet("background:#fff; color:#111; border-radius:6px; padding:6px;")
+    # anteprima dei simboli del carattere in corso (fuori dal testo confermato)
+    widgets["decoder_preview"] = QLabel(parent)
+    widgets["decoder_preview"].setGeometry(*COORDS["decoder_preview"])
+    widgets["decoder_preview"].setStyleSheet("color:#ffe9a0; font: bold 16px 'Consolas';")
 
     # Key (grafica)
     widgets["btn_vertical"] = ImageToggleButton("btn_vertical_off.png","btn_vertical_on.png",
@@ -96,8 +101,8 @@ def build_ui(parent: QWidget):
     widgets["smeter_light"].setGeometry(*COORDS["smeter"])
     widgets["smeter_light"].setScaledContents(True)
     if os.path.exists(SMETER_LIGHT):
-        pm = QPixmap(SMETER_LIGHT)
-        widgets["smeter_light"].setPixmap(pm)
+        assets.cache().request(os.path.basename(SMETER_LIGHT), COORDS["smeter"][2:],
+                               widgets["smeter_light"].setPixmap)
     widgets["smeter_light"].hide()
 
     return widgets, COORDS
@@ -1,15 +1,23 @@
 # app/widgets/channel_scale.py
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QFontMetrics
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QTimer, QPointF
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QFontMetrics, QPixmap
 
 class ChannelScale(QWidget):
     """
     Barra canali stile SDR:
-    - Mostra i canali reali (6 cifre) da center-5 a center+5
+    - Mostra i canali reali (6 cifre) da center-span a center+span
     - Quando cambia il canale centrale, la scala scorre fluidamente
       (animazione di trascinamento con easing).
+    - Span larghi: etichette ogni 1/2/5/10/... canali (il passo più piccolo
+      che non le sovrappone), tick minori solo se le celle sono abbastanza larghe.
+    - Render a strati: etichette in pixmap (LRU per canale), tick/etichette in
+      un "nastro" rifatto solo al cambio di centro; l'animazione sposta il
+      nastro con un blit, senza ridisegnare testi.
     """
+    LABEL_CACHE = 256
+
     def __init__(self, width=806, height=28, parent=None, span=5):
         super().__init__(parent)
         self.setFixedSize(width, height)
@@ -35,6 +43,14 @@ class ChannelScale(QWidget):
 
         self._font = QFont("Consolas", 11)
         self._font_bold = QFont("Consolas", 11, QFont.DemiBold)
+        self._fm_dim = QFontMetrics(self._font)
+        self._fm_hot = QFontMetrics(self._font_bold)
+        self._axis_pen = QPen(self._axis_col, 1)
+        self._tick_pen = QPen(self._tick_col, 1)
+
+        # cache di render
+        self._labels = OrderedDict()        # (canale, centrale) -> QPixmap
+        self._tape_key = None; self._tape_pm = None
 
     # API
     def set_center_channel(self, ch: int):
@@ -78,38 +94,75 @@ class ChannelScale(QWidget):
         self._anim_offset += diff * 0.22
         self.update()
 
+    def _label_step(self, cell_w: float, label_w: int) -> int:
+        for m in (1, 10, 100, 1000):
+            for k in (1, 2, 5):
+                if k * m * cell_w >= label_w + 10: return k * m
+        return 10000
+
     def _format_chan(self, ch: int) -> str:
         # 6 cifre come nel box
         if ch < 0:
             return f"-{abs(ch):05d}"
         return f"{ch:06d}"
 
-    def paintEvent(self, _):
-        qp = QPainter(self)
+    def _label_pixmap(self, ch: int, hot: bool):
+        """Etichetta pre-renderizzata (LRU per canale e stile)."""
+        key = (ch, hot)
+        pm = self._labels.get(key)
+        if pm is not None:
+            self._labels.move_to_end(key); return pm
+        fm = self._fm_hot if hot else self._fm_dim
+        label = self._format_chan(ch)
+        dpr = self.devicePixelRatioF()
+        pm = QPixmap(int((fm.horizontalAdvance(label) + 1) * dpr), int(fm.height() * dpr))
+        pm.setDevicePixelRatio(dpr); pm.fill(Qt.transparent)
+        qp = QPainter(pm)
         qp.setRenderHint(QPainter.Antialiasing, True)
+        qp.setFont(self._font_bold if hot else self._font)
+        qp.setPen(self._text_hot if hot else self._text_dim)
+        qp.drawText(0, fm.ascent(), label)
+        qp.end()
+        self._labels[key] = pm
+        if len(self._labels) > self.LABEL_CACHE:
+            self._labels.popitem(last=False)
+        return pm
 
+    def _tape(self):
+        """Tick, fascia e etichette a offset 0: ridisegnati solo se cambia il centro."""
         w, h = self.width(), self.height()
+        key = (self.center, self.span, w, h)
+        if self._tape_key == key:
+            return self._tape_pm
+        dpr = self.devicePixelRatioF()
+        pm = QPixmap(int(w * dpr), int(h * dpr))
+        pm.setDevicePixelRatio(dpr); pm.fill(Qt.transparent)
+        qp = QPainter(pm)
+        qp.setRenderHint(QPainter.Antialiasing, True)
         base_y = h - 1  # asse in basso
 
-        # Asse X
-        qp.setPen(QPen(self._axis_col, 1))
-        qp.drawLine(0, base_y, w-1, base_y)
-
         # Geometria
         cell_w = self._cell_width()
-        center_x = cell_w * (self.span + 0.5)  # centro teorico della cell centrale
-        offset = self._anim_offset
-
-        # Ticks + etichette
-        # usiamo font metrics per centrare i testi
-        for i in range(-self.span, self.span+1):
-            x_cell_center = center_x + i * cell_w + offset
-            x_text_center = int(x_cell_center)
+        # come wires_around: il primo filo è almeno 1 (centro basso = fuori asse)
+        first = max(1, self.center - self.span) - self.center
+        center_x = cell_w * (0.5 - first)  # centro teorico della cell centrale
+
+        label_w = self._fm_hot.horizontalAdvance("000000")
+        step = self._label_step(cell_w, label_w)
+        minor = cell_w >= 4
+        qp.setPen(self._tick_pen)
+        for i in range(first, first + 2*self.span + 1):
+            x_cell_center = center_x + i * cell_w
+            ch_num = self.center + i
+            labeled = i == 0 or (ch_num % step == 0 and abs(i) * cell_w >= label_w + 10)
+            if not (labeled or minor):
+                continue
 
             # tick principale (alla base)
-            tick_h = 6 if i != 0 else 10
-            qp.setPen(QPen(self._tick_col, 1))
+            tick_h = 10 if i == 0 else (6 if labeled else 3)
             qp.drawLine(int(x_cell_center), base_y - tick_h, int(x_cell_center), base_y)
+            if not labeled:
+                continue
 
             # rettangolo soft dietro al canale centrale
             if i == 0:
@@ -117,27 +170,25 @@ class ChannelScale(QWidget):
                 hot_x = int(x_cell_center - hot_w/2)
                 qp.fillRect(hot_x, 2, hot_w, h-6, self._hot_bg)
 
-            # testo del canale reale (6 cifre)
-            ch_num = self.center + i
-            label = self._format_chan(ch_num)
-
-            if i == 0:
-                qp.setFont(self._font_bold)
-                qp.setPen(self._text_hot)
-            else:
-                qp.setFont(self._font)
-                qp.setPen(self._text_dim)
-
-            fm = QFontMetrics(qp.font())
-            tw = fm.horizontalAdvance(label)
-            th = fm.ascent()
-            tx = x_text_center - tw//2
-            ty = (h - 6)  # un filo sopra l'asse
-
+            # testo del canale reale (6 cifre), un filo sopra l'asse
+            lp = self._label_pixmap(ch_num, i == 0)
+            fm = self._fm_hot if i == 0 else self._fm_dim
+            tw = int(lp.width() / lp.devicePixelRatio())
+            tx = int(x_cell_center) - tw//2
             # evita sfori ai bordi
-            if tx < 0: tx = 0
-            if tx + tw > w: tx = w - tw
+            tx = max(0, min(w - tw, tx))
+            qp.drawPixmap(tx, (h - 6) - fm.ascent(), lp)
 
-            qp.drawText(int(tx), int(ty), label)
+        qp.end()
+        self._tape_key = key; self._tape_pm = pm
+        return pm
+
+    def paintEvent(self, _):
+        qp = QPainter(self)
+        w, h = self.width(), self.height()
 
+        # Asse X (fisso) + nastro di tick/etichette spostato dall'animazione
+        qp.setPen(self._axis_pen)
+        qp.drawLine(0, h - 1, w-1, h - 1)
+        qp.drawPixmap(QPointF(self._anim_offset, 0.0), self._tape())
         qp.end()
@@ -0,0 +1,73 @@
+# app/widgets/colormaps.py
+"""
+Colormap del waterfall come tabelle a 256 voci (RGB32 pronte per QImage).
+
+- Ogni palette è una lista di punti di controllo (posizione 0..1, R, G, B)
+  interpolati linearmente; contrasto e gamma vengono applicati costruendo la
+  tabella, così colorare una riga è un solo lut[livelli] su uint8.
+- LevelAGC stima il rumore di fondo (percentile basso per riga, EMA lenta) e
+  il picco (attacco veloce, rilascio lento) e converte i valori in livelli
+  uint8: il fondo finisce a `floor_level`, il picco in cima alla scala.
+"""
+import numpy as np
+
+COLORMAPS = {
+    # palette storica blu -> ciano
+    "cold":    [(0.0, 0, 30, 60), (1.0, 30, 240, 255)],
+    "sdr":     [(0.0, 0, 0, 40), (0.25, 0, 40, 160), (0.5, 0, 200, 220),
+                (0.75, 240, 240, 0), (1.0, 255, 40, 0)],
+    "inferno": [(0.0, 0, 0, 4), (0.25, 87, 16, 110), (0.5, 188, 55, 84),
+                (0.75, 249, 142, 9), (1.0, 252, 255, 164)],
+    "viridis": [(0.0, 68, 1, 84), (0.25, 59, 82, 139), (0.5, 33, 145, 140),
+                (0.75, 94, 201, 98), (1.0, 253, 231, 37)],
+    "gray":    [(0.0, 0, 0, 0), (1.0, 255, 255, 255)],
+}
+
+def build_lut(name: str = "cold", contrast: float = 1.0, gamma: float = 1.0) -> np.ndarray:
+    """Tabella uint32[256] (0xFFRRGGBB). contrast > 1 allarga attorno a metà scala."""
+    pts = np.array(COLORMAPS.get(name, COLORMAPS["cold"]), dtype=np.float64)
+    x = np.arange(256) / 255.0
+    x = np.clip((x - 0.5) * float(contrast) + 0.5, 0.0, 1.0) ** (1.0 / max(1e-3, float(gamma)))
+    rgb = [np.interp(x, pts[:, 0], pts[:, k]).round().astype(np.uint32) for k in (1, 2, 3)]
+    return np.uint32(0xFF000000) | (rgb[0] << 16) | (rgb[1] << 8) | rgb[2]
+
+class LevelAGC:
+    """Fondo di rumore + guadagno automatici: valori float -> livelli uint8."""
+    def __init__(self, floor_level: int = 8, min_span: float = 0.25,
+                 floor_pct: float = 0.2, floor_alpha: float = 0.02,
+                 peak_attack: float = 0.5, peak_release: float = 0.005):
+        self.enabled = True
+        self.floor_level = int(floor_level)
+        self.min_span = float(min_span)
+        self.floor_pct = float(floor_pct)
+        self.floor_alpha = float(floor_alpha)
+        self.peak_attack = float(peak_attack)
+        self.peak_release = float(peak_release)
+        self.floor = None; self.peak = None
+
+    def reset(self):
+        self.floor = None; self.peak = None
+
+    def levels(self, vals: np.ndarray) -> np.ndarray:
+        """vals: (n, w) float. Ritorna uint8 (n, w)."""
+        n, w = vals.shape
+        if not self.enabled:
+            return (np.clip(vals, 0.0, 1.0) * 255.0).astype(np.uint8)
+        k = max(0, min(w - 1, int(self.floor_pct * (w - 1))))
+        floors = np.partition(vals, k, axis=1)[:, k]
+        peaks = vals.max(axis=1)
+        out = np.empty((n, w), dtype=np.uint8)
+        top = 255.0 - self.floor_level
+        for i in range(n):
+            f, p = float(floors[i]), float(peaks[i])
+            if self.floor is None:
+                self.floor = f; self.peak = max(p, f + self.min_span)
+            self.floor += self.floor_alpha * (f - self.floor)
+            a = self.peak_attack if p > self.peak else self.peak_release
+            self.peak += a * (p - self.peak)
+            span = max(self.min_span, self.peak - self.floor)
+            g = top / span
+            row = (vals[i] - self.floor) * g + self.floor_level
+            np.clip(row, 0.0, 255.0, out=row)
+            out[i] = row
+        return out
@@ -1,11 +1,8 @@
 # app/widgets/image_buttons.py
-import os
 from PyQt5.QtWidgets import QLabel
-from PyQt5.QtGui import QPixmap, QColor
 from PyQt5.QtCore import Qt, pyqtSignal
 
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-ASSETS_DIR   = os.path.join(PROJECT_ROOT, "assets", "images")
+from app import assets
 
 class ImageButton(QLabel):
     clicked = pyqtSignal()
@@ -20,11 +17,10 @@ class ImageButton(QLabel):
         if e.button() == Qt.LeftButton:
             self.clicked.emit()
     def _refresh(self):
-        full = os.path.join(ASSETS_DIR, self._path)
-        pm = QPixmap(full) if os.path.exists(full) else QPixmap(self.size())
-        if pm.isNull():
-            pm = QPixmap(self.size()); pm.fill(QColor(58,63,68))
-        self.setPixmap(pm.scaled(self.size(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+        # pixmap già scalata dalla cache (in background al primo uso)
+        size = (self.width(), self.height())
+        self.setPixmap(assets.cache().placeholder(size))
+        assets.cache().request(self._path, size, self.setPixmap)
 
 class ImageToggleButton(QLabel):
     toggled = pyqtSignal(bool)
@@ -35,6 +31,8 @@ class ImageToggleButton(QLabel):
         self.setScaledContents(True)
         self.setCursor(Qt.PointingHandCursor)
         self.setFixedSize(*size)
+        # entrambi gli stati in cache: il clic non tocca il disco
+        assets.cache().preload([(p, size) for p in (off_path, on_path)])
         self._refresh()
     def isChecked(self): return self._checked
     def setChecked(self, v: bool):
@@ -48,11 +46,11 @@ class ImageToggleButton(QLabel):
             self.setChecked(not self._checked)
     def _refresh(self):
         path = self._on if self._checked else self._off
-        full = os.path.join(ASSETS_DIR, path)
-        pm = QPixmap(full) if os.path.exists(full) else QPixmap(self.size())
-        if pm.isNull():
-            pm = QPixmap(self.size()); pm.fill(QColor(58,63,68))
-        self.setPixmap(pm.scaled(self.size(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+        def apply(pm, path=path):
+            if path == (self._on if self._checked else self._off): self.setPixmap(pm)
+        if self.pixmap() is None or self.pixmap().isNull():
+            self.setPixmap(assets.cache().placeholder((self.width(), self.height())))
+        assets.cache().request(path, (self.width(), self.height()), apply)
 
 class RotatingKnob(ImageButton):
     from PyQt5.QtCore import pyqtSignal as _sig
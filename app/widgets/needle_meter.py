@@ -2,13 +2,19 @@
 import math
 from PyQt5.QtWidgets import QWidget
 from PyQt5.QtGui import QPainter, QColor, QPen
-from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtCore import Qt, QPointF, QRectF
 
 class NeedleSMeter(QWidget):
+    """
+    Lancetta S-meter su sfondo trasparente. set_level() non ridisegna se la
+    punta si sposta meno di MIN_MOVE_PX e invalida solo il rettangolo spazzato
+    (vecchia + nuova posizione della lancetta).
+    """
     PIVOT_X = 0.50
     PIVOT_Y = 0.82
     LENGTH  = 0.75
     REVERSE_ARC = False  # S0 a sinistra, S9 a destra
+    MIN_MOVE_PX = 0.5
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -19,11 +25,36 @@ class NeedleSMeter(QWidget):
         self.shadow_color = QColor(0, 0, 0, 150)  # ombra
         self.pen_width    = 1
         self.shadow_width = 3
+        self._shadow_pen = QPen(self.shadow_color, self.shadow_width, Qt.SolidLine, Qt.RoundCap)
+        self._needle_pen = QPen(self.needle_color, self.pen_width, Qt.SolidLine, Qt.RoundCap)
 
     def set_level(self, s_units: float, over_db: float = 0.0):
-        self.s_units = max(0.0, min(6.0, float(s_units)))
+        s_units = max(0.0, min(6.0, float(s_units)))
         self.over_db = max(0.0, min(60.0, float(over_db)))
-        self.update()
+        old = self._tip(self.s_units); new = self._tip(s_units)
+        if abs(new.x() - old.x()) < self.MIN_MOVE_PX and abs(new.y() - old.y()) < self.MIN_MOVE_PX:
+            return
+        self.s_units = s_units
+        self.update(self._swept(old, new))
+
+    def _geometry(self):
+        w, h = self.width(), self.height()
+        return w * self.PIVOT_X, h * self.PIVOT_Y, min(w, h) * self.LENGTH
+
+    def _tip(self, s_units: float) -> QPointF:
+        start_deg, end_deg = self._angles()
+        ang = start_deg + (s_units / 9.0) * (end_deg - start_deg)
+        cx, cy, L = self._geometry()
+        return QPointF(cx + L * math.cos(math.radians(ang)),
+                       cy + L * math.sin(math.radians(ang)))
+
+    def _swept(self, a: QPointF, b: QPointF):
+        """Rettangolo che contiene le lancette in a e in b (più lo spessore dell'ombra)."""
+        cx, cy, _ = self._geometry()
+        xs = (cx, a.x(), b.x()); ys = (cy, a.y(), b.y())
+        m = self.shadow_width + 2
+        return QRectF(min(xs) - m, min(ys) - m,
+                      max(xs) - min(xs) + 2*m, max(ys) - min(ys) + 2*m).toAlignedRect()
 
     def _angles(self):
         start_std, end_std = -150.0, +30.0  # arco tipico
@@ -35,18 +66,10 @@ class NeedleSMeter(QWidget):
         p = QPainter(self)
         p.setRenderHint(QPainter.Antialiasing, True)
 
-        start_deg, end_deg = self._angles()
-        frac = self.s_units / 9.0
-        ang  = start_deg + frac * (end_deg - start_deg)
-
-        w, h = self.width(), self.height()
-        cx, cy = w * self.PIVOT_X, h * self.PIVOT_Y
-        L = min(w, h) * self.LENGTH
-
-        tip = QPointF(cx + L * math.cos(math.radians(ang)),
-                      cy + L * math.sin(math.radians(ang)))
+        cx, cy, _ = self._geometry()
+        tip = self._tip(self.s_units)
 
-        p.setPen(QPen(self.shadow_color, self.shadow_width, Qt.SolidLine, Qt.RoundCap))
+        p.setPen(self._shadow_pen)
         p.drawLine(QPointF(cx, cy), tip)
-        p.setPen(QPen(self.needle_color, self.pen_width, Qt.SolidLine, Qt.RoundCap))
+        p.setPen(self._needle_pen)
         p.drawLine(QPointF(cx, cy), tip)
@@ -0,0 +1,24 @@
+# app/widgets/profiler_overlay.py
+from PyQt5.QtWidgets import QLabel
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
+
+class ProfilerOverlay(QLabel):
+    """
+    Riquadro semitrasparente con il testo del Profiler (fps, frame p50/p99,
+    fase peggiore e tabella p50/p99/max per fase). Aggiornato 2 volte al
+    secondo, trasparente al mouse.
+    """
+    def __init__(self, profiler, parent=None):
+        super().__init__(parent)
+        self.profiler = profiler
+        self.setAttribute(Qt.WA_TransparentForMouseEvents, True)
+        self.setFont(QFont("Consolas", 9))
+        self.setStyleSheet("background: rgba(0,0,0,170); color: rgb(160,255,160); padding: 4px;")
+        self.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self._timer = QTimer(self); self._timer.setInterval(500)
+        self._timer.timeout.connect(self.refresh); self._timer.start()
+
+    def refresh(self):
+        self.setText(self.profiler.text())
+        self.adjustSize(); self.raise_()
@@ -1,68 +1,190 @@
 # app/widgets/waterfall.py
+import time
 import numpy as np
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtGui import QPixmap, QPainter, QImage
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter, QImage, QColor
+from PyQt5.QtCore import QRect, Qt
+
+from app.widgets.colormaps import build_lut, LevelAGC
+
+_BLACK = np.uint32(0xFF000000)
 
 class Waterfall(QWidget):
     """
-    Waterfall con scorrimento 1px/frame e palette fredda (blu->ciano).
+    Waterfall con scorrimento 1px/riga e colormap a tabella (default blu->ciano).
     Nessun marker disegnato qui: il marker è esterno (MarkerBar).
+
+    Le righe stanno in un ring buffer NumPy (altezza x larghezza, RGB32) con
+    una QImage che punta direttamente alla sua memoria: inserire una riga è
+    una scrittura in memoria, il paint sono al più due blit (le due metà del
+    ring), senza scroll del pixmap. push_lines() inserisce più righe in una volta.
+    Colore: LevelAGC porta i valori a livelli uint8, poi un solo lut[livelli].
+    Accanto ai pixel il ring tiene i livelli: cambiare palette, contrasto o
+    gamma ricolora tutta la vista con un lut.take, non solo le righe nuove.
+
+    Storico (opzionale, set_history): ogni riga va anche nel ring su disco
+    (WaterfallHistory). Rotella = indietro/avanti nel tempo, Ctrl+rotella =
+    zoom sulla piramide, doppio clic = torna in diretta; jump_to(ts) salta a
+    un istante. In consultazione la vista è ferma su un istante (end_ts) e si
+    ridisegna solo quando cambia.
     """
     def __init__(self, width=806, height=370, parent=None):
         super().__init__(parent)
         self.setFixedSize(width, height)
-        self.pix = QPixmap(width, height)
-        self.pix.fill(Qt.black)
+        self._buf = np.full((height, width), _BLACK, dtype=np.uint32)
+        self._img = QImage(self._buf.data, width, height, 4*width, QImage.Format_RGB32)
+        self._lev = np.zeros((height, width), dtype=np.uint8)     # livelli delle stesse righe
+        self._head = 0          # prossima riga da scrivere (= la più vecchia)
+        self._filled = 0        # righe scritte dall'ultimo clear (le altre restano nere)
         self.running = False
-        self._row_buf = None  # buffer temporaneo
+        self.agc = LevelAGC()
+        self._cmap = "cold"; self._contrast = 1.0; self._gamma = 1.0
+        self._lut = build_lut(self._cmap)
+        self.history = None
+        self._view = None       # consultazione: [livello, ts della riga in basso]
+        self._vbuf = np.full((height, width), _BLACK, dtype=np.uint32)
+        self._vimg = QImage(self._vbuf.data, width, height, 4*width, QImage.Format_RGB32)
+        self._vlabel = ""
 
     def set_running(self, on: bool):
         self.running = bool(on)
 
     def clear(self):
-        self.pix.fill(Qt.black)
+        self._buf.fill(_BLACK); self._lev.fill(0); self._head = 0; self._filled = 0; self._view = None
         self.update()
 
-    def _map_palette(self, vals):
-        """
-        Mappa [0..1] -> RGB (più luminoso del nero totale).
-        """
-        vals = np.clip(vals, 0.0, 1.0)
-        g = (30 + vals * 210).astype(np.uint8)
-        b = (60 + vals * 195).astype(np.uint8)
-        r = (0 + vals * 30).astype(np.uint8)
-        row = np.empty((1, vals.size, 3), dtype=np.uint8)
-        row[0,:,0] = r; row[0,:,1] = g; row[0,:,2] = b
-        return row
+    # --- colore ---
+    def set_colormap(self, name: str):
+        self._cmap = str(name); self._rebuild_lut()
+
+    def set_contrast(self, c: float):
+        self._contrast = float(c); self._rebuild_lut()
+
+    def set_gamma(self, g: float):
+        self._gamma = float(g); self._rebuild_lut()
+
+    def set_agc(self, on: bool):
+        self.agc.enabled = bool(on); self.agc.reset()
+
+    def _rebuild_lut(self):
+        self._lut = build_lut(self._cmap, self._contrast, self._gamma)
+        self._lut.take(self._lev, out=self._buf)
+        self._buf[self._filled:] = _BLACK
+        if self._view is not None: self._render_view()
+        else: self.update()
 
     def push_line(self, line):
         """
         line: ndarray [0..1] di lunghezza = width. Nessun overlay interno.
         """
+        w = self.width()
+        self.push_lines(np.zeros((1, w), dtype=np.float32) if line is None
+                        else np.asarray(line, dtype=np.float32)[None, :])
+
+    def push_lines(self, lines, t0: float = None, dt: float = None):
+        """
+        lines: ndarray (n, width) [0..1], dalla più vecchia alla più nuova.
+        t0 (epoch della prima riga) e dt servono solo allo storico.
+        """
         if not self.running:
             self.update(); return
 
-        w, h = self.width(), self.height()
-        vals = np.zeros(w, dtype=np.float32) if line is None else np.asarray(line, dtype=np.float32)
-        if vals.size < w:
-            vals = np.pad(vals, (0, w-vals.size), mode="edge")
-        vals = np.clip(vals[:w], 0.0, 1.0)
+        h, w = self._buf.shape
+        vals = np.asarray(lines, dtype=np.float32)
+        if vals.ndim == 1: vals = vals[None, :]
+        if vals.shape[1] < w:
+            vals = np.pad(vals, ((0, 0), (0, w - vals.shape[1])), mode="edge")
+        levels = self.agc.levels(vals[-h:, :w])
+        if self.history is not None and t0 is not None:
+            self.history.append(levels, t0 + (vals.shape[0] - levels.shape[0]) * dt, dt)
+        rows = self._lut.take(levels)
+        n = rows.shape[0]
+        first = min(n, h - self._head)
+        self._buf[self._head:self._head + first] = rows[:first]
+        self._lev[self._head:self._head + first] = levels[:first]
+        if n > first:
+            self._buf[:n - first] = rows[first:]
+            self._lev[:n - first] = levels[first:]
+        self._head = (self._head + n) % h
+        self._filled = min(h, self._filled + n)
+        if self._view is None: self.update()
+
+    # --- storico ---
+    def set_history(self, history):
+        self.history = history; self._view = None
+
+    @property
+    def live(self) -> bool:
+        return self._view is None
 
-        # alza un filo il noise floor se tutto piatto
-        if float(vals.max()) < 0.03:
-            vals = vals + 0.03
+    def go_live(self):
+        self._view = None; self.update()
 
-        row = self._map_palette(vals)
-        self._row_buf = row.tobytes()
-        img = QImage(self._row_buf, w, 1, 3*w, QImage.Format_RGB888)
+    def scroll(self, rows: int):
+        """rows > 0 = indietro nel tempo, nel livello di zoom corrente."""
+        H = self.history
+        if H is None or not H.count(0): return
+        level, ts = self._view or [0, H.time_at(0, 0)]
+        end = H.find(ts, level) + int(rows)
+        if end < 0:                                  # oltre la riga più recente: diretta
+            self.go_live(); return
+        end = max(0, min(H.count(level) - 1, end))
+        self._view = [level, H.time_at(level, end)]
+        self._render_view()
 
-        self.pix.scroll(0, -1, self.rect())
-        p = QPainter(self.pix)
-        p.drawImage(0, h-1, img)
-        p.end()
+    def zoom(self, steps: int):
+        """steps > 0 = più tempo per riga (livello superiore della piramide)."""
+        H = self.history
+        if H is None or not H.count(0): return
+        level, ts = self._view or [0, H.time_at(0, 0)]
+        level = max(0, min(H.levels - 1, level + int(steps)))
+        while level and not H.count(level): level -= 1
+        self._view = [level, ts]
+        self._render_view()
+
+    def jump_to(self, ts: float):
+        """Mostra l'istante ts (epoch) a metà altezza, al livello di zoom corrente."""
+        H = self.history
+        if H is None or not H.count(0): return
+        level = self._view[0] if self._view else 0
+        end = max(0, H.find(float(ts), level) - self.height() // 2)
+        self._view = [level, H.time_at(level, end)]
+        self._render_view()
+
+    def _render_view(self):
+        level, ts = self._view
+        H = self.history; h = self._vbuf.shape[0]
+        rows, times = H.read(level, H.find(ts, level), h)
+        self._vbuf[:] = self._lut.take(rows)
+        self._vbuf[np.isnan(times)] = _BLACK
+        ok = times[~np.isnan(times)]
+        fmt = "%d/%m %H:%M" if ok.size and ok[-1] - ok[0] > 6 * 3600 else "%H:%M:%S"
+        self._vlabel = ("{} → {}  ×{}".format(time.strftime(fmt, time.localtime(ok[0])),
+                                               time.strftime(fmt, time.localtime(ok[-1])),
+                                               H.FACTOR ** level) if ok.size else "")
         self.update()
 
+    def wheelEvent(self, ev):
+        if self.history is None: return super().wheelEvent(ev)
+        steps = ev.angleDelta().y() // 120
+        if ev.modifiers() & Qt.ControlModifier: self.zoom(-steps)
+        else: self.scroll(steps * max(1, self.height() // 8))
+        ev.accept()
+
+    def mouseDoubleClickEvent(self, ev):
+        self.go_live()
+
     def paintEvent(self, _):
+        h, w = self._buf.shape
+        if self._view is not None:
+            qp = QPainter(self)
+            qp.drawImage(0, 0, self._vimg)
+            qp.setPen(QColor(255, 220, 120)); qp.drawText(6, h - 6, self._vlabel)
+            qp.end()
+            return
+        top = h - self._head     # righe dalla più vecchia (head..fine) in alto
         qp = QPainter(self)
-        qp.drawPixmap(0, 0, self.pix)
+        qp.drawImage(QRect(0, 0, w, top), self._img, QRect(0, self._head, w, top))
+        if self._head:
+            qp.drawImage(QRect(0, top, w, self._head), self._img, QRect(0, 0, w, self._head))
+        qp.end()
@@ -0,0 +1,273 @@
+# archive/traffic_archive.py
+"""
+Archivio persistente del traffico decodificato.
+
+- append() è solo una put() in coda: un thread scrittore raggruppa i caratteri
+  in "run" per filo (testo continuo, chiuso da una pausa lunga, dal cambio di
+  modo o da una lunghezza massima) e scrive blocchi zlib di run.
+- Segmenti ruotati (per giorno o per dimensione): seg-AAAAMMGG-HHMMSS.twa,
+  sequenza di [u32 lunghezza][blocco zlib di righe JSON].
+- Per ogni segmento un indice (.idx.json): per blocco offset, lunghezza,
+  t_min, t_max e fili; indice invertito termine -> blocchi.
+  manifest.json elenca i segmenti con il loro intervallo di tempo.
+- query(wire, t0, t1, term) filtra segmenti e blocchi sugli indici (il termine
+  vale anche come prefisso: "IZ6" trova IZ6198SWL) e decomprime solo i
+  blocchi candidati.
+
+Un run è (wire, t0, t1, wpm, mode, text).
+"""
+from __future__ import annotations
+import bisect, json, os, queue, struct, threading, time, zlib
+
+from cw import clock
+
+_LEN = struct.Struct("<I")
+
+def _terms(text: str):
+    return {t for t in text.upper().split() if len(t) >= 2}
+
+class _Segment:
+    def __init__(self, path: str):
+        self.path = path
+        self.idx_path = path[:-4] + ".idx.json"
+        self.blocks = []         # [offset, length, t_min, t_max, [fili]]
+        self.postings = {}       # termine -> [id blocco]
+        self._keys = None        # termini ordinati (per i prefissi), pigro
+
+    @property
+    def t_min(self): return min((b[2] for b in self.blocks), default=None)
+    @property
+    def t_max(self): return max((b[3] for b in self.blocks), default=None)
+
+    def add_block(self, off: int, ln: int, runs):
+        bid = len(self.blocks)
+        wires = sorted({r[0] for r in runs})
+        self.blocks.append([off, ln, min(r[1] for r in runs), max(r[2] for r in runs), wires])
+        for r in runs:
+            for t in _terms(r[5]):
+                p = self.postings.setdefault(t, [])
+                if not p or p[-1] != bid: p.append(bid)
+        self._keys = None
+
+    def match_term(self, term: str) -> set:
+        if self._keys is None: self._keys = sorted(self.postings)
+        term = term.upper(); out = set()
+        i = bisect.bisect_left(self._keys, term)
+        while i < len(self._keys) and self._keys[i].startswith(term):
+            out.update(self.postings[self._keys[i]]); i += 1
+        return out
+
+    def save_index(self):
+        tmp = self.idx_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"blocks": self.blocks, "terms": self.postings}, f, separators=(",", ":"))
+        os.replace(tmp, self.idx_path)
+
+    def load_index(self):
+        try:
+            with open(self.idx_path, "r", encoding="utf-8") as f:
+                d = json.load(f)
+            self.blocks = d["blocks"]; self.postings = d["terms"]; self._keys = None
+            return
+        except (OSError, ValueError, KeyError):
+            pass
+        # indice mancante (chiusura brusca): ricostruisci dai blocchi
+        self.blocks = []; self.postings = {}
+        for off, ln, runs in self.scan():
+            self.add_block(off, ln, runs)
+
+    def scan(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        off = 0
+        while off + 4 <= len(data):
+            ln, = _LEN.unpack_from(data, off)
+            if off + 4 + ln > len(data): break        # blocco troncato
+            try:
+                yield off, ln, _decode(data[off + 4:off + 4 + ln])
+            except (zlib.error, ValueError):
+                break
+            off += 4 + ln
+
+    def read_block(self, f, bid: int):
+        off, ln = self.blocks[bid][0], self.blocks[bid][1]
+        f.seek(off + 4)
+        return _decode(f.read(ln))
+
+def _decode(blob: bytes):
+    return [json.loads(ln) for ln in zlib.decompress(blob).decode("utf-8").splitlines()]
+
+class TrafficArchive:
+    RUN_IDLE   = 5.0        # pausa (s) che chiude un run
+    RUN_CHARS  = 240
+    BLOCK_RUNS = 64
+    BLOCK_AGE  = 30.0       # un blocco parziale viene scritto dopo questi secondi
+    SEG_BYTES  = 8 << 20
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._manifest_path = os.path.join(root, "manifest.json")
+        self._segments = {}          # nome -> [t_min, t_max]
+        self._loaded = {}            # nome -> _Segment (indici caricati su richiesta)
+        self._lock = threading.Lock()
+        self._load_manifest()
+        self._q = queue.SimpleQueue()
+        self._open = {}              # filo -> run aperto [wire, t0, t1, wpm, mode, text]
+        self._seen = {}              # filo -> arrivo dell'ultimo carattere (monotonic)
+        self._closed = []
+        self._first_closed = None
+        self._seg = None; self._f = None
+        self._thread = threading.Thread(target=self._run, name="TrafficArchive", daemon=True)
+        self._thread.start()
+
+    # ───────── API (qualsiasi thread)
+    def append(self, wire: int, text: str, wpm: float = 0.0, mode: str = "", ts: float | None = None):
+        if text:
+            self._q.put((int(wire), clock.wall() if ts is None else float(ts), text, float(wpm), str(mode)))
+
+    def close(self):
+        self._q.put(None)
+        self._thread.join(timeout=5.0)
+
+    def query(self, wire: int | None = None, t0: float | None = None, t1: float | None = None,
+              term: str | None = None, limit: int = 1000):
+        """Run che soddisfano tutti i filtri, in ordine di tempo."""
+        term = term.split()[0].upper() if term and term.split() else None
+        lo = -float("inf") if t0 is None else t0
+        hi = float("inf") if t1 is None else t1
+        with self._lock:
+            names = [n for n, (a, b) in sorted(self._segments.items())
+                     if a is not None and b >= lo and a <= hi]
+        out = []
+        for name in names:
+            seg = self._segment(name)
+            with self._lock:
+                cand = seg.match_term(term) if term else range(len(seg.blocks))
+                cand = [i for i in sorted(cand)
+                        if seg.blocks[i][3] >= lo and seg.blocks[i][2] <= hi
+                        and (wire is None or wire in seg.blocks[i][4])]
+            if not cand: continue
+            with open(seg.path, "rb") as f:
+                for bid in cand:
+                    for r in seg.read_block(f, bid):
+                        if wire is not None and r[0] != wire: continue
+                        if r[2] < lo or r[1] > hi: continue
+                        if term and not any(t.startswith(term) for t in r[5].upper().split()):
+                            continue
+                        out.append(tuple(r))
+                        if len(out) >= limit: return out
+        return out
+
+    # ───────── indici
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                self._segments = {k: v for k, v in json.load(f).items()}
+        except (OSError, ValueError):
+            self._segments = {}
+        # segmenti su disco non in manifest (chiusura brusca)
+        for fn in os.listdir(self.root):
+            if fn.endswith(".twa") and fn not in self._segments:
+                seg = self._segment(fn)
+                self._segments[fn] = [seg.t_min, seg.t_max]
+
+    def _save_manifest(self):
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._segments, f, indent=0)
+        os.replace(tmp, self._manifest_path)
+
+    def _segment(self, name: str) -> _Segment:
+        seg = self._loaded.get(name)
+        if seg is None:
+            seg = _Segment(os.path.join(self.root, name)); seg.load_index()
+            self._loaded[name] = seg
+        return seg
+
+    # ───────── thread scrittore
+    def _run(self):
+        while True:
+            try:
+                item = self._q.get(timeout=1.0)
+            except queue.Empty:
+                item = False
+            now = clock.now()
+            if item is None:
+                for w in list(self._open): self._close_run(w)
+                self._write_block(); self._finish_segment()
+                return
+            if item:
+                self._add(*item)
+            # run fermi da troppo tempo e blocchi vecchi
+            for w in list(self._open):
+                if now - self._seen[w] > self.RUN_IDLE: self._close_run(w)
+            if self._closed and (len(self._closed) >= self.BLOCK_RUNS or
+                                 now - self._first_closed > self.BLOCK_AGE):
+                self._write_block()
+
+    def _add(self, wire, ts, text, wpm, mode):
+        r = self._open.get(wire)
+        if r is not None and (ts - r[2] > self.RUN_IDLE or mode != r[4] or len(r[5]) >= self.RUN_CHARS):
+            self._close_run(wire); r = None
+        if r is None:
+            if not text.strip(): return
+            r = self._open[wire] = [wire, ts, ts, round(wpm, 1), mode, ""]
+        r[2] = ts; r[5] += text
+        self._seen[wire] = clock.now()
+        if wpm: r[3] = round(wpm, 1)
+
+    def _close_run(self, wire):
+        r = self._open.pop(wire, None)
+        if r is None or not r[5].strip(): return
+        r[5] = " ".join(r[5].split())
+        if not self._closed: self._first_closed = clock.now()
+        self._closed.append(r)
+
+    def _write_block(self):
+        if not self._closed: return
+        runs, self._closed = self._closed, []
+        day = time.strftime("%Y%m%d", time.localtime(runs[0][1]))
+        if self._seg is None or not os.path.basename(self._seg.path).startswith("seg-" + day) \
+                or self._f.tell() > self.SEG_BYTES:
+            self._finish_segment()
+            name = time.strftime("seg-%Y%m%d-%H%M%S", time.localtime(runs[0][1])) + ".twa"
+            with self._lock:
+                self._seg = self._segment(name) if name in self._segments else _Segment(os.path.join(self.root, name))
+                self._loaded[name] = self._seg
+            self._f = open(self._seg.path, "ab")
+        blob = zlib.compress("\n".join(json.dumps(r, separators=(",", ":")) for r in runs).encode("utf-8"), 6)
+        off = self._f.tell()
+        self._f.write(_LEN.pack(len(blob))); self._f.write(blob); self._f.flush()
+        name = os.path.basename(self._seg.path)
+        with self._lock:
+            self._seg.add_block(off, len(blob), runs)
+            self._segments[name] = [self._seg.t_min, self._seg.t_max]
+        self._save_manifest()
+
+    def _finish_segment(self):
+        if self._seg is None: return
+        self._f.close(); self._f = None
+        with self._lock:
+            self._seg.save_index()
+        self._save_manifest()
+        self._seg = None
+
+if __name__ == "__main__":
+    # python -m archive.traffic_archive [--wire 133] [--from 2026-07-14] [--to 2026-07-15] [TERMINE]
+    import argparse
+    from app import settings
+    ap = argparse.ArgumentParser(description="Ricerca nell'archivio del traffico")
+    ap.add_argument("term", nargs="?")
+    ap.add_argument("--wire", type=int)
+    ap.add_argument("--from", dest="t0"); ap.add_argument("--to", dest="t1")
+    ap.add_argument("--dir", default=settings.ARCHIVE_DIR)
+    a = ap.parse_args()
+    day = lambda s: time.mktime(time.strptime(s, "%Y-%m-%d")) if s else None
+    arc = TrafficArchive(a.dir)
+    for wire, t0, t1, wpm, mode, text in arc.query(a.wire, day(a.t0), day(a.t1), a.term):
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t0))}  filo {wire:3d}  {wpm:4.0f} WPM {mode:5s}  {text}")
+    arc.close()
@@ -0,0 +1,149 @@
+# archive/waterfall_history.py
+"""
+Storico lungo del waterfall su file mappato in memoria (np.memmap).
+
+- Ogni riga disegnata viene salvata come livelli uint8 (dopo l'AGC, prima
+  della colormap: cambiando palette anche lo storico si ricolora) più il suo
+  timestamp (epoch, inizio della fetta).
+- Piramide multi-risoluzione: il livello k+1 è il max-pooling di FACTOR righe
+  consecutive del livello k (un dot breve resta visibile anche a zoom orario).
+  Ogni livello è un ring a sé; in tutto ~1.33x il livello 0.
+- Memoria costante: tutto sta nel file, il processo tocca solo le pagine delle
+  righe scritte o lette. In RAM restano le poche righe in attesa di pooling.
+
+Layout del file: header (4 KiB: magic + parametri + head/conteggi per livello),
+poi per ogni livello tempi (R_k float64) e righe (R_k x width uint8).
+Gli offset nelle letture contano all'indietro dalla riga più recente (0).
+"""
+from __future__ import annotations
+import os
+import numpy as np
+
+_MAGIC = 0x3146575F495754         # "TWI_WF1"
+_HDR = 4096
+_MAX_LEVELS = 16
+
+class WaterfallHistory:
+    FACTOR = 4
+    MIN_ROWS = 512                # l'ultimo livello ha almeno tante righe
+
+    def __init__(self, path: str, width: int, rows: int):
+        self.path = path
+        self.width = int(width)
+        sizes = [max(self.MIN_ROWS, int(rows))]
+        while sizes[-1] // self.FACTOR >= self.MIN_ROWS and len(sizes) < _MAX_LEVELS:
+            sizes.append(sizes[-1] // self.FACTOR)
+        self.sizes = sizes
+        offs = []; off = _HDR
+        for r in sizes:
+            offs.append(off); off += r * 8 + -(-r * self.width // 8) * 8     # allineato a 8 byte
+        total = off
+
+        fresh = not self._compatible(total)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if fresh:
+            with open(path, "wb") as f:
+                f.truncate(total)                    # file sparso: nessuna scrittura di zeri
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r+", shape=(total,))
+        # header: [magic, width, factor, livelli, size_0..15, head_0..15, count_0..15]
+        self._hdr = self._mm[:_HDR].view(np.int64)
+        if fresh:
+            self._hdr[:4] = (_MAGIC, self.width, self.FACTOR, len(sizes))
+            self._hdr[4:4 + len(sizes)] = sizes
+            self._mm.flush()
+        self._head = self._hdr[4 + _MAX_LEVELS:4 + 2*_MAX_LEVELS]
+        self._count = self._hdr[4 + 2*_MAX_LEVELS:4 + 3*_MAX_LEVELS]
+        self._rows = []; self._times = []
+        for r, o in zip(sizes, offs):
+            self._times.append(self._mm[o:o + r*8].view(np.float64))
+            self._rows.append(self._mm[o + r*8:o + r*8 + r*self.width].reshape(r, self.width))
+        # righe in attesa di pooling verso il livello successivo
+        self._pend = [np.empty((0, self.width), np.uint8) for _ in sizes]
+        self._pend_t = [np.empty(0, np.float64) for _ in sizes]
+
+    def _compatible(self, total: int) -> bool:
+        try:
+            if os.path.getsize(self.path) != total: return False
+            hdr = np.fromfile(self.path, dtype=np.int64, count=4 + len(self.sizes))
+        except (OSError, ValueError):
+            return False
+        return (hdr.size == 4 + len(self.sizes) and int(hdr[0]) == _MAGIC
+                and int(hdr[1]) == self.width and int(hdr[2]) == self.FACTOR
+                and int(hdr[3]) == len(self.sizes) and list(hdr[4:]) == self.sizes)
+
+    @property
+    def levels(self) -> int:
+        return len(self.sizes)
+
+    def count(self, level: int = 0) -> int:
+        return int(self._count[level])
+
+    # --- scrittura ---
+    def append(self, rows, t0: float, dt: float):
+        """rows: (n, width) uint8 dalla più vecchia; t0 = epoch della prima, dt = passo."""
+        rows = np.asarray(rows, dtype=np.uint8)
+        if rows.ndim == 1: rows = rows[None, :]
+        if rows.shape[1] != self.width or not rows.shape[0]: return
+        times = float(t0) + float(dt) * np.arange(rows.shape[0])
+        for k in range(self.levels):
+            self._write(k, rows, times)
+            if k + 1 == self.levels: break
+            rows = np.concatenate([self._pend[k], rows]); times = np.concatenate([self._pend_t[k], times])
+            g = rows.shape[0] // self.FACTOR
+            self._pend[k] = rows[g*self.FACTOR:]; self._pend_t[k] = times[g*self.FACTOR:]
+            if not g: break
+            rows = rows[:g*self.FACTOR].reshape(g, self.FACTOR, self.width).max(axis=1)
+            times = times[:g*self.FACTOR:self.FACTOR]
+
+    def _write(self, k: int, rows: np.ndarray, times: np.ndarray):
+        R = self.sizes[k]
+        rows = rows[-R:]; times = times[-R:]
+        n = rows.shape[0]; h = int(self._head[k])
+        first = min(n, R - h)
+        self._rows[k][h:h + first] = rows[:first]; self._times[k][h:h + first] = times[:first]
+        if n > first:
+            self._rows[k][:n - first] = rows[first:]; self._times[k][:n - first] = times[first:]
+        self._head[k] = (h + n) % R
+        self._count[k] = min(R, int(self._count[k]) + n)
+
+    # --- lettura ---
+    def _index(self, k: int, off):
+        return (int(self._head[k]) - 1 - np.asarray(off)) % self.sizes[k]
+
+    def time_at(self, level: int, off: int) -> float:
+        """Timestamp della riga off (0 = più recente) del livello."""
+        return float(self._times[level][self._index(level, int(off))])
+
+    def read(self, level: int, end: int, n: int):
+        """
+        n righe che terminano all'offset end (0 = più recente), dalla più vecchia.
+        Ritorna (righe uint8 (n, width), tempi (n,)); le righe oltre lo storico
+        sono zeri con tempo NaN.
+        """
+        offs = np.arange(end + n - 1, end - 1, -1)
+        ok = (offs >= 0) & (offs < self.count(level))
+        out = np.zeros((n, self.width), dtype=np.uint8)
+        ts = np.full(n, np.nan)
+        if ok.any():
+            idx = self._index(level, offs[ok])
+            out[ok] = self._rows[level][idx]; ts[ok] = self._times[level][idx]
+        return out, ts
+
+    def find(self, ts: float, level: int = 0) -> int:
+        """Offset della riga che contiene ts (ricerca binaria sul ring)."""
+        lo, hi = 0, self.count(level) - 1        # tempi decrescenti con l'offset
+        if hi < 0: return 0
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.time_at(level, mid) <= ts: hi = mid
+            else: lo = mid + 1
+        return lo
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        if self._mm is None: return
+        self._mm.flush()
+        self._rows = self._times = self._hdr = self._head = self._count = None
+        self._mm = None
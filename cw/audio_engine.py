@@ -1,9 +1,21 @@
 # cw/audio_engine.py
 import math
 import numpy as np
+from collections import deque
+
+from cw import clock
 
 class AudioEngine:
-    """Sidetone CW stile cwcom (sinusoide + attack/release morbidi)."""
+    """Sidetone CW stile cwcom (sinusoide + attack/release morbidi).
+
+    rx_key/tx_key(on, t): t = istante dell'evento che ha chiesto il fronte.
+    Il callback porta outputBufferDacTime (orologio dello stream) sull'asse
+    di clock con una ClockMap; se il backend non lo fornisce usa
+    adesso + latenza dichiarata dello stream. Per ogni fronte che entra in un
+    blocco: latenza = istante DAC del primo campione - t (latency()).
+    """
+    LAT_WINDOW = 256
+
     def __init__(self, tone_hz: float = 600.0, samplerate: int = 48000, volume: int = 50):
         self._sr   = float(samplerate)
         self._tone = float(tone_hz)
@@ -23,19 +35,25 @@ class AudioEngine:
         self._tx_att_k = self._rx_att_k
         self._tx_rel_k = self._rx_rel_k
 
-        self.enabled = False
+        # sounddevice (PortAudio) si importa in start(): costruire il motore non
+        # rallenta l'avvio, start() si può chiamare dopo il primo frame
+        self.enabled = True
         self._sd = None
         self._stream = None
-        try:
-            import sounddevice as sd
-            self._sd = sd
-            self.enabled = True
-        except Exception:
-            self._sd = None
-            self.enabled = False
+
+        self._dac_map = clock.ClockMap()
+        self._rx_req_t = self._tx_req_t = 0.0
+        self._rx_last = self._tx_last = 0.0     # target visti dall'ultimo blocco
+        self._lat = {"rx": deque(maxlen=self.LAT_WINDOW), "tx": deque(maxlen=self.LAT_WINDOW)}
 
     def start(self):
         if not self.enabled or self._stream is not None: return
+        if self._sd is None:
+            try:
+                import sounddevice as sd
+                self._sd = sd
+            except Exception:
+                self.enabled = False; return
         try:
             self._stream = self._sd.OutputStream(
                 samplerate=int(self._sr),
@@ -66,11 +84,24 @@ class AudioEngine:
         self._tx_att_k = self._rx_att_k
         self._tx_rel_k = self._rx_rel_k
 
-    def rx_key(self, is_on: bool):
-        self._rx_target = 1.0 if is_on else 0.0
-
-    def tx_key(self, is_on: bool):
-        self._tx_target = 1.0 if is_on else 0.0
+    def rx_key(self, is_on: bool, t: float = None):
+        tgt = 1.0 if is_on else 0.0
+        if tgt != self._rx_target: self._rx_req_t = clock.now() if t is None else t
+        self._rx_target = tgt
+
+    def tx_key(self, is_on: bool, t: float = None):
+        tgt = 1.0 if is_on else 0.0
+        if tgt != self._tx_target: self._tx_req_t = clock.now() if t is None else t
+        self._tx_target = tgt
+
+    def latency(self) -> dict:
+        """{"rx"|"tx": (fronti, p50 ms, max ms)} sugli ultimi LAT_WINDOW fronti."""
+        out = {}
+        for k, d in self._lat.items():
+            if d:
+                a = np.asarray(d) * 1000.0
+                out[k] = (len(a), float(np.median(a)), float(a.max()))
+        return out
 
     # ───────── internals
     def _map_vol(self, v: int) -> float:
@@ -81,7 +112,20 @@ class AudioEngine:
         tau_s = max(1e-4, float(tau_s))
         return 1.0 - math.exp(-1.0 / (tau_s * self._sr))
 
+    def _dac_time(self, time_info) -> float:
+        now = clock.now()
+        try:
+            dac, cur = time_info.outputBufferDacTime, time_info.currentTime
+        except AttributeError:
+            dac = cur = 0.0
+        if dac > 0.0 and cur > 0.0:
+            self._dac_map.update(cur, now)
+            return self._dac_map.to_local(dac)
+        try: return now + float(self._stream.latency)
+        except Exception: return now
+
     def _callback(self, outdata, frames, time_info, status):
+        dac = self._dac_time(time_info)
         # fase
         idx = np.arange(frames, dtype=np.float32)
         t = self._phase + self._twopi * self._tone * (idx / self._sr)
@@ -95,6 +139,8 @@ class AudioEngine:
         rx_att = self._rx_att_k; rx_rel = self._rx_rel_k
         tx_att = self._tx_att_k; tx_rel = self._tx_rel_k
         rx_tgt = self._rx_target; tx_tgt = self._tx_target
+        if rx_tgt != self._rx_last: self._rx_last = rx_tgt; self._lat["rx"].append(dac - self._rx_req_t)
+        if tx_tgt != self._tx_last: self._tx_last = tx_tgt; self._lat["tx"].append(dac - self._tx_req_t)
 
         for i in range(frames):
             rx_env += (rx_tgt - rx_env) * (rx_att if rx_tgt > rx_env else rx_rel)
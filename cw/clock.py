@@ -0,0 +1,56 @@
+# cw/clock.py
+"""
+Orologio unico dell'applicazione.
+
+- now(): secondi monotoni, perf_counter di default (CLOCK_MONOTONIC,
+  QueryPerformanceCounter): niente salti NTP, e vale uguale nel processo
+  motore. Socket, riproduzione dei tempi, tasto, keyer, decoder, GUI e
+  audio usano solo questo, quindi le latenze tra stadi si possono sottrarre.
+- Si legge sempre come attributo del modulo (clock.now()), così set_clock()
+  vale anche per chi ha importato prima. ManualClock serve alle parti senza
+  thread (decoder, IambicCore, tracce registrate): i thread che attendono
+  scadenze (riproduzione dei tempi, keyer) vogliono un orologio che avanza.
+- wall(t): istante di parete di t con un offset fissato all'avvio: le ore
+  del waterfall e dell'archivio non saltano con NTP dentro la sessione.
+- ClockMap: porta sul nostro asse i tempi di un altro orologio (stream
+  PortAudio): offset = minimo recente di (nostro - suo) letti insieme, il
+  minimo scarta il ritardo di chi legge.
+- Profiler e resoconto d'avvio misurano durate di codice: restano su
+  perf_counter anche con un orologio iniettato.
+"""
+import time
+from collections import deque
+from time import perf_counter
+
+now = perf_counter
+_wall_off = time.time() - perf_counter()
+
+def set_clock(fn=None):
+    """fn() -> secondi monotoni; None = perf_counter."""
+    global now, _wall_off
+    now = fn or perf_counter
+    _wall_off = time.time() - now()
+
+def wall(t: float = None) -> float:
+    return _wall_off + (now() if t is None else t)
+
+class ManualClock:
+    def __init__(self, t0: float = 0.0):
+        self.t = float(t0)
+    def __call__(self) -> float:
+        return self.t
+    def advance(self, dt: float) -> float:
+        self.t += dt; return self.t
+
+class ClockMap:
+    def __init__(self, window: int = 64):
+        self._offs = deque(maxlen=int(window))
+        self.offset = None
+
+    def update(self, foreign: float, local: float = None):
+        off = (now() if local is None else local) - foreign
+        self._offs.append(off)
+        self.offset = off if self.offset is None or len(self._offs) == 1 else min(self._offs)
+
+    def to_local(self, foreign: float) -> float:
+        return foreign + (self.offset or 0.0)
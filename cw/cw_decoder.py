@@ -13,11 +13,15 @@ Uso:
 Note:
 - Funziona a meraviglia con CWCom perché riceviamo eventi di keying affidabili.
 - Non analizza l'audio: lavora SOLO su transizioni logiche (on/off).
+- Cambio stazione (es. 35 → 12 WPM): SpeedChangeDetector riaggancia il dot
+  entro un paio di elementi invece di aspettare la convergenza della mediana.
 """
 
-from time import perf_counter
 from statistics import median
 
+from cw.speed_change import SpeedChangeDetector
+from cw import clock
+
 # Mappa Morse ITU standard (lettere, numeri, punteggiatura base)
 MORSE = {
     ".-":"A", "-...":"B", "-.-.":"C", "-..":"D", ".":"E", "..-.":"F",
@@ -46,6 +50,8 @@ class AdaptiveCWDecoder:
         # Stima adattiva della dot length (secondi)
         self._dot = 0.060             # seed ragionevole (≈ 20 WPM)
         self._on_samples = []         # piccola finestra per mediana di ON brevi
+        self._on_durs    = []         # durate ON della lettera corrente (riclassifica)
+        self._speed      = SpeedChangeDetector(dit_min=0.026, dit_max=0.120)
 
         # Limiti/glitch filter
         self._MIN_SEG = 0.012         # ignora segmenti ridicolmente brevi
@@ -63,9 +69,11 @@ class AdaptiveCWDecoder:
     def reset(self):
         self._buf = ""
         self._on_samples.clear()
+        self._on_durs.clear()
+        self._speed.reset()
 
     def reset_time(self):
-        self._last_time = perf_counter()
+        self._last_time = clock.now()
 
     def get_wpm(self) -> float:
         # Formula approssimata: dot = 1.2 / WPM  →  WPM = 1.2 / dot
@@ -77,7 +85,7 @@ class AdaptiveCWDecoder:
         Chiamare su OGNI transizione (toggle) di key:
         - is_on=True  : passaggio OFF→ON
         - is_on=False : passaggio ON→OFF
-        t_now = timestamp (perf_counter)
+        t_now = timestamp (clock.now())
         """
         # misura la durata dello stato precedente
         dt = max(0.0, min(self._MAX_SEG, t_now - self._last_time))
@@ -112,6 +120,11 @@ class AdaptiveCWDecoder:
         if dur < self._MIN_SEG:
             return  # glitch
 
+        # Cambio di velocità: riparti dal nuovo dot e riclassifica la lettera
+        new_dot = self._speed.mark(dur, self._dot)
+        if new_dot is not None:
+            self._reseed(new_dot)
+
         # Aggiorna la stima del DOT: usa solo gli ON brevi (dot probabili)
         # Shortlist: ON < 2.0·dot ~ dot/dash boundary robusto
         if dur <= 2.0 * self._dot:
@@ -127,6 +140,7 @@ class AdaptiveCWDecoder:
         # Classifica elemento
         sym = "." if dur < (self._DASH_THR * self._dot) else "-"
         self._buf += sym
+        self._on_durs.append(dur)
         if self.on_symbol:
             try: self.on_symbol(sym)
             except: pass
@@ -135,6 +149,10 @@ class AdaptiveCWDecoder:
         if dur < self._MIN_SEG:
             return  # glitch
 
+        new_dot = self._speed.space(dur, self._dot)
+        if new_dot is not None:
+            self._reseed(new_dot)
+
         # Fine lettera/parola secondo gap
         if dur >= self._WORD_GAP * self._dot:
             self._commit_char()
@@ -142,7 +160,13 @@ class AdaptiveCWDecoder:
         elif dur >= self._ICHAR_GAP * self._dot:
             self._commit_char()
 
+    def _reseed(self, dot: float):
+        self._dot = dot
+        self._on_samples = [dot]
+        self._buf = "".join("." if d < (self._DASH_THR * dot) else "-" for d in self._on_durs)
+
     def _commit_char(self):
+        self._on_durs.clear()
         if not self._buf:
             return
         ch = MORSE.get(self._buf, "?")
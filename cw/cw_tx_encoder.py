@@ -2,25 +2,25 @@
 """
 Encoder TX: converte input locali (pressioni/rilasci) in eventi temporali per il client.
 Modalità: manuale (paddle/spacebar) — calcola durate reali; opzionale auto-keyer testo (TODO).
-Callback: on_tx_event(is_on: bool, t_now: float).
+Callback: on_tx_event(is_on: bool, t_now: float), t_now = clock.now() (o l'istante del fronte).
 """
-import time
 from typing import Callable
+from cw import clock
 
 class TxEncoder:
     def __init__(self, on_tx_event:Callable[[bool,float],None]):
         self.on_tx_event = on_tx_event
         self._key_on = False
 
-    def key_down(self):
+    def key_down(self, t: float = None):
         if not self._key_on:
             self._key_on = True
-            self.on_tx_event(True, time.time())
+            self.on_tx_event(True, clock.now() if t is None else t)
 
-    def key_up(self):
+    def key_up(self, t: float = None):
         if self._key_on:
             self._key_on = False
-            self.on_tx_event(False, time.time())
+            self.on_tx_event(False, clock.now() if t is None else t)
 
     # placeholder per invio testo (auto-keyer)
     def send_text(self, text:str):
@@ -0,0 +1,159 @@
+# cw/events.py
+"""
+Eventi di rete in record compatti, verso il thread UI senza lock.
+
+- Record a dimensione fissa (EVENT_DTYPE): istante, tipo, filo, valore.
+  Una sequenza di tempi (mark/space in ms) è un record EV_SEQ con
+  valore = n seguito da n record EV_TIMING con lo stesso istante.
+- EventRing: ring a produttore singolo / consumatore singolo su colonne
+  NumPy preallocate (una per campo: quattro scritture scalari costano
+  metà di un record strutturato). Contatori monotoni di testa e coda: il produttore
+  scrive solo la coda, il consumatore solo la testa (un intero Python si
+  assegna in modo atomico). Pieno = evento scartato e contato in dropped,
+  il produttore non aspetta mai.
+- EventBus: un ring per thread produttore (creato al primo push), così
+  ogni ring resta SPSC anche con più thread di rete. drain() svuota tutti
+  i ring in un solo array ordinato per istante.
+"""
+import threading
+import numpy as np
+
+EVENT_DTYPE = np.dtype([("t", "f8"), ("kind", "u1"), ("wire", "i4"), ("value", "f4")])
+
+EV_ENV        = 1     # inviluppo di un filo laterale (value 0..1)
+EV_KEY        = 2     # fronte di un filo laterale (value 1/0)
+EV_LEVEL      = 3     # livello S-meter del filo centrale
+EV_CENTER_KEY = 4     # fronte del filo centrale (fallback senza tempi)
+EV_MARK       = 5     # mark del filo centrale (value = ms)
+EV_SPACE      = 6     # space del filo centrale (value = ms)
+EV_SEQ        = 7     # sequenza di tempi di un filo laterale (value = n)
+EV_TIMING     = 8     # elemento della sequenza (value = ms con segno)
+EV_TX         = 9     # fronte della trasmissione locale (value 1/0)
+EV_RESET      = 10    # cambio di filo centrale: azzera lo stato del decoder
+EV_ELEM       = 11    # elemento del filo centrale a fine mark (value 0 punto, 1 linea)
+EV_TEXT       = 12    # carattere decodificato (value = codice Unicode)
+EV_SYMBOL     = 13    # simbolo del carattere in corso (value 0 punto, 1 linea)
+
+def make_events(t: float, recs) -> np.ndarray:
+    """Array di eventi dallo stesso istante: recs = [(kind, wire, value)]."""
+    ev = np.empty(len(recs), dtype=EVENT_DTYPE)
+    ev["t"] = t
+    if recs:
+        k, w, v = zip(*recs)
+        ev["kind"] = k; ev["wire"] = w; ev["value"] = v
+    return ev
+
+class EventRing:
+    def __init__(self, capacity: int = 8192):
+        n = 1
+        while n < int(capacity): n <<= 1
+        self.capacity = n
+        self._mask = n - 1
+        self._cols = tuple(np.zeros(n, dtype=EVENT_DTYPE[f]) for f in EVENT_DTYPE.names)
+        self._head = 0          # letto fin qui (consumatore)
+        self._tail = 0          # scritto fin qui (produttore)
+        self.dropped = 0
+
+    def __len__(self):
+        return self._tail - self._head
+
+    # --- produttore ---
+    def push(self, t: float, kind: int, wire: int = 0, value: float = 0.0) -> bool:
+        tail = self._tail
+        if tail - self._head >= self.capacity:
+            self.dropped += 1
+            return False
+        i = tail & self._mask; ct, ck, cw, cv = self._cols
+        ct[i] = t; ck[i] = kind; cw[i] = wire; cv[i] = value
+        self._tail = tail + 1
+        return True
+
+    def push_many(self, recs) -> bool:
+        """Tutti i record o nessuno (una sequenza a metà non ha senso)."""
+        tail = self._tail; n = len(recs)
+        if tail - self._head + n > self.capacity:
+            self.dropped += n
+            return False
+        ct, ck, cw, cv = self._cols
+        for k, (t, kind, wire, value) in enumerate(recs):
+            i = (tail + k) & self._mask
+            ct[i] = t; ck[i] = kind; cw[i] = wire; cv[i] = value
+        self._tail = tail + n
+        return True
+
+    def push_array(self, ev) -> bool:
+        """Un lotto EVENT_DTYPE già pronto: copia per colonne, tutto o niente."""
+        tail = self._tail; n = len(ev)
+        if tail - self._head + n > self.capacity:
+            self.dropped += n
+            return False
+        i = tail & self._mask; first = min(n, self.capacity - i)
+        for f, c in zip(EVENT_DTYPE.names, self._cols):
+            col = ev[f]
+            c[i:i + first] = col[:first]
+            if first < n: c[:n - first] = col[first:]
+        self._tail = tail + n
+        return True
+
+    # --- consumatore ---
+    def drain(self) -> np.ndarray:
+        head, tail = self._head, self._tail
+        out = np.empty(tail - head, dtype=EVENT_DTYPE)
+        if head == tail:
+            return out
+        i, j = head & self._mask, tail & self._mask
+        for f, c in zip(EVENT_DTYPE.names, self._cols):
+            if i < j: out[f] = c[i:j]
+            else:     out[f] = np.concatenate((c[i:], c[:j]))
+        self._head = tail
+        return out
+
+class EventBus:
+    def __init__(self, capacity: int = 8192):
+        self.capacity = int(capacity)
+        self._rings = {}                # thread -> EventRing
+        self._lock = threading.Lock()   # solo per creare/rimuovere ring
+        self._lost = 0                  # scartati da ring di thread terminati
+
+    def _ring(self) -> EventRing:
+        thr = threading.current_thread()
+        r = self._rings.get(thr)
+        if r is None:
+            with self._lock:
+                r = EventRing(self.capacity)
+                rings = dict(self._rings); rings[thr] = r
+                self._rings = rings     # sostituzione atomica: il consumatore itera una copia stabile
+        return r
+
+    def push(self, t: float, kind: int, wire: int = 0, value: float = 0.0) -> bool:
+        return self._ring().push(t, kind, wire, value)
+
+    def push_seq(self, t: float, wire: int, seq) -> bool:
+        recs = [(t, EV_SEQ, wire, len(seq))] + [(t, EV_TIMING, wire, v) for v in seq]
+        return self._ring().push_many(recs)
+
+    def push_array(self, ev) -> bool:
+        return self._ring().push_array(ev)
+
+    def drain(self) -> np.ndarray:
+        """Tutti gli eventi in attesa, ordinati per istante (stabile: le sequenze restano unite)."""
+        parts = []; dead = []
+        for thr, ring in self._rings.items():
+            if len(ring): parts.append(ring.drain())
+            if not thr.is_alive() and not len(ring): dead.append(thr)
+        if dead:
+            with self._lock:
+                rings = dict(self._rings)
+                for thr in dead:
+                    self._lost += rings.pop(thr).dropped
+                self._rings = rings
+        if not parts:
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        ev = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        if len(parts) > 1:
+            ev = ev[np.argsort(ev["t"], kind="stable")]
+        return ev
+
+    @property
+    def dropped(self) -> int:
+        return self._lost + sum(r.dropped for r in self._rings.values())
@@ -0,0 +1,95 @@
+# cw/fist_index.py
+"""
+Indice persistente dei "fist" (impronta di manipolazione) degli operatori noti.
+
+Impronta = 4 rapporti (vedi FIST_FEATURES), confrontati nel dominio log e
+scalati per feature. Ricerca del vicino più prossimo con griglia hash:
+ogni impronta cade in una cella di lato = raggio massimo, la query guarda
+solo le 3^4 celle adiacenti -> costo costante anche con migliaia di operatori.
+
+Persistenza: JSON {nome: {"fp": [..4..], "n": campioni}}, scrittura atomica.
+"""
+import json, math, os
+from itertools import product
+
+FIST_FEATURES = ("dash_dot", "weight", "char_gap", "word_gap")
+# tolleranza tipica per feature (log): ~8% sui mark, di più sugli spazi
+_SCALE = (0.08, 0.08, 0.15, 0.20)
+_NEIGHBOURS = tuple(product((-1, 0, 1), repeat=len(FIST_FEATURES)))
+
+def _vec(fp):
+    return tuple(math.log(max(1e-6, float(v))) / s for v, s in zip(fp, _SCALE))
+
+class FistIndex:
+    def __init__(self, radius: float = 1.5):
+        self.radius = float(radius)
+        self._ops = {}        # nome -> (fp, n)
+        self._cells = {}      # cella -> {nome: vettore}
+
+    def __len__(self): return len(self._ops)
+
+    def _cell(self, v):
+        r = self.radius
+        return tuple(int(math.floor(x / r)) for x in v)
+
+    def add(self, name: str, fp, n: int = 1):
+        """Aggiunge/aggiorna un operatore (media pesata con le impronte precedenti)."""
+        name = str(name).strip().upper()
+        if not name or fp is None: return
+        old = self._ops.get(name)
+        if old:
+            ofp, on = old
+            tot = on + n
+            fp = tuple((a*on + b*n)/tot for a, b in zip(ofp, fp))
+            n = tot
+            self._cells.get(self._cell(_vec(ofp)), {}).pop(name, None)
+        fp = tuple(float(x) for x in fp)
+        self._ops[name] = (fp, int(n))
+        v = _vec(fp)
+        self._cells.setdefault(self._cell(v), {})[name] = v
+
+    def remove(self, name: str):
+        name = str(name).strip().upper()
+        old = self._ops.pop(name, None)
+        if old:
+            self._cells.get(self._cell(_vec(old[0])), {}).pop(name, None)
+
+    def nearest(self, fp):
+        """(nome, distanza) del più vicino entro il raggio, altrimenti None."""
+        if fp is None or not self._ops: return None
+        v = _vec(fp)
+        c = self._cell(v)
+        best = None; best_d = self.radius
+        for off in _NEIGHBOURS:
+            bucket = self._cells.get(tuple(a + b for a, b in zip(c, off)))
+            if not bucket: continue
+            for name, w in bucket.items():
+                d = math.sqrt(sum((a - b) * (a - b) for a, b in zip(v, w)))
+                if d < best_d:
+                    best, best_d = name, d
+        return (best, best_d) if best else None
+
+    # ───────── persistenza
+    @classmethod
+    def load(cls, path: str, radius: float = 1.5):
+        idx = cls(radius)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for name, rec in data.items():
+                fp = rec.get("fp")
+                if fp and len(fp) == len(FIST_FEATURES):
+                    idx.add(name, fp, int(rec.get("n", 1)))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print("Indice operatori illeggibile:", e)
+        return idx
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {name: {"fp": list(fp), "n": n} for name, (fp, n) in sorted(self._ops.items())}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, path)
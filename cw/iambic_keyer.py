@@ -0,0 +1,173 @@
+# cw/iambic_keyer.py
+"""
+Keyer iambico (modi A e B) per paddle.
+
+- IambicCore: macchina a stati deterministica, senza thread né orologio:
+  paddle(dit, dah, t) registra lo stato dei contatti all'istante t,
+  advance(t) restituisce i fronti (t, on) maturati fino a t. Gli elementi
+  stanno su una griglia assoluta: ogni inizio è origine + n unità, con n
+  intero, quindi niente deriva anche se chi chiama arriva in ritardo.
+  L'origine è l'istante della prima pressione da fermo.
+- Unità = 1.2 / wpm s. Punto = 1 unità di mark + 1 di spazio, linea = 3 + 1.
+  weight (25..75, 50 = neutro) sposta tempo tra mark e spazio senza
+  cambiare il periodo dell'elemento.
+- Fine elemento (fine dello spazio): opposto se memorizzato o premuto,
+  altrimenti lo stesso se premuto, altrimenti fermo. Con entrambi premuti
+  gli elementi si alternano (squeeze).
+- Memoria: una pressione del paddle opposto durante l'elemento (mark o
+  spazio) viene ricordata anche se rilasciata prima della fine.
+- Squeeze rilasciato (entrambi i paddle chiusi in un qualsiasi momento
+  dell'elemento, nessuno a fine elemento). Modo B: esce un elemento opposto
+  in più (anche il paddle tenuto all'inizio vale come memoria). Modo A: il
+  keyer si ferma dopo l'elemento in corso e la memoria si cancella, come
+  nei keyer Curtis A. Quindi punto + linea rilasciati durante il primo
+  punto danno "." in A e ".-" in B, sia premuti insieme sia con la linea
+  arrivata dopo l'inizio del punto. La memoria da sola (linea premuta e
+  lasciata dopo aver già lasciato il punto) dà ".-" in entrambi i modi.
+- IambicKeyer: thread che attende la prossima scadenza (sleep e poi attesa
+  attiva negli ultimi SPIN_S) e chiama on_key(on, t) con t = istante di
+  griglia, non quello di risveglio. paddle_edge(linea, chiuso, t) arriva da
+  SerialKey (linea 0 = punto, 1 = linea).
+"""
+import threading
+from cw import clock
+
+DIT, DAH = 0, 1
+
+class IambicCore:
+    def __init__(self, wpm: float = 25.0, mode: str = "B", weight: float = 50.0, memory: bool = True):
+        self.mode = mode.upper()
+        self.memory = bool(memory)
+        self.set_speed(wpm, weight)
+        self._held = [False, False]
+        self._mem = [False, False]
+        self._elem = None               # elemento in corso (DIT/DAH) o None da fermo
+        self._squeeze = False           # entrambi chiusi durante l'elemento in corso
+        self._on = False                # mark in corso
+        self._origin = 0.0; self._units = 0     # inizio elemento = origin + units * unit
+        self._mark_end = self._elem_end = 0.0
+
+    def set_speed(self, wpm: float, weight: float = None):
+        """Valida dal prossimo elemento (l'origine si riallinea all'inizio di quello)."""
+        self.wpm = max(5.0, min(60.0, float(wpm)))
+        if weight is not None: self.weight = max(25.0, min(75.0, float(weight)))
+        self.unit = 1.2 / self.wpm
+        self._resync = True
+
+    @property
+    def idle(self) -> bool:
+        return self._elem is None
+
+    def next_deadline(self):
+        if self._elem is None: return None
+        return self._mark_end if self._on else self._elem_end
+
+    def paddle(self, dit: bool, dah: bool, t: float):
+        """Stato dei contatti all'istante t (chiamare advance(t) prima)."""
+        new = [bool(dit), bool(dah)]
+        if self._elem is not None and self.memory:
+            opp = 1 - self._elem
+            if new[opp] and not self._held[opp]:
+                self._mem[opp] = True
+        self._held = new
+        if new[DIT] and new[DAH]: self._squeeze = True
+        if self._elem is None and (new[DIT] or new[DAH]):
+            self._origin = t; self._units = 0; self._resync = False
+            return self._start(DIT if new[DIT] else DAH)
+        return []
+
+    def _start(self, elem):
+        u = self.unit
+        if self._resync:                # nuova velocità: l'origine riparte da qui
+            self._origin += self._units * self._prev_unit; self._units = 0; self._resync = False
+        t0 = self._origin + self._units * u
+        extra = (self.weight / 50.0 - 1.0) * u
+        self._elem = elem; self._on = True
+        self._mark_end = t0 + (u if elem == DIT else 3 * u) + extra
+        self._units += 2 if elem == DIT else 4
+        self._elem_end = self._origin + self._units * u
+        self._prev_unit = u
+        opp = 1 - elem
+        self._mem[elem] = False
+        self._mem[opp] = self.mode == "B" and self._held[opp] and self.memory
+        self._squeeze = self._held[DIT] and self._held[DAH]
+        return [(t0, True)]
+
+    def advance(self, t: float):
+        """Fronti con scadenza <= t, in ordine."""
+        out = []
+        while self._elem is not None:
+            if self._on:
+                if self._mark_end > t: break
+                self._on = False
+                out.append((self._mark_end, False))
+                continue
+            if self._elem_end > t: break
+            elem = self._elem; opp = 1 - elem
+            if self.mode == "A" and self._squeeze and not (self._held[DIT] or self._held[DAH]):
+                self._elem = None; self._mem = [False, False]
+            elif self._mem[opp] or self._held[opp]:
+                out += self._start(opp)
+            elif self._held[elem]:
+                out += self._start(elem)
+            else:
+                self._elem = None; self._mem = [False, False]
+        return out
+
+class IambicKeyer:
+    SPIN_S = 0.0015
+
+    def __init__(self, on_key, wpm: float = 25.0, mode: str = "B", weight: float = 50.0):
+        self.on_key = on_key
+        self.core = IambicCore(wpm, mode, weight)
+        self._held = [False, False]
+        self._cv = threading.Condition()
+        self._inbox = []                # (t, dit, dah) dal thread del tasto
+        self._stop = False
+        self.late = 0.0                 # ritardo massimo di emissione rispetto alla griglia (s)
+        self._thread = threading.Thread(target=self._run, name="IambicKeyer", daemon=True)
+        self._thread.start()
+
+    def paddle_edge(self, line: int, closed: bool, t: float = None):
+        if line not in (DIT, DAH): return
+        with self._cv:
+            self._held[line] = bool(closed)
+            self._inbox.append((clock.now() if t is None else t, self._held[DIT], self._held[DAH]))
+            self._cv.notify()
+
+    def set_speed(self, wpm: float, weight: float = None):
+        with self._cv:
+            self.core.set_speed(wpm, weight)
+
+    def stop(self):
+        with self._cv:
+            self._stop = True; self._cv.notify()
+        self._thread.join(timeout=1.0)
+
+    def _emit(self, edges):
+        for t, on in edges:
+            self.late = max(self.late, clock.now() - t)
+            try: self.on_key(on, t)
+            except Exception as e: print("Keyer: errore callback:", e)
+
+    def _run(self):
+        core = self.core
+        while True:
+            with self._cv:
+                while not self._inbox and not self._stop:
+                    dl = core.next_deadline()
+                    if dl is None: self._cv.wait(); continue
+                    wait = dl - clock.now() - self.SPIN_S
+                    if wait <= 0: break
+                    self._cv.wait(wait)
+                if self._stop: return
+                inbox, self._inbox = self._inbox, []
+            edges = []
+            for t, dit, dah in inbox:           # contatti in ordine di tempo, scadenze prima
+                edges += core.advance(t)
+                edges += core.paddle(dit, dah, t)
+            dl = core.next_deadline()
+            if dl is not None and not inbox:
+                while clock.now() < dl: pass      # ultimi SPIN_S: attesa attiva
+                edges += core.advance(dl)
+            self._emit(edges)
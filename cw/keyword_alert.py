@@ -0,0 +1,142 @@
+# cw/keyword_alert.py
+"""
+Allarmi su parole chiave / nominativi nel testo decodificato (Aho-Corasick).
+
+- Un solo automa per tutta la watch-list (migliaia di termini): costo per
+  carattere O(1) ammortizzato, indipendente dal numero di termini.
+- Uno stato per filo: i caratteri arrivano a pezzi dai callback on_text/on_char
+  dei decoder e il matching prosegue da dove era rimasto.
+- set_terms() ricostruisce l'automa in un thread a parte; il nuovo automa viene
+  adottato al primo feed() successivo, riallineando lo stato di ogni filo con
+  la coda di testo recente (senza rifare gli allarmi). La decodifica non si ferma.
+
+words=True: i termini valgono solo come parole intere ("IK1AB" non scatta
+dentro "IK1ABC"); l'allarme arriva al separatore che chiude la parola.
+Separatore = qualsiasi carattere non alfanumerico (spazio, /, ?, =, ',',
+□ ...), nel testo come nei termini: "IZ6ABC" scatta in "DE IZ6ABC/P" e
+"IZ6ABC?", "IZ6ABC/P" scatta in "IZ6ABC/P" e anche in "IZ6ABC P".
+on_match riceve il termine come scritto nella watch-list.
+on_match(wire, term, ts) viene chiamato dal thread che esegue feed().
+"""
+import threading
+from collections import deque
+
+from cw import clock
+
+def _norm(s: str) -> str:
+    return " ".join(str(s).upper().split())
+
+def _words(s: str) -> str:
+    """Ogni carattere non alfanumerico è un confine di parola."""
+    return " ".join("".join(c if c.isalnum() else " " for c in s).split())
+
+class _Automaton:
+    __slots__ = ("goto", "fail", "out", "maxlen", "names")
+    def __init__(self, terms, names=None):
+        goto = [{}]; out = [()]
+        for term in terms:
+            s = 0
+            for ch in term:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(goto); goto[s][ch] = nxt
+                    goto.append({}); out.append(())
+                s = nxt
+            out[s] = out[s] + (term,)
+        fail = [0] * len(goto)
+        # BFS: link di fallimento + uscite ereditate dal suffisso
+        q = deque(goto[0].values())
+        while q:
+            s = q.popleft()
+            for ch, t in goto[s].items():
+                q.append(t)
+                f = fail[s]
+                while f and ch not in goto[f]: f = fail[f]
+                fail[t] = goto[f].get(ch, 0) if goto[f].get(ch, 0) != t else 0
+                if out[fail[t]]: out[t] = out[t] + out[fail[t]]
+        self.goto = goto; self.fail = fail; self.out = out
+        self.maxlen = max((len(t) for t in terms), default=0)
+        self.names = names or {}        # chiave nell'automa -> termine originale
+
+    def step(self, s: int, ch: str) -> int:
+        goto = self.goto; fail = self.fail
+        while s and ch not in goto[s]: s = fail[s]
+        return goto[s].get(ch, 0)
+
+class KeywordAlert:
+    def __init__(self, terms=(), on_match=None, words: bool = True):
+        self.on_match = on_match
+        self.words = bool(words)
+        self._ac = _Automaton(())
+        self._pending = None
+        self._state = {}          # filo -> stato nell'automa
+        self._tail = {}           # filo -> ultimi caratteri (per riallineare)
+        self._last = {}           # filo -> ultimo carattere (spazi compressi)
+        self._lock = threading.Lock()
+        self._gen = 0
+        if terms: self.set_terms(terms, background=False)
+
+    def set_terms(self, terms, background: bool = True):
+        """Nuova watch-list. In background l'automa attuale resta attivo finché il nuovo è pronto."""
+        terms = sorted({_norm(t) for t in terms if _norm(t)})
+        self._gen += 1; gen = self._gen
+        names = {}
+        if self.words:
+            names = {f" {_words(t)} ": t for t in terms if _words(t)}
+            terms = sorted(names)
+        def build():
+            ac = _Automaton(terms, names)
+            if gen == self._gen:     # una watch-list più recente vince
+                self._pending = ac
+        if background:
+            threading.Thread(target=build, name="KeywordAlertBuild", daemon=True).start()
+        else:
+            build(); self._adopt()
+
+    def _adopt(self):
+        ac, self._pending = self._pending, None
+        if ac is None: return
+        keep = max(0, ac.maxlen - 1)
+        for wire, tail in self._tail.items():
+            s = 0
+            for ch in list(tail)[-keep:] if keep else ():
+                s = ac.step(s, ch)
+            self._state[wire] = s
+            self._tail[wire] = deque(tail, maxlen=keep or 1)
+        self._ac = ac
+
+    def feed(self, wire: int, text: str, ts: float = None):
+        """Consuma testo decodificato del filo `wire` (anche un carattere per volta)."""
+        if not text: return
+        if ts is None: ts = clock.wall()
+        hits = []
+        with self._lock:
+            if self._pending is not None: self._adopt()
+            ac = self._ac
+            s = self._state.get(wire, 0)
+            tail = self._tail.get(wire)
+            if tail is None:
+                # ogni filo parte "dopo uno spazio": la prima parola è intera
+                tail = self._tail[wire] = deque(" ", maxlen=max(1, ac.maxlen - 1))
+                s = ac.step(0, " ")
+            last = self._last.get(wire, " ")
+            for ch in text.upper():
+                if self.words and not ch.isalnum(): ch = " "
+                if ch.isspace():
+                    if last == " ": continue
+                    ch = " "
+                last = ch
+                s = ac.step(s, ch)
+                tail.append(ch)
+                if ac.out[s]: hits.extend(ac.out[s])
+            self._state[wire] = s
+            self._last[wire] = last
+            names = ac.names
+        if self.on_match:
+            for term in hits: self.on_match(wire, names.get(term, term).strip(), ts)
+
+    def reset(self, wire: int = None):
+        with self._lock:
+            for d in (self._state, self._tail, self._last):
+                if wire is None: d.clear()
+                else: d.pop(wire, None)
@@ -2,40 +2,153 @@
 from collections import deque
 import math
 
-def _cv(vals):
-    n = len(vals)
-    if n < 2: return 1.0
-    m = sum(vals)/n
-    if m <= 1e-9: return 1.0
-    v = sum((x-m)*(x-m) for x in vals)/(n-1)
-    return math.sqrt(max(0.0, v))/m
+class _Welford:
+    """Media/varianza su finestra scorrevole (Welford con rimozione), O(1) per campione."""
+    __slots__ = ("buf", "n", "mean", "m2")
+    def __init__(self, window):
+        self.buf = deque(maxlen=window)
+        self.n = 0; self.mean = 0.0; self.m2 = 0.0
+
+    def push(self, x: float):
+        if len(self.buf) == self.buf.maxlen:
+            old = self.buf[0]
+            if self.n > 1:
+                m = self.mean
+                self.mean = (self.n*m - old)/(self.n - 1)
+                self.m2 = max(0.0, self.m2 - (old - m)*(old - self.mean))
+                self.n -= 1
+            else:
+                self.n = 0; self.mean = 0.0; self.m2 = 0.0
+        self.buf.append(x)
+        self.n += 1
+        d = x - self.mean
+        self.mean += d/self.n
+        self.m2 += d*(x - self.mean)
+
+    def cv(self) -> float:
+        if self.n < 2 or self.mean <= 1e-9: return 1.0
+        return math.sqrt(self.m2/(self.n - 1))/self.mean
+
+    def clear(self):
+        self.buf.clear(); self.n = 0; self.mean = 0.0; self.m2 = 0.0
 
 class SenderClassifier:
-    """Stima sorgente: 'AUTO' (feed) vs 'HUMAN' (operatore) + WPM."""
-    def __init__(self, window=64):
-        self.marks = deque(maxlen=window)
-        self.spaces = deque(maxlen=window)
+    """
+    Stima sorgente: 'AUTO' (feed) vs 'HUMAN' (operatore) + WPM + impronta del fist.
+    Statistiche per classe (dot, dash, spazio elemento/lettera/parola) aggiornate
+    in O(1); la regolarità (CV) è misurata per classe, non sul misto dot+dash.
+    Con un FistIndex l'impronta viene confrontata con gli operatori noti.
+    """
+    MATCH_EVERY = 4     # confronto con l'indice ogni N elementi
+    STATE_KEEP = 16     # campioni per classe salvati da get_state()
+
+    def __init__(self, window=64, index=None):
+        self.window = int(window)
+        self.index = index
+        self._dot = _Welford(window); self._dash = _Welford(window)
+        self._intra = _Welford(window); self._char = _Welford(window)
+        self._word = _Welford(window)
+        self._min_mark = deque()   # minimo scorrevole (deque monotona) per l'avvio
+        self._n_mark = 0
+        self._tick = 0
         self.mode = "—"
         self.wpm = 0.0
+        self.operator = None        # (nome, distanza) o None
+
+    def reset(self):
+        for s in (self._dot, self._dash, self._intra, self._char, self._word): s.clear()
+        self._min_mark.clear(); self._n_mark = 0; self._tick = 0
+        self.mode = "—"; self.wpm = 0.0; self.operator = None
+
+    def _dot_ms(self) -> float:
+        if self._dot.n >= 3: return self._dot.mean
+        return self._min_mark[0][1] if self._min_mark else 0.0
+
+    def _unit_ms(self) -> float:
+        # periodo elemento (dot+spazio)/2: non dipende dal peso della manipolazione
+        dot = self._dot_ms()
+        return 0.5*(dot + self._intra.mean) if self._intra.n >= 3 else dot
 
     def update_mark_ms(self, ms: float):
         if 0.5 < ms < 10000.0:
-            self.marks.append(float(ms))
+            ms = float(ms)
+            self._n_mark += 1
+            q = self._min_mark
+            while q and q[-1][1] >= ms: q.pop()
+            q.append((self._n_mark, ms))
+            if q[0][0] <= self._n_mark - self.window: q.popleft()
+            if self._dot.n and ms < 0.6*self._dot.mean:
+                # i "dot" erano dash (lettera iniziale tipo T, M, O): riparti
+                self._dash, self._dot = self._dot, _Welford(self.window)
+                for s in (self._intra, self._char, self._word): s.clear()
+            dot = self._dot_ms()
+            (self._dash if ms >= 2.0*dot else self._dot).push(ms)
         self._update()
 
     def update_space_ms(self, ms: float):
         if 0.5 < ms < 10000.0:
-            self.spaces.append(float(ms))
+            ms = float(ms)
+            u = self._unit_ms()
+            if u > 0 and ms < 15.0*u:          # pause lunghe: non fanno parte del fist
+                if ms < 2.0*u:   self._intra.push(ms)
+                elif ms < 5.0*u: self._char.push(ms)
+                else:              self._word.push(ms)
         self._update()
 
     def _update(self):
-        if self.marks:
-            dot_s = min(self.marks)/1000.0
-            if dot_s > 1e-3:
-                self.wpm = 1.2 / dot_s
-        if len(self.marks) >= 12 and len(self.spaces) >= 12:
-            cm = _cv(self.marks); cs = _cv(self.spaces)
-            self.mode = "AUTO" if (cm < 0.12 and cs < 0.18) else "HUMAN"
+        dot = self._dot_ms()
+        if dot > 1.0:
+            self.wpm = 1200.0 / dot
+        if self._dot.n >= 6 and self._intra.n >= 6 and self._dash.n + self._char.n >= 6:
+            regular = self._dot.cv() < 0.12 and self._intra.cv() < 0.18
+            if self._dash.n >= 3: regular = regular and self._dash.cv() < 0.12
+            self.mode = "AUTO" if regular else "HUMAN"
+        self._tick += 1
+        if self.index is not None and self._tick % self.MATCH_EVERY == 0:
+            fp = self.fingerprint()
+            if fp is not None:
+                self.operator = self.index.nearest(fp)
+
+    def fingerprint(self):
+        """
+        (dash/dot, peso, gap lettera, gap parola) oppure None se i dati sono pochi.
+        Peso = dot/spazio elemento (1.0 = ITU, >1 manipolazione pesante); i gap
+        sono in unità di periodo elemento (ITU: 3 e 7).
+        """
+        if self._dot.n < 4 or self._dash.n < 3 or self._intra.n < 4 or self._char.n < 2:
+            return None
+        dot = self._dot.mean; u = self._unit_ms()
+        word = self._word.mean/u if self._word.n else 7.0
+        return (self._dash.mean/dot, dot/self._intra.mean, self._char.mean/u, word)
+
+    def enroll(self, name: str):
+        """Registra l'impronta corrente come operatore `name` nell'indice."""
+        fp = self.fingerprint()
+        if self.index is None or fp is None: return False
+        self.index.add(name, fp)
+        return True
+
+    def get_state(self) -> dict:
+        """Modo e ultimi STATE_KEEP campioni per classe (ms), per l'avvio a caldo."""
+        k = self.STATE_KEEP
+        st = {name: [round(x, 1) for x in list(w.buf)[-k:]] for name, w in self._classes()}
+        st["mode"] = self.mode
+        return st
+
+    def set_state(self, st: dict):
+        self.reset()
+        for name, w in self._classes():
+            for x in st.get(name, ())[-self.window:]: w.push(float(x))
+        self._update()
+        if st.get("mode") in ("AUTO", "HUMAN"): self.mode = st["mode"]
+        if self.index is not None: self.operator = self.index.nearest(self.fingerprint())
+
+    def _classes(self):
+        return (("dot", self._dot), ("dash", self._dash), ("intra", self._intra),
+                ("char", self._char), ("word", self._word))
 
     def get(self):
         return self.mode, self.wpm
+
+    def get_operator(self):
+        return self.operator
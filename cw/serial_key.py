@@ -0,0 +1,152 @@
+# cw/serial_key.py
+"""
+Tasto verticale / paddle su porta seriale (RS-232 o adattatore USB).
+
+- I contatti chiudono le linee di stato del modem (CTS, DSR, DCD, RI): un
+  thread dedicato le legge con TIOCMGET (POSIX) o con pyserial se
+  installato (Windows), ogni POLL_S secondi. Nessun evento Qt, nessun
+  auto-repeat della tastiera: il fronte ha l'istante clock.now() del
+  campione che lo ha visto (errore <= POLL_S, indipendente dal carico
+  della GUI).
+- mode="bytes": ogni byte ricevuto è lo stato delle linee (bit i = lines[i]),
+  atteso con select. Serve per adattatori che mandano lo stato come dati e
+  come banco di prova con uno pseudo-terminale (os.openpty()).
+- Debounce nel tempo, sul fronte iniziale: il primo cambio di stato passa
+  subito con il suo istante, i rimbalzi nei debounce_ms successivi sono
+  ignorati; a fine finestra la linea si ricampiona e, se è cambiata di
+  nuovo, il fronte esce con l'istante del campione.
+- on_edge(linea, chiuso, t) dal thread del tasto: linea è l'indice in lines.
+- start() solleva OSError se la porta non si apre o, in modo modem, non ha
+  linee di stato (un pseudo-terminale dà ENOTTY): il thread parte solo se
+  la prima lettura è riuscita.
+"""
+import os, select, threading
+from time import sleep
+from cw import clock
+
+try:
+    import fcntl, termios, tty, struct
+except ImportError:                     # Windows: solo pyserial
+    fcntl = termios = tty = struct = None
+
+MODEM_BITS = {"CTS": 0x020, "DSR": 0x100, "DCD": 0x040, "CD": 0x040, "RI": 0x080}   # TIOCM_*
+
+class SerialKey:
+    POLL_S = 0.00025
+
+    def __init__(self, port: str, on_edge, lines=("CTS",), mode: str = "modem",
+                 debounce_ms: float = 3.0, invert: bool = False):
+        self.port = port
+        self.on_edge = on_edge
+        self.lines = tuple(l.strip().upper() for l in lines)
+        self.mode = mode
+        self.debounce = float(debounce_ms) / 1000.0
+        self.invert = bool(invert)      # contatto chiuso = linea bassa
+        self.edges = 0                  # fronti notificati
+        self.changes = 0                # cambi di linea letti (rimbalzi compresi)
+        n = len(self.lines)
+        self._state = [False] * n       # stato già notificato
+        self._last = [-1e9] * n         # istante dell'ultimo fronte notificato
+        self._fd = None; self._ser = None; self._bits = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ─────────────────────────── apertura
+    def _open(self):
+        if self.mode == "bytes":
+            self._fd = os.open(self.port, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+            if tty: tty.setraw(self._fd)
+            return self._read_bytes
+        for l in self.lines:
+            if l not in MODEM_BITS: raise ValueError("linea sconosciuta: %s" % l)
+        if fcntl is not None:
+            self._fd = os.open(self.port, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+            self._bits = [MODEM_BITS[l] for l in self.lines]
+            self._buf = bytearray(4)
+            # una lettura qui: senza linee di modem (pty, file) l'errore arriva da start()
+            try: fcntl.ioctl(self._fd, termios.TIOCMGET, self._buf)
+            except OSError:
+                os.close(self._fd); self._fd = None
+                raise
+            return self._read_ioctl
+        import serial                   # pyserial (opzionale): solo dove non c'è ioctl
+        self._ser = serial.Serial(self.port, timeout=0)
+        attr = {"CTS": "cts", "DSR": "dsr", "DCD": "cd", "CD": "cd", "RI": "ri"}
+        self._attrs = [attr[l] for l in self.lines]
+        return self._read_pyserial
+
+    def _read_ioctl(self, timeout):
+        sleep(timeout)
+        fcntl.ioctl(self._fd, termios.TIOCMGET, self._buf)
+        t = clock.now()
+        m = struct.unpack("i", self._buf)[0]
+        return [(t, [bool(m & b) for b in self._bits])]
+
+    def _read_pyserial(self, timeout):
+        sleep(timeout)
+        t = clock.now()
+        return [(t, [bool(getattr(self._ser, a)) for a in self._attrs])]
+
+    def _read_bytes(self, timeout):
+        r, _, _ = select.select([self._fd], [], [], timeout)
+        if not r: return [(clock.now(), None)]
+        t = clock.now()
+        try: data = os.read(self._fd, 256)
+        except BlockingIOError: return [(t, None)]
+        n = len(self.lines)
+        return [(t, [bool(b >> i & 1) for i in range(n)]) for b in data]
+
+    # ─────────────────────────── thread
+    def start(self):
+        read = self._open()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(read,), name="SerialKey", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread: self._thread.join(timeout=1.0)
+        self._thread = None
+        if self._fd is not None:
+            try: os.close(self._fd)
+            except OSError: pass
+            self._fd = None
+        if self._ser is not None:
+            try: self._ser.close()
+            except Exception: pass
+            self._ser = None
+
+    def _run(self, read):
+        poll = self.mode != "bytes"
+        level = list(self._state)       # ultimo stato letto
+        while not self._stop.is_set():
+            if poll:
+                timeout = self.POLL_S
+            else:                       # attesa: fino a fine finestra se c'è un cambio in sospeso
+                now = clock.now(); timeout = 0.1
+                for i, l in enumerate(level):
+                    if l != self._state[i]:
+                        timeout = min(timeout, max(0.0, self._last[i] + self.debounce - now))
+            try: samples = read(timeout)
+            except OSError as e:
+                print("Tasto seriale: lettura non riuscita:", e); return
+            for t, lv in samples:
+                if lv is not None:
+                    lv = [l != self.invert for l in lv]
+                    self.changes += sum(a != b for a, b in zip(lv, level))
+                    level = lv
+                self._apply(t, level)
+
+    def _apply(self, t, level):
+        for i, l in enumerate(level):
+            if l == self._state[i]: continue
+            if t - self._last[i] < self.debounce: continue
+            self._state[i] = l; self._last[i] = t; self.edges += 1
+            try: self.on_edge(i, l, t)
+            except Exception as e: print("Tasto seriale: errore callback:", e)
+
+def parse_port(spec: str):
+    """'bytes:/dev/pts/3' -> ('/dev/pts/3', 'bytes'); '/dev/ttyUSB0' -> (..., 'modem')."""
+    if spec.startswith("bytes:"): return spec[6:], "bytes"
+    return spec, "modem"
@@ -0,0 +1,81 @@
+# cw/speed_change.py
+"""
+Rilevatore online di cambio velocità (nuova stazione sullo stesso filo).
+
+Ogni durata viene confrontata col dit corrente nel dominio logaritmico:
+  mark  -> residuo dalla classe più vicina tra dot (1) e dash (3)
+  space -> residuo da elemento/lettera/parola (1, 3, 7), solo se più CORTO
+           del previsto (le pause lunghe degli operatori non fanno testo)
+Un CUSUM bilaterale sui residui accumula l'evidenza con costo O(1) per
+campione; i residui ordinari sono assorbiti dal drift k e quelli di segno
+opposto sono limitati a -clip (un dot nuovo che sembra un dash vecchio non
+cancella l'evidenza dei mark troppo lunghi). Quando uno dei due lati
+supera h (con almeno due campioni anomali) la velocità è cambiata:
+mark()/space() ritornano il nuovo dit, stimato dal mark più corto visto da
+quando l'evidenza ha iniziato ad accumularsi (altrimenti None).
+"""
+import math
+
+_LOG3 = math.log(3.0)
+_LOG7 = math.log(7.0)
+
+class SpeedChangeDetector:
+    def __init__(self, k: float = 0.20, h: float = 0.9, anomaly: float = 0.5, clip: float = 0.1,
+                 dit_min: float = 0.020, dit_max: float = 0.150):
+        self.k = float(k)
+        self.h = float(h)
+        self.anomaly = float(anomaly)
+        self.clip = float(clip)
+        self.dit_min = float(dit_min)
+        self.dit_max = float(dit_max)
+        self.reset()
+
+    def reset(self):
+        self._s_hi = 0.0; self._s_lo = 0.0          # CUSUM lento / veloce
+        self._n_hi = 0;   self._n_lo = 0            # campioni anomali per lato
+        self._min_hi = math.inf; self._min_lo = math.inf  # mark più corto per lato
+
+    def mark(self, dur: float, dit: float):
+        """Durata di un mark (s). Ritorna il nuovo dit se la velocità è cambiata."""
+        if dur <= 0 or dit <= 0: return None
+        x = math.log(dur / dit)
+        e = x if x < 0.5 * _LOG3 else x - _LOG3
+        return self._update(e, dur)
+
+    def space(self, dur: float, dit: float):
+        """Durata di uno space (s): conta solo se più corto della classe attesa."""
+        if dur <= 0 or dit <= 0: return None
+        x = math.log(dur / dit)
+        if x < 0.5 * _LOG3:               e = x
+        elif x < 0.5 * (_LOG3 + _LOG7):   e = x - _LOG3
+        else:                             e = x - _LOG7
+        return self._update(min(0.0, e), None)
+
+    def _update(self, e: float, mark_dur):
+        # lato "più lento": residui positivi (solo mark)
+        if mark_dur is not None:
+            if self._s_hi <= 0.0:
+                self._n_hi = 0; self._min_hi = math.inf
+            self._s_hi = max(0.0, self._s_hi + max(e, -self.clip) - self.k)
+            if self._s_hi > 0.0:
+                if e > self.anomaly: self._n_hi += 1
+                self._min_hi = min(self._min_hi, mark_dur)
+        # lato "più veloce": residui negativi
+        if self._s_lo <= 0.0:
+            self._n_lo = 0; self._min_lo = math.inf
+        self._s_lo = max(0.0, self._s_lo - min(e, self.clip) - self.k)
+        if self._s_lo > 0.0:
+            if e < -self.anomaly: self._n_lo += 1
+            if mark_dur is not None: self._min_lo = min(self._min_lo, mark_dur)
+
+        if self._s_hi > self.h and self._n_hi >= 2 and self._min_hi < math.inf:
+            new = self._min_hi
+            # solo dash visti (es. "O", "M"): il mark più corto è un dash
+            if new > self.dit_max: new /= 3.0
+            self.reset()
+            return max(self.dit_min, min(self.dit_max, new))
+        if self._s_lo > self.h and self._n_lo >= 2 and self._min_lo < math.inf:
+            new = self._min_lo
+            self.reset()
+            return max(self.dit_min, min(self.dit_max, new))
+        return None
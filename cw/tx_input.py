@@ -2,11 +2,11 @@
 """
 Gestione input locali:
 - Spacebar: PTT CW (premi = key down, rilascia = key up) con debounce.
-- Futuro: paddle seriale / iambic.
+- Tasto/paddle seriale: cw/serial_key.py (thread dedicato, fuori da Qt).
 Espone metodi bind/unbind per collegarsi a una QMainWindow.
 """
-import time
 from PyQt5.QtCore import QObject, QEvent, Qt
+from cw import clock
 
 class SpacebarFilter(QObject):
     def __init__(self, on_down, on_up, debounce_ms=2):
@@ -19,14 +19,14 @@ class SpacebarFilter(QObject):
 
     def eventFilter(self, obj, ev):
         if ev.type() == QEvent.KeyPress and ev.key() == Qt.Key_Space:
-            now = time.time()
+            now = clock.now()
             if (now - self._last) >= self.debounce and not self._pressed:
                 self._pressed = True
                 self._last = now
                 self.on_down()
             return True
         if ev.type() == QEvent.KeyRelease and ev.key() == Qt.Key_Space:
-            now = time.time()
+            now = clock.now()
             if (now - self._last) >= self.debounce and self._pressed:
                 self._pressed = False
                 self._last = now
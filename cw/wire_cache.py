@@ -0,0 +1,84 @@
+# cw/wire_cache.py
+"""
+Cache persistente dello stato appreso per filo (avvio a caldo).
+
+- Per ogni filo: dit del decoder (e rapporti/varianze del Viterbi), modo
+  della sorgente e statistiche del fist del classificatore: sintonizzando
+  un filo già sentito decoder, client e classificatore ripartono da lì
+  invece che da 60 ms e da zero.
+- LRU in memoria (OrderedDict) con al più `capacity` fili: il meno usato
+  di recente esce per primo.
+- Persistenza: JSON {"wires": {filo: stato}} in ordine LRU, letto una volta
+  alla creazione, riscritto da un thread ogni flush_s secondi solo se è
+  cambiato qualcosa (scrittura atomica, come FistIndex.save). close() scrive
+  subito.
+- get/put da qualsiasi thread (comandi e decoder): un lock.
+"""
+import json, os, threading
+from collections import OrderedDict
+
+from cw import clock
+
+class WireStateCache:
+    def __init__(self, path: str, capacity: int = 256, flush_s: float = 30.0):
+        self.path = path
+        self.capacity = max(1, int(capacity))
+        self.flush_s = float(flush_s)
+        self._d = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._load()
+        self._thread = threading.Thread(target=self._run, name="WireStateCache", daemon=True)
+        self._thread.start()
+
+    def __len__(self): return len(self._d)
+
+    def get(self, wire: int):
+        with self._lock:
+            st = self._d.get(int(wire))
+            if st is not None: self._d.move_to_end(int(wire))
+            return st
+
+    def put(self, wire: int, state: dict):
+        st = dict(state); st["ts"] = round(clock.wall(), 1)
+        with self._lock:
+            self._d[int(wire)] = st
+            self._d.move_to_end(int(wire))
+            while len(self._d) > self.capacity: self._d.popitem(last=False)
+            self._dirty = True
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty: return
+            data = {"wires": {str(w): st for w, st in self._d.items()}}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print("Cache fili: scrittura non riuscita:", e)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self.flush()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                wires = json.load(f).get("wires", {})
+            for w, st in wires.items():
+                if isinstance(st, dict): self._d[int(w)] = st
+            while len(self._d) > self.capacity: self._d.popitem(last=False)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print("Cache fili illeggibile:", e)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_s):
+            self.flush()
@@ -0,0 +1,141 @@
+# cw/wire_timeline.py
+"""
+Timeline dei mark di un filo: intervalli [inizio, fine) con timestamp, in un
+ring NumPy di capacità fissa. Serve a rasterizzare il waterfall su una griglia
+di tempo esatta: coverage() dà la frazione di ogni fetta di tempo in cui il
+tasto era giù, quindi anche un dot da 20 ms lascia la sua traccia.
+
+Fonti: mark con durata nota (tempi per-pacchetto) oppure fronti key on/off.
+Scritture dal thread del client, letture dal thread UI (lock breve).
+
+KeyTimeline: un filo (il centrale). WireTimeline: tutti i fili laterali in
+un unico buffer di intervalli (filo, inizio, fine); coverage() restituisce la
+matrice righe x fili in un solo passaggio vettoriale.
+"""
+import threading
+import numpy as np
+
+class KeyTimeline:
+    def __init__(self, capacity: int = 512):
+        self._s = np.zeros(capacity, dtype=np.float64)
+        self._e = np.zeros(capacity, dtype=np.float64)
+        self._i = 0                 # prossima posizione nel ring
+        self._n = 0                 # intervalli validi
+        self._open = None           # inizio del mark in corso (fronte senza fine)
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._i = self._n = 0; self._open = None
+
+    def _add(self, t0: float, t1: float):
+        cap = self._s.size
+        self._s[self._i] = t0; self._e[self._i] = t1
+        self._i = (self._i + 1) % cap
+        self._n = min(cap, self._n + 1)
+
+    def mark(self, t0: float, dur: float):
+        """Mark di durata nota che inizia a t0 (s)."""
+        if dur > 0:
+            with self._lock: self._add(float(t0), float(t0) + float(dur))
+
+    def key(self, is_on: bool, t: float):
+        """Fronte del tasto a t (s)."""
+        with self._lock:
+            if is_on:
+                if self._open is None: self._open = float(t)
+            elif self._open is not None:
+                if t > self._open: self._add(self._open, float(t))
+                self._open = None
+
+    def coverage(self, t0: float, dt: float, n: int, now: float = None) -> np.ndarray:
+        """Frazione [0..1] di tasto giù in ognuna delle n fette [t0 + k*dt, t0 + (k+1)*dt)."""
+        t1 = t0 + n * dt
+        with self._lock:
+            s = self._s[:self._n]; e = self._e[:self._n]
+            keep = (e > t0) & (s < t1)
+            s = s[keep]; e = e[keep]
+            if self._open is not None and self._open < t1:
+                s = np.append(s, self._open); e = np.append(e, t1 if now is None else max(self._open, now))
+        if s.size == 0:
+            return np.zeros(n, dtype=np.float32)
+        edges = t0 + dt * np.arange(n + 1)
+        # copertura cumulativa ai bordi delle fette
+        c = np.clip(edges[None, :] - s[:, None], 0.0, (e - s)[:, None]).sum(axis=0)
+        return (np.diff(c) / dt).astype(np.float32)
+
+class WireTimeline:
+    TIMED_HOLD = 0.3     # dopo una sequenza di tempi, i fronti burst del filo sono ignorati
+
+    def __init__(self, capacity: int = 8192):
+        self._w = np.zeros(capacity, dtype=np.int32)
+        self._s = np.zeros(capacity, dtype=np.float64)
+        self._e = np.zeros(capacity, dtype=np.float64)
+        self._i = 0; self._n = 0
+        self._open = {}              # filo -> inizio del mark in corso
+        self._timed_until = {}       # filo -> fine dell'ultima sequenza di tempi
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._i = self._n = 0; self._open.clear(); self._timed_until.clear()
+
+    def _add(self, wire: int, t0: float, t1: float):
+        cap = self._s.size
+        self._w[self._i] = wire; self._s[self._i] = t0; self._e[self._i] = t1
+        self._i = (self._i + 1) % cap
+        self._n = min(cap, self._n + 1)
+
+    def mark(self, wire: int, t0: float, dur: float):
+        if dur > 0:
+            with self._lock: self._add(int(wire), float(t0), float(t0) + float(dur))
+
+    def timings(self, wire: int, seq_ms, t0: float):
+        """Sequenza +mark/-space (ms) che inizia a t0: intervalli esatti."""
+        wire = int(wire); t = float(t0)
+        with self._lock:
+            self._open.pop(wire, None)
+            for v in seq_ms:
+                d = abs(float(v)) / 1000.0
+                if v > 0: self._add(wire, t, t + d)
+                t += d
+            self._timed_until[wire] = t + self.TIMED_HOLD
+
+    def key(self, wire: int, is_on: bool, t: float):
+        """Fronte burst (on/off) di un filo; ignorato se il filo ha tempi recenti."""
+        wire = int(wire)
+        with self._lock:
+            if t < self._timed_until.get(wire, 0.0): return
+            if is_on:
+                self._open.setdefault(wire, float(t))
+            else:
+                t0 = self._open.pop(wire, None)
+                if t0 is not None and t > t0: self._add(wire, t0, float(t))
+
+    def coverage(self, wires, t0: float, dt: float, n: int, now: float = None) -> np.ndarray:
+        """Matrice (n, len(wires)): frazione di tasto giù per riga e per filo."""
+        wires = np.asarray(wires, dtype=np.int32)
+        out = np.zeros((wires.size, n), dtype=np.float64)
+        t1 = t0 + n * dt
+        with self._lock:
+            k = self._n
+            w = self._w[:k]; s = self._s[:k]; e = self._e[:k]
+            sel = (e > t0) & (s < t1)
+            w = w[sel]; s = s[sel]; e = e[sel]
+            if self._open:
+                ow = np.fromiter(self._open.keys(), dtype=np.int32, count=len(self._open))
+                os_ = np.fromiter(self._open.values(), dtype=np.float64, count=len(self._open))
+                keep = os_ < t1
+                w = np.append(w, ow[keep]); s = np.append(s, os_[keep])
+                e = np.append(e, np.full(int(keep.sum()), t1 if now is None else now))
+        if w.size and wires.size:
+            order = np.argsort(wires)
+            pos = np.searchsorted(wires[order], w)
+            pos = np.minimum(pos, wires.size - 1)
+            hit = wires[order][pos] == w
+            if hit.any():
+                s = s[hit]; e = np.maximum(e[hit], s); col = order[pos[hit]]
+                edges = t0 + dt * np.arange(n + 1)
+                c = np.clip(edges[None, :] - s[:, None], 0.0, (e - s)[:, None])
+                np.add.at(out, col, np.diff(c, axis=1))
+        return np.minimum(1.0, out.T / dt).astype(np.float32)
@@ -2,19 +2,41 @@
 """
 Client CWCom/KOB:
 - Tenta di estrarre per-packet la sequenza temporale (+mark / -space) in ms.
+  Offset e formato del blocco tempi si cercano una volta per filo
+  (TimingLayout), poi ogni pacchetto è un solo struct.unpack_from.
 - Se i tempi non sono affidabili, torna al fallback "per-arrival" (gating).
 - Emette SEMPRE on_center_keying(True/False) per i fronti e:
     on_center_element('.'|'-') a fine mark
     on_center_mark_ms(ms) / on_center_space_ms(ms) se i tempi sono noti
     on_center_level(level, over) ~60 Hz per S-meter
 
-- Laterali: stima envelope/burst per mostrare attività sui 5± canali.
+- In alternativa on_events(ev): array EVENT_DTYPE (cw/events.py) con
+  (istante, tipo, filo, valore), una chiamata per lotto invece di una per
+  evento. Filo centrale: un array per elemento (fronte + mark/space, e
+  l'elemento del mark precedente). Laterali: un array per giro di select
+  (fronti e tempi di tutti i pacchetti letti) e uno per passo di
+  decadimento (fronti spenti + envelope vivi, costruito vettoriale).
+  Niente livello S-meter a 60 Hz: si ricava dai fronti EV_CENTER_KEY.
+  Un array contiene eventi del filo centrale oppure dei laterali, mai
+  entrambi. Con on_events le callback singole non vengono chiamate.
+
+- Laterali: stima envelope/burst per mostrare attività sui ±span canali.
+  Prontezza dei socket con selectors (epoll/kqueue: niente limite dei 1024
+  fd di select), stato per filo in array NumPy indicizzati per slot:
+  decadimento dell'envelope e timeout dei burst sono una sola operazione
+  vettoriale per tutti i fili.
 """
 
-import socket, struct, threading, time, select
-from time import perf_counter, sleep
+import socket, struct, threading, time, select, selectors
+import numpy as np
+from time import sleep
 from collections import deque
 
+from cw.speed_change import SpeedChangeDetector
+from cw.events import (EVENT_DTYPE, make_events, EV_ENV, EV_KEY, EV_CENTER_KEY, EV_MARK,
+                       EV_SPACE, EV_SEQ, EV_TIMING, EV_ELEM)
+from cw import clock
+
 DIS = 2; DAT = 3; CON = 4
 
 def _clean_host(h: str) -> str:
@@ -31,10 +53,13 @@ def wires_around(center: int, span: int = 5):
 
 # ─────────────────────────────────────────────────────────────────────────────
 class TimingPlayer:
-    """Riproduce una lista di durate (+mark / -space) e genera fronti + callback."""
+    """
+    Riproduce una lista di durate (+mark / -space) e genera fronti + callback.
+    Con on_batch: una chiamata per elemento con [(tipo, valore)] e nessun livello.
+    """
     def __init__(self, on_key, on_elem, on_level,
                  on_mark_ms=None, on_space_ms=None,
-                 get_dot_est=None):
+                 get_dot_est=None, on_batch=None):
         self._q = deque()
         self._stop = threading.Event()
         self._thr  = None
@@ -45,6 +70,7 @@ class TimingPlayer:
         self._on_mark_ms = on_mark_ms
         self._on_space_ms= on_space_ms
         self._get_dot    = get_dot_est or (lambda: 0.06)
+        self._on_batch   = on_batch
 
         self._gate_on = False
 
@@ -62,18 +88,20 @@ class TimingPlayer:
         self._thr = None
         if self._gate_on:
             self._gate_on = False
-            try: self._on_key(False)
-            except: pass
+            if self._on_batch: self._on_batch([(EV_CENTER_KEY, 0.0)])
+            else:
+                try: self._on_key(False)
+                except: pass
 
     def clear(self): self._q.clear()
     def enqueue(self, seq_ms):
         if seq_ms: self._q.append(list(seq_ms))
 
     def _sleep_emit_level(self, ms):
-        end = perf_counter() + (ms/1000.0)
-        next_emit = perf_counter()
+        end = clock.now() + (ms/1000.0)
+        next_emit = clock.now()
         while True:
-            now = perf_counter()
+            now = clock.now()
             if now >= end: break
             if now >= next_emit:
                 try: self._on_level(1.0 if self._gate_on else 0.0, 0.0)
@@ -83,11 +111,18 @@ class TimingPlayer:
             if remain > 0.006: sleep(0.004)
             elif remain > 0.0: sleep(remain)
 
+    def _sleep_until(self, end):
+        while not self._stop.is_set():
+            remain = end - clock.now()
+            if remain <= 0.0: break
+            sleep(0.004 if remain > 0.006 else remain)
+
     def _run(self):
-        idle_emit = perf_counter()
+        if self._on_batch: return self._run_batch()
+        idle_emit = clock.now()
         while not self._stop.is_set():
             if not self._q:
-                now = perf_counter()
+                now = clock.now()
                 if now - idle_emit >= 0.05:
                     try: self._on_level(0.0, 0.0)
                     except: pass
@@ -128,13 +163,125 @@ class TimingPlayer:
                         except: pass
                     self._sleep_emit_level(sp_ms)
 
+    def _run_batch(self):
+        while not self._stop.is_set():
+            if not self._q:
+                sleep(0.002); continue
+            seq = self._q.popleft()
+            end = clock.now(); elem = None
+            for v in seq:
+                if self._stop.is_set(): break
+                if v == 0: continue
+                recs = [elem] if elem else []; elem = None
+                if v > 0:
+                    if not self._gate_on:
+                        self._gate_on = True; recs.append((EV_CENTER_KEY, 1.0))
+                    recs.append((EV_MARK, float(v)))
+                    dot = max(0.02, min(0.20, float(self._get_dot())))
+                    elem = (EV_ELEM, 0.0 if v/1000.0 < 2.5 * dot else 1.0)
+                else:
+                    if self._gate_on:
+                        self._gate_on = False; recs.append((EV_CENTER_KEY, 0.0))
+                    recs.append((EV_SPACE, float(-v)))
+                try: self._on_batch(recs)
+                except: pass
+                end += abs(v) / 1000.0          # durate sommate: nessuna deriva tra elementi
+                self._sleep_until(end)
+            if elem:
+                try: self._on_batch([elem])
+                except: pass
+
 # ─────────────────────────────────────────────────────────────────────────────
+# ───────── parsing dei tempi
+def _detect_timings(data: bytes):
+    """
+    Ricerca completa del blocco tempi: offset 2..18, int16 e int32, finestre
+    di 2..16 valori plausibili (2..4000 ms, mai due uguali di fila, inizio
+    con un mark); vince la più alternata e "magra".
+    Ritorna (seq, offset in byte del tratto plausibile che la contiene, dtype) o None.
+    """
+    if not data or len(data) < 8: return None
+    if struct.unpack_from('<H', data, 0)[0] != DAT: return None
+    best = None; best_sc = 0.0; seen = set()
+    for step, dt in ((2, '<i2'), (4, '<i4')):
+        for off in range(2, min(20, len(data)-4), 2):
+            n = (len(data)-off)//step
+            if n < 2: continue
+            v = np.frombuffer(data, dtype=dt, count=n, offset=off)
+            a = np.abs(v.astype(np.int64))
+            ok = (a >= 2) & (a <= 4000)
+            # tratti plausibili: le finestre valide stanno tutte dentro un tratto
+            brk = v[1:] == v[:-1]
+            st = ok.copy(); st[1:] &= ~ok[:-1] | brk
+            en = ok.copy(); en[:-1] &= ~ok[1:] | brk
+            for r0, r1 in zip(np.flatnonzero(st).tolist(), (np.flatnonzero(en) + 1).tolist()):
+                base = off + r0*step
+                if r1 - r0 < 2 or (step, base) in seen: continue     # stesso tratto da un altro offset
+                seen.add((step, base))
+                vl = v[r0:r1].tolist(); L = len(vl)
+                for i in range(L - 1):
+                    if vl[i] <= 0: continue
+                    tot = vl[i]; alt = 0
+                    for j in range(i + 1, min(L, i + 16)):
+                        tot += abs(vl[j]); alt += (vl[j] > 0) != (vl[j-1] > 0)
+                        sc = alt*10 - tot/50.0 - abs(j - i - 5)
+                        if best is None or sc > best_sc:
+                            best = (vl[i:j+1], base, dt); best_sc = sc
+    return best
+
+class TimingLayout:
+    """
+    Blocco tempi nei pacchetti DAT di un filo. Si cerca con _detect_timings
+    al primo pacchetto (e dopo MISS pacchetti di fila senza tempi); poi ogni
+    pacchetto è un solo struct.unpack_from dall'offset noto, dal primo mark
+    fino al primo valore non plausibile. Una ricerca andata a vuoto non si ripete
+    per i MISS pacchetti successivi: un filo senza tempi non costa la
+    ricerca a ogni pacchetto.
+    """
+    MISS = 8
+    __slots__ = ("off", "dtype", "miss", "skip")
+
+    def __init__(self):
+        self.off = -1; self.dtype = None; self.miss = 0; self.skip = 0
+
+    def timings(self, data: bytes):
+        if self.off >= 0:
+            seq = self._decode(data)
+            if seq:
+                self.miss = 0; return seq
+            self.miss += 1
+            if self.miss < self.MISS: return None
+            self.off = -1
+        if self.skip:
+            self.skip -= 1; return None
+        found = _detect_timings(data)
+        if found is None:
+            self.skip = self.MISS; return None
+        seq, self.off, self.dtype = found; self.miss = 0
+        # la finestra della ricerca è di 16 valori al più: il blocco intero dal layout
+        return self._decode(data) or seq
+
+    def _decode(self, data: bytes):
+        if len(data) < 8 or struct.unpack_from('<H', data, 0)[0] != DAT: return None
+        step = 2 if self.dtype == '<i2' else 4
+        n = (len(data) - self.off)//step
+        if n < 2: return None
+        vals = struct.unpack_from('<%d%s' % (n, 'h' if step == 2 else 'i'), data, self.off)
+        i = None; prev = 0; end = n
+        for k, x in enumerate(vals):
+            if not 2 <= abs(x) <= 4000 or x == prev:
+                end = k; break
+            if i is None and x > 0: i = k
+            prev = x
+        return list(vals[i:end]) if i is not None and end - i >= 2 else None
+
 class CWComClient:
     def __init__(self, host: str, center_wire: int,
                  on_env=None, on_key=None,
                  on_center_level=None, on_center_element=None,
                  on_center_keying=None,
                  on_center_mark_ms=None, on_center_space_ms=None,
+                 on_timings=None, on_events=None,
                  span=5, audio=False, callsign="TWI Client", version="TWI CWCom 4.3"):
         self.host   = _clean_host(host); self.port = 7890
         self._span  = max(0, int(span))
@@ -147,6 +294,8 @@ class CWComClient:
         self.on_center_keying  = on_center_keying
         self.on_center_mark_ms  = on_center_mark_ms
         self.on_center_space_ms = on_center_space_ms
+        self.on_timings = on_timings            # (wire, seq_ms) tempi dei laterali
+        self.on_events  = on_events             # (array EVENT_DTYPE) al posto delle callback singole
 
         self.callsign = callsign or "TWI Client"
         self.version  = version  or "TWI CWCom 4.3"
@@ -158,21 +307,30 @@ class CWComClient:
 
         self._scan_wires = wires_around(self._center, self._span)
         self.scan_socks = {}
-        self._s2wire    = {}
         self._scan_thr  = None
+        self._sel       = selectors.DefaultSelector()
+        self._scan_lock = threading.Lock()
 
         self._hb_thr = None
 
-        self._env        = {w: 0.0 for w in self._scan_wires}
+        # stato laterali per slot (un slot per filo scansionato)
+        n = 2*self._span + 1
+        self._slot_wire  = np.full(n, -1, dtype=np.int64)
+        self._wire_slot  = {}
+        self._env        = np.zeros(n, dtype=np.float64)
         self._env_decay  = 0.92
-        self._key_on     = {w: False for w in self._scan_wires}
-        self._last_dat   = {w: 0.0   for w in self._scan_wires}
+        self._env_live   = np.zeros(n, dtype=bool)     # env ancora da notificare
+        self._key_on     = np.zeros(n, dtype=bool)
+        self._last_dat   = np.zeros(n, dtype=np.float64)
+        self._layout     = [TimingLayout() for _ in range(n)]
 
         # fallback (per-arrival)
         self._c_on   = False
         self._c_last = 0.0
         self._c_start= 0.0
         self._dot_est = 0.060
+        self._speed   = SpeedChangeDetector(dit_min=0.028)
+        self._c_layout = TimingLayout()
 
         # player tempi
         self._player = TimingPlayer(
@@ -181,7 +339,8 @@ class CWComClient:
             on_level = lambda lv, ov: self._emit_center_level(lv, ov),
             on_mark_ms  = (lambda ms: self._emit_center_mark_ms(ms)) if on_center_mark_ms else None,
             on_space_ms = (lambda ms: self._emit_center_space_ms(ms)) if on_center_space_ms else None,
-            get_dot_est = lambda: self._dot_est
+            get_dot_est = lambda: self._dot_est,
+            on_batch    = self._emit_center_batch if on_events else None
         )
 
     def start(self):
@@ -214,10 +373,9 @@ class CWComClient:
         except: pass
         self.center_sock = None
 
-        for w, s in list(self.scan_socks.items()):
-            try: s.close()
-            except: pass
-        self.scan_socks.clear(); self._s2wire.clear()
+        with self._scan_lock:
+            for w in list(self.scan_socks):
+                self._close_scan_socket(w)
 
         self._player.stop()
 
@@ -228,25 +386,23 @@ class CWComClient:
         new_set = set(wires_around(self._center, self._span))
         old_set = set(self._scan_wires)
         self._scan_wires = list(sorted(new_set))
-        for w in list(old_set - new_set):
-            try:
-                s = self.scan_socks.pop(w, None)
-                if s:
-                    self._s2wire.pop(s.fileno(), None)
-                    s.close()
-            except: pass
-        self._open_scan_sockets([w for w in self._scan_wires if w not in old_set])
-        for d in (self._env, self._key_on, self._last_dat):
-            for w in list(d.keys()):
-                if w not in new_set: d.pop(w, None)
-            for w in new_set:
-                d.setdefault(w, 0.0 if d is not self._key_on else False)
+        if self.scan_socks or self._scan_thr:
+            with self._scan_lock:
+                for w in old_set - new_set:
+                    self._close_scan_socket(w)
+            self._open_scan_sockets([w for w in self._scan_wires if w not in old_set])
         self._reopen_center_socket(self._center)
+        self._c_layout = TimingLayout()
         self._c_last = self._c_start = 0.0
         self._c_on = False
+        self._speed.reset()
         self._player.clear()
         self._emit_center_key(False)
 
+    def seed_dot_est(self, dot: float):
+        """Dot iniziale del filo centrale (avvio a caldo dalla cache per filo)."""
+        self._dot_est = max(0.028, min(0.320, float(dot)))
+
     def set_volume(self, vol: int): pass
 
     # ───────── sockets
@@ -281,8 +437,28 @@ class CWComClient:
                 s.sendto(struct.pack('<HH', CON, w), (self.host, self.port))
                 self._send_ident(s, self.callsign, self.version)
             except: pass
-            self.scan_socks[w] = s
-            try: self._s2wire[s.fileno()] = w
+            with self._scan_lock:
+                free = np.flatnonzero(self._slot_wire < 0)
+                if not free.size:
+                    s.close(); continue
+                k = int(free[0])
+                self._slot_wire[k] = w; self._wire_slot[w] = k
+                self._env[k] = 0.0; self._env_live[k] = False
+                self._key_on[k] = False; self._last_dat[k] = 0.0
+                self._layout[k] = TimingLayout()
+                self.scan_socks[w] = s
+                self._sel.register(s, selectors.EVENT_READ, (w, k))
+
+    def _close_scan_socket(self, w):
+        """Chiude il socket del filo e libera lo slot (con _scan_lock preso)."""
+        s = self.scan_socks.pop(w, None)
+        k = self._wire_slot.pop(w, None)
+        if k is not None:
+            self._slot_wire[k] = -1; self._key_on[k] = False; self._env_live[k] = False
+        if s:
+            try: self._sel.unregister(s)
+            except: pass
+            try: s.close()
             except: pass
 
     def _send_ident(self, sock, stn_id, stn_ver):
@@ -296,60 +472,6 @@ class CWComClient:
         try: sock.sendto(bytes(pkt), (self.host, self.port))
         except: pass
 
-    # ───────── parsing dei tempi
-    def _extract_timings_ms(self, data: bytes):
-        """Prova vari offset e formati (int16/int32). Scarta sequenze non plausibili."""
-        if not data or len(data) < 8: return None
-        try:
-            cmd = struct.unpack_from('<H', data, 0)[0]
-            if cmd != DAT: return None
-        except: return None
-
-        cands = []
-
-        def ok_seq(seq):
-            # alternanza prevalente +/-, durate 2..4000 ms, lunghezza 2..32
-            if not seq or len(seq) < 2 or len(seq) > 32: return False
-            prev = 0
-            pos = neg = 0
-            for v in seq:
-                a = abs(v)
-                if a < 2 or a > 4000: return False
-                if v > 0: pos += 1
-                if v < 0: neg += 1
-                if v == prev: return False
-                prev = v
-            if pos == 0: return False
-            # deve iniziare normalmente con un mark
-            if seq[0] < 0: return False
-            return True
-
-        # prova finestre a passi di 2 byte (16 bit) e 4 byte (32 bit)
-        for step,fmt in ((2,'h'), (4,'i')):
-            for off in range(2, min(20, len(data)-4), 2):
-                n = (len(data)-off)//step
-                if n <= 0: continue
-                try:
-                    arr = list(struct.unpack_from('<'+fmt*n, data, off))
-                except: continue
-                # scorri finestre 2..16 elem
-                N = len(arr)
-                for i in range(0, N-1):
-                    for j in range(i+2, min(N, i+16)+1):
-                        seq = arr[i:j]
-                        if ok_seq(seq):
-                            cands.append(seq)
-
-        if not cands: return None
-        # scegli la più "magra" e coerente
-        def score(s):
-            # preferisci durate totali più brevi e alternanza più regolare
-            tot = sum(abs(x) for x in s)
-            alt = sum(1 for a,b in zip(s, s[1:]) if (a>0) != (b>0))
-            return (alt*10) - (tot/50.0) - abs(len(s)-6)
-        best = max(cands, key=score)
-        return best
-
     # ───────── RX centro
     def _rx_center_loop(self):
         while not self._stop.is_set():
@@ -362,8 +484,13 @@ class CWComClient:
             except: continue
             if not data or len(data) < 4: continue
 
-            seq = self._extract_timings_ms(data)
+            seq = self._c_layout.timings(data)
             if seq:
+                # cambio stazione: riaggancia subito il dot stimato
+                for v in seq:
+                    dur = abs(v)/1000.0
+                    new_dot = self._speed.mark(dur, self._dot_est) if v > 0 else self._speed.space(dur, self._dot_est)
+                    if new_dot is not None: self._dot_est = new_dot
                 # aggiorna dot stimato dal mark più corto
                 try:
                     marks = [x for x in seq if x > 0]
@@ -376,7 +503,7 @@ class CWComClient:
                 continue
 
             # fallback per-arrival (gating con timeout su dot stimato)
-            now = perf_counter()
+            now = clock.now()
             if not self._c_on:
                 self._c_on = True; self._c_start = now
                 self._emit_center_key(True)
@@ -389,23 +516,23 @@ class CWComClient:
                 except (BlockingIOError, InterruptedError): break
                 except: break
                 if not data2: break
-                self._c_last = perf_counter(); drained += 1
+                self._c_last = clock.now(); drained += 1
 
             thr_off = max(0.04, min(0.25, 1.1 * self._dot_est))
-            end = perf_counter() + thr_off
-            while perf_counter() < end:
+            end = clock.now() + thr_off
+            while clock.now() < end:
                 try: r2, _, _ = select.select([self.center_sock], [], [], 0.001)
                 except: r2=[]
                 if r2:
                     try: data3, _ = self.center_sock.recvfrom(1024)
                     except: data3 = None
                     if data3:
-                        self._c_last = perf_counter()
+                        self._c_last = clock.now()
                         end = self._c_last + thr_off
                 else:
                     sleep(0.0006)
 
-            if self._c_on and (perf_counter() - self._c_last) >= thr_off:
+            if self._c_on and (clock.now() - self._c_last) >= thr_off:
                 self._c_on = False
                 self._emit_center_key(False)
                 # classifica il simbolo in base alla durata ON
@@ -415,54 +542,100 @@ class CWComClient:
 
     # ───────── laterali (envelope/burst)
     def _scan_loop(self):
-        last_decay = perf_counter()
+        last_decay = clock.now()
         while not self._stop.is_set():
-            now = perf_counter()
+            now = clock.now()
             if now - last_decay >= 0.016:
-                for w in list(self._env.keys()):
-                    self._env[w] *= self._env_decay
-                    if self._key_on.get(w, False) and (now - self._last_dat.get(w, 0.0)) > 0.20:
-                        self._key_on[w] = False
-                        if self.on_key:
-                            try: self.on_key(int(w), False)
-                            except: pass
-                if self.on_env:
-                    for w, env in self._env.items():
-                        try: self.on_env(w, float(env))
-                        except: pass
+                self._scan_decay(now)
                 last_decay = now
 
             if not self.scan_socks:
                 time.sleep(0.01); continue
 
-            try: rlist, _, _ = select.select(list(self.scan_socks.values()), [], [], 0.003)
-            except: rlist = []
-            for s in rlist:
-                try: w = self._s2wire.get(s.fileno(), None)
-                except: w = None
-                if w is None: continue
+            try: events = self._sel.select(0.003)
+            except: events = []
+            batch = [] if self.on_events else None
+            for key, _ in events:
+                w, k = key.data
+                s = key.fileobj
                 drain = 0
                 while drain < 6:
                     try: data, _ = s.recvfrom(600)
                     except (BlockingIOError, InterruptedError): break
                     except: break
                     if not data: break
-                    tnow = perf_counter()
-                    prev = self._last_dat.get(w, 0.0)
-                    is_burst = (prev > 0.0) and ((tnow - prev) < 0.12)
-                    if is_burst:
-                        self._env[w] = min(1.0, 0.7*self._env[w] + 0.45)
-                        if not self._key_on.get(w, False):
-                            self._key_on[w] = True
-                            if self.on_key:
-                                try: self.on_key(int(w), True)
-                                except: pass
-                    else:
-                        self._env[w] = min(1.0, 0.9*self._env[w] + 0.01)
-                    self._last_dat[w] = tnow
+                    with self._scan_lock:
+                        if self._slot_wire[k] != w: break      # filo appena rimosso
+                        tnow = clock.now()
+                        prev = self._last_dat[k]
+                        is_burst = (prev > 0.0) and ((tnow - prev) < 0.12)
+                        went_on = is_burst and not self._key_on[k]
+                        if is_burst:
+                            self._env[k] = min(1.0, 0.7*self._env[k] + 0.45)
+                            self._key_on[k] = True
+                        else:
+                            self._env[k] = min(1.0, 0.9*self._env[k] + 0.01)
+                        self._env_live[k] = True
+                        self._last_dat[k] = tnow
+                    if batch is not None:
+                        if went_on: batch.append((tnow, EV_KEY, w, 1.0))
+                        seq = self._layout[k].timings(data)
+                        if seq:
+                            batch.append((tnow, EV_SEQ, w, len(seq)))
+                            batch.extend((tnow, EV_TIMING, w, v) for v in seq)
+                        drain += 1; continue
+                    if went_on and self.on_key:
+                        try: self.on_key(int(w), True)
+                        except: pass
+                    if self.on_timings:
+                        seq = self._layout[k].timings(data)
+                        if seq:
+                            try: self.on_timings(int(w), seq)
+                            except: pass
                     drain += 1
+            if batch:
+                try: self.on_events(np.array(batch, dtype=EVENT_DTYPE))
+                except: pass
             time.sleep(0.001)
 
+    def _scan_decay(self, now: float):
+        """Decadimento envelope + timeout burst su tutti gli slot in un passo."""
+        off = live = ()
+        with self._scan_lock:
+            self._env *= self._env_decay
+            if self._key_on.any():
+                off = np.flatnonzero(self._key_on & ((now - self._last_dat) > 0.20))
+                self._key_on[off] = False
+                off_w = self._slot_wire[off]
+            # notifica solo gli env vivi; quelli appena spenti una volta con 0
+            if self._env_live.any():
+                live = np.flatnonzero(self._env_live)
+                dead = live[self._env[live] < 1e-3]
+                self._env[dead] = 0.0; self._env_live[dead] = False
+                env_w = self._slot_wire[live]; env_v = self._env[live]
+        if not (len(off) or len(live)):
+            return
+        if self.on_events:
+            n = len(off); ev = np.empty(n + len(live), dtype=EVENT_DTYPE)
+            ev["t"] = now
+            ev["kind"][:n] = EV_KEY; ev["kind"][n:] = EV_ENV
+            ev["value"][:n] = 0.0
+            if n: ev["wire"][:n] = off_w
+            if len(live): ev["wire"][n:] = env_w; ev["value"][n:] = env_v
+            try: self.on_events(ev)
+            except: pass
+            return
+        off_w = off_w.tolist() if len(off) else ()
+        env_w, env_v = (env_w.tolist(), env_v.tolist()) if len(live) else ((), ())
+        if self.on_key:
+            for w in off_w:
+                try: self.on_key(w, False)
+                except: pass
+        if self.on_env:
+            for w, env in zip(env_w, env_v):
+                try: self.on_env(w, env)
+                except: pass
+
     def _heartbeat_loop(self):
         while not self._stop.is_set():
             time.sleep(25.0)
@@ -471,6 +644,7 @@ class CWComClient:
                     self.center_sock.sendto(struct.pack('<HH', CON, self._center), (self.host, self.port))
                     self._send_ident(self.center_sock, self.callsign, self.version)
                 for w, s in list(self.scan_socks.items()):
+                    if self._stop.is_set(): break
                     try:
                         s.sendto(struct.pack('<HH', CON, w), (self.host, self.port))
                         self._send_ident(s, self.callsign, self.version)
@@ -478,12 +652,22 @@ class CWComClient:
             except: pass
 
     # ───────── emit
+    def _emit_center_batch(self, recs):
+        """recs = [(tipo, valore)] del filo centrale, stesso istante."""
+        w = self._center
+        try: self.on_events(make_events(clock.now(), [(k, w, v) for k, v in recs]))
+        except: pass
+
     def _emit_center_key(self, on: bool):
+        if self.on_events:
+            return self._emit_center_batch([(EV_CENTER_KEY, 1.0 if on else 0.0)])
         if self.on_center_keying:
             try: self.on_center_keying(bool(on))
             except: pass
 
     def _emit_center_elem(self, sym: str):
+        if self.on_events:
+            return self._emit_center_batch([(EV_ELEM, 0.0 if sym == '.' else 1.0)])
         if self.on_center_element:
             try: self.on_center_element(sym)
             except: pass
@@ -0,0 +1,22 @@
+# tests/morse_keying.py
+"""Fronti sintetici (istante, tasto giù) per un testo a una data velocità."""
+import random
+
+from app.decoder.morse_decoder import MORSE_TO_ASCII
+
+CODE = {c: k for k, c in MORSE_TO_ASCII.items()}
+
+def keying(text: str, wpm: float, t0: float = 0.0, jitter: float = 0.0, seed: int = 1):
+    """Ritorna (fronti, t_fine); jitter = deviazione relativa uniforme di ogni durata."""
+    rnd = random.Random(seed)
+    u = 1.2 / wpm
+    j = lambda d: d * (1.0 + rnd.uniform(-jitter, jitter))
+    t = t0; out = []
+    for wi, word in enumerate(text.split()):
+        if wi: t += j(7 * u)
+        for ci, ch in enumerate(word):
+            if ci: t += j(3 * u)
+            for ei, s in enumerate(CODE[ch]):
+                if ei: t += j(u)
+                out.append((t, True)); t += j(u if s == '.' else 3 * u); out.append((t, False))
+    return out, t
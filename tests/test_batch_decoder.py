@@ -0,0 +1,63 @@
+# tests/test_batch_decoder.py
+"""Decodifica batch: testo e tempi per carattere su keying sintetico, velocità rispetto a key_edge."""
+import random, time
+
+import numpy as np
+
+from app.decoder.batch_decoder import decode_durations
+from app.decoder.morse_decoder import AdaptiveDecoder
+from morse_keying import CODE, keying
+
+ALNUM = [c for c in CODE if c.isalnum()]
+
+def words(n, seed):
+    r = random.Random(seed)
+    return " ".join("".join(r.choice(ALNUM) for _ in range(r.randint(2, 6))) for _ in range(n))
+
+def signed(edges):
+    """Fronti -> durate con segno (s) e istante del primo mark."""
+    t = np.array([e[0] for e in edges]); d = np.diff(t); d[1::2] *= -1
+    return d, t[0]
+
+def expected_times(text, edges):
+    """Inizio del primo mark di ogni lettera; per lo spazio, la fine dell'ultimo mark."""
+    out = []; k = 0
+    for ch in text:
+        if ch == " ": out.append(edges[2*k - 1][0])
+        else: out.append(edges[2*k][0]); k += len(CODE[ch])
+    return np.array(out)
+
+def test_text_and_times_with_jitter_and_speed_change():
+    a, b = words(80, 1), words(80, 2)
+    e1, t1 = keying(a, 18, t0=50.0, jitter=0.1, seed=3)
+    e2, _ = keying(b, 30, t0=t1 + 7 * 1.2/18, jitter=0.1, seed=4)          # da 18 a 30 WPM
+    edges = e1 + e2; text = a + " " + b
+    d, t0 = signed(edges)
+    got, ts = decode_durations(d, t0=t0)
+    assert len(got) == len(text) and len(ts) == len(got)
+    wrong = [i for i, (x, y) in enumerate(zip(got, text)) if x != y]
+    # solo il blocco a cavallo del cambio di velocità può sbagliare, e al più una lettera
+    assert len(wrong) <= 1 and all(abs(i - len(a)) < 40 for i in wrong)
+    assert np.allclose(ts, expected_times(text, edges), atol=1e-9)
+
+def test_glitches_and_leading_space():
+    e, _ = keying("PARIS PARIS", 20, t0=10.0)
+    d, t0 = signed(e)
+    d = np.r_[-0.8, d[:3], 0.002, -0.001, d[3:]]     # space iniziale e glitch di 2 ms dentro la P
+    got, ts = decode_durations(d, t0=t0)             # t0 = primo mark: lo space iniziale si scarta
+    assert got == "PARIS PARIS" and abs(ts[0] - t0) < 1e-9
+
+def test_faster_than_key_edge():
+    r = random.Random(5); edges = []; t = 0.0
+    while len(edges) < 200_000:
+        e, t = keying(words(40, r.random()), r.uniform(15, 40), t0=t + 0.5, jitter=0.05, seed=r.randint(0, 10**6))
+        edges += e
+    d, t0 = signed(edges)
+    tb = 1e9
+    for _ in range(3):
+        s = time.perf_counter(); decode_durations(d, t0=t0); tb = min(tb, time.perf_counter() - s)
+    dec = AdaptiveDecoder(on_text=lambda s: None)
+    s = time.perf_counter()
+    for tt, on in edges: dec.key_edge(on, tt)
+    tk = time.perf_counter() - s
+    assert tk / tb > 10                              # misurato ~20-30x su un core
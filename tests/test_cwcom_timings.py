@@ -0,0 +1,76 @@
+import struct, time
+
+import cwcom_client
+from cwcom_client import DAT, TimingLayout, _detect_timings
+
+def kob(codes, ident="IZ6ABC"):
+    """Pacchetto DAT CWCom/MorseKOB: code[51] int32 a 152, n a 356."""
+    pkt = bytearray(496)
+    struct.pack_into('<HH', pkt, 0, DAT, 492)
+    pkt[4:4+len(ident)] = ident.encode()
+    struct.pack_into(f'<{len(codes)}i', pkt, 152, *codes)
+    struct.pack_into('<i', pkt, 356, len(codes))
+    return bytes(pkt)
+
+def short(seq):
+    """Tempi int16 subito dopo l'intestazione (server di prova)."""
+    return struct.pack('<HH', DAT, 0) + struct.pack(f'<{len(seq)}h', *seq) + b'\0'*8
+
+PARIS = [60, -60, 180, -60, 180, -60, 60, -180, 60, -60, 180]
+
+def test_detect_kob_and_short_layouts():
+    seq, off, dt = _detect_timings(kob([-900] + PARIS))
+    assert (seq, off, dt) == (PARIS, 152, '<i4')      # il blocco parte dallo space iniziale
+    seq, off, dt = _detect_timings(short(PARIS[:6]))
+    assert (seq, off, dt) == (PARIS[:6], 4, '<i2')
+    assert _detect_timings(struct.pack('<HH', 4, 133)) is None
+    assert _detect_timings(kob([])) is None
+
+def test_cached_layout_decodes_every_packet(monkeypatch):
+    calls = []
+    def spy(data):
+        calls.append(1); return _detect_timings(data)
+    monkeypatch.setattr(cwcom_client, "_detect_timings", spy)
+    lay = TimingLayout()
+    assert lay.timings(kob([-700, 50, -50, 150])) == [50, -50, 150]
+    for k in range(2, 30):
+        codes = [-400] + [50 + k, -(50 + k), 150 + k, -(50 + k)] * 3
+        assert lay.timings(kob(codes)) == codes[1:]
+    assert len(calls) == 1
+    # pacchetto senza tempi (ident): None, nessuna nuova ricerca
+    assert lay.timings(kob([], ident="TWI Client")) is None
+    assert len(calls) == 1
+
+def test_first_packet_keeps_the_whole_block():
+    codes = [-800] + [60, -60, 180, -60]*10          # 40 tempi, oltre la finestra di 16
+    lay = TimingLayout()
+    assert lay.timings(kob(codes)) == codes[1:]
+    assert lay.timings(kob(codes)) == codes[1:]
+    # anche dopo un riapprendimento (altro formato)
+    for _ in range(TimingLayout.MISS - 1):
+        assert lay.timings(short(codes[1:])) is None
+    assert lay.timings(short(codes[1:])) == codes[1:]
+
+def test_relearn_after_misses_and_skip_after_failed_search(monkeypatch):
+    calls = []
+    def spy(data):
+        calls.append(1); return _detect_timings(data)
+    monkeypatch.setattr(cwcom_client, "_detect_timings", spy)
+    lay = TimingLayout()
+    assert lay.timings(kob(PARIS)) == PARIS
+    # il filo passa a un altro formato: dopo MISS pacchetti si cerca di nuovo
+    got = [lay.timings(short(PARIS[:6])) for _ in range(TimingLayout.MISS)]
+    assert got[:-1] == [None]*(TimingLayout.MISS - 1) and got[-1] == PARIS[:6]
+    assert lay.off == 4 and len(calls) == 2
+    # filo senza tempi: una ricerca ogni MISS+1 pacchetti, non a ogni pacchetto
+    lay = TimingLayout(); calls.clear()
+    for _ in range(3*(TimingLayout.MISS + 1)):
+        assert lay.timings(struct.pack('<HH', DAT, 0) + b'\0'*40) is None
+    assert len(calls) == 3
+
+def test_cost_per_packet():
+    pkts = [kob([-500] + [60 + k % 7, -60, 180, -60]*4) for k in range(300)]
+    lay = TimingLayout(); lay.timings(pkts[0])
+    t = time.perf_counter()
+    for p in pkts: assert lay.timings(p)
+    assert (time.perf_counter() - t)/len(pkts) < 100e-6      # era ~20 ms a pacchetto
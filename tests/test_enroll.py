@@ -0,0 +1,39 @@
+# tests/test_enroll.py
+"""Registrazione del fist dal motore: indice salvato e riconosciuto da un classificatore nuovo."""
+import random, time
+
+from app import settings
+from cw.events import make_events, EV_MARK, EV_SPACE
+from cw.fist_index import FistIndex
+from cw.sender_classifier import SenderClassifier
+
+def fist_events(seed=3):
+    r = random.Random(seed); recs = []
+    for _ in range(30):                          # "A N" a 20 WPM, peso leggermente pesante
+        for m in (66, 180, 66):
+            recs.append((EV_MARK, 133, m * r.uniform(.98, 1.02))); recs.append((EV_SPACE, 133, 54 * r.uniform(.98, 1.02)))
+        recs.append((EV_SPACE, 133, 190))
+    return make_events(1000.0, recs)
+
+def test_enroll_saves_operator_index(tmp_path, monkeypatch):
+    db = tmp_path / "operators.json"
+    monkeypatch.setattr(settings, "OPERATORS_DB", str(db))
+    monkeypatch.setattr(settings, "ARCHIVE", False)
+    monkeypatch.setattr(settings, "WARM_START", False)
+    monkeypatch.setattr(settings, "KEY_PORT", "")
+    from app.engine import Engine
+    titles = []
+    eng = Engine("IZ0TEST", on_title=titles.append)
+    eng.enroll("ik1ab")                          # ancora nessun dato: rifiutato
+    eng.worker.submit(fist_events())
+    eng.enroll("ik1ab")
+    deadline = time.time() + 2
+    while not db.exists() and time.time() < deadline: time.sleep(0.01)
+    eng.close()
+    assert any("insufficiente" in t for t in titles)
+    assert any("IK1AB registrato" in t for t in titles)
+
+    c = SenderClassifier(index=FistIndex.load(str(db)))
+    for _, k, _, v in fist_events(seed=9).tolist():
+        (c.update_mark_ms if k == EV_MARK else c.update_space_ms)(v)
+    assert c.get_operator() and c.get_operator()[0] == "IK1AB"
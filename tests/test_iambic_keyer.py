@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from cw import clock
+from cw.iambic_keyer import DIT, IambicCore, IambicKeyer
+
+def play(core, events, t_end):
+    """events: [(t, dit, dah)] in ordine. Ritorna i fronti (t, on) fino a t_end."""
+    out = []
+    for t, dit, dah in events:
+        out += core.advance(t)
+        out += core.paddle(dit, dah, t)
+    out += core.advance(t_end)
+    return out
+
+def elements(edges, unit):
+    marks = [(t1 - t0) for (t0, a), (t1, b) in zip(edges[::2], edges[1::2])]
+    assert all(a for _, a in edges[::2]) and not any(b for _, b in edges[1::2])
+    return "".join("." if m < 2*unit else "-" for m in marks)
+
+@pytest.mark.parametrize("wpm", [40, 60])
+def test_elements_on_absolute_grid(wpm):
+    core = IambicCore(wpm); u = 1.2/wpm; t0 = 12.345
+    # chiamate in ritardo e irregolari: i fronti restano sulla griglia
+    ev = [(t0, True, False)] + [(t0 + k*0.37*u, True, False) for k in range(1, 2000)]
+    edges = play(core, ev, t0 + 2000*0.37*u)
+    starts = [t for t, on in edges if on]; ends = [t for t, on in edges if not on]
+    assert len(starts) > 300
+    for n, (s, e) in enumerate(zip(starts, ends)):
+        assert s == pytest.approx(t0 + 2*n*u, abs=1e-12)
+        assert e - s == pytest.approx(u, abs=1e-12)
+    core = IambicCore(wpm)
+    edges = play(core, [(0.0, False, True)], 39.5*u)
+    assert [t for t, on in edges if on] == pytest.approx([4*n*u for n in range(10)], abs=1e-12)
+    assert elements(edges, u) == "-"*10
+
+@pytest.mark.parametrize("mode, held_10u, released_in_dit", [("A", ".-.-", "."), ("B", ".-.-.", ".-")])
+def test_squeeze(mode, held_10u, released_in_dit):
+    u = 0.03
+    core = IambicCore(40, mode)
+    edges = play(core, [(0.0, True, True), (10*u, False, False)], 40*u)
+    assert elements(edges, u) == held_10u
+    # squeeze lasciato durante il primo punto: premuti insieme o linea 0.2u dopo
+    for dah_at in (0.0, 0.2*u):
+        core = IambicCore(40, mode)
+        ev = [(0.0, True, False), (dah_at, True, True), (0.7*u, False, False)]
+        assert elements(play(core, ev, 20*u), u) == released_in_dit
+
+@pytest.mark.parametrize("mode, tap_in_dah", [("A", "-"), ("B", "-.")])
+def test_memory(mode, tap_in_dah):
+    u = 0.03
+    # punto lasciato, poi linea premuta e lasciata dentro lo stesso punto
+    ev = [(0.0, True, False), (0.5*u, False, False), (0.7*u, False, True), (0.9*u, False, False)]
+    assert elements(play(IambicCore(40, mode), ev, 20*u), u) == ".-"
+    assert elements(play(IambicCore(40, mode, memory=False), ev, 20*u), u) == "."
+    # punto toccato durante una linea lasciata prima della fine: è uno squeeze
+    ev = [(0.0, False, True), (1.0*u, True, True), (1.5*u, False, True), (3.9*u, False, False)]
+    assert elements(play(IambicCore(40, mode), ev, 20*u), u) == tap_in_dah
+    # ... con la linea tenuta oltre la fine esce il punto in entrambi i modi
+    ev = [(0.0, False, True), (1.0*u, True, True), (1.5*u, False, True), (4.5*u, False, False)]
+    assert elements(play(IambicCore(40, mode), ev, 20*u), u) == "-." + ("-" if mode == "B" else "")
+
+def test_weight_moves_mark_not_period():
+    u = 0.03
+    edges = play(IambicCore(40, "B", weight=60), [(0.0, False, True), (7*u, False, False)], 20*u)
+    on = [t for t, o in edges if o]; off = [t for t, o in edges if not o]
+    assert off[0] - on[0] == pytest.approx(3.2*u, abs=1e-12)
+    assert on[1] - on[0] == pytest.approx(4*u, abs=1e-12)
+    edges = play(IambicCore(40, "B", weight=60), [(0.0, True, False), (1.5*u, False, False)], 20*u)
+    assert edges[1][0] - edges[0][0] == pytest.approx(1.2*u, abs=1e-12)
+
+def test_threaded_keyer_lateness():
+    got = []; done = threading.Event()
+    def on_key(on, t):
+        got.append((clock.now(), on, t))
+        if len(got) >= 60: done.set()
+    k = IambicKeyer(on_key, wpm=40, mode="B")
+    try:
+        t0 = clock.now(); k.paddle_edge(DIT, True, t0)
+        assert done.wait(3.0)
+        k.paddle_edge(DIT, False)
+    finally:
+        k.stop()
+    u = 1.2/40
+    starts = [t for _, on, t in got if on]
+    assert starts[:30] == pytest.approx([t0 + 2*n*u for n in range(30)], abs=1e-9)
+    # SPIN_S di attesa attiva prima di ogni scadenza: di norma decine di µs;
+    # il massimo dipende dallo scheduler (una sola CPU condivisa qui)
+    late = sorted(now - t for now, _, t in got)
+    assert late[0] >= 0.0 and late[len(late)//2] < 0.0005 and late[int(0.9*len(late))] < 0.002
+    assert late[-1] < 0.020 and k.late <= late[-1]
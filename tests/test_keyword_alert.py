@@ -0,0 +1,27 @@
+# tests/test_keyword_alert.py
+import pytest
+
+from cw.keyword_alert import KeywordAlert
+
+def hits(terms, text, chunks=1):
+    out = []
+    ka = KeywordAlert(terms, on_match=lambda w, term, ts: out.append(term))
+    step = max(1, len(text) // chunks)
+    for i in range(0, len(text), step): ka.feed(133, text[i:i + step])
+    return out
+
+@pytest.mark.parametrize("text", ["DE IZ6ABC/P K ", "IZ6ABC, ", "QRZ IZ6ABC? ", "IZ6ABC= ", "IZ6ABC□ ", "de iz6abc "])
+def test_punctuation_is_a_word_boundary(text):
+    assert hits(["IZ6ABC"], text) == ["IZ6ABC"]
+
+def test_whole_words_only():
+    assert hits(["IK1AB"], "DE IK1ABC K ") == []
+    assert hits(["IK1AB"], "DE XIK1AB K ") == []
+
+def test_term_with_punctuation_reported_as_written():
+    assert hits(["IZ6ABC/P"], "DE IZ6ABC/P K ") == ["IZ6ABC/P"]
+    assert hits(["CQ DX"], "CQ  DX DE IZ6ABC ", chunks=7) == ["CQ DX"]
+
+def test_stream_split_per_character():
+    text = "CQ CQ DE IZ6ABC/QRP SOS? "
+    assert hits(["SOS", "IZ6ABC", "CQ"], text, chunks=len(text)) == ["CQ", "CQ", "IZ6ABC", "SOS"]
@@ -0,0 +1,69 @@
+import random, time
+
+import pytest
+
+from app.decoder.morse_trie import ASCII_TO_MORSE, MorseTrie, build, encode
+
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+def callsigns(n, seed=1):
+    r = random.Random(seed); out = set()
+    while len(out) < n:
+        out.add("".join(r.choice(LETTERS) for _ in range(r.choice((1, 2, 2)))) + str(r.randrange(10))
+                + "".join(r.choice(LETTERS) for _ in range(r.choice((1, 2, 3, 3)))))
+    return sorted(out)
+
+def observe(word, r):
+    """Elementi di `word` con uno scambio dot/dash ambiguo, il resto netto."""
+    elems = "|".join(ASCII_TO_MORSE[c] for c in word)
+    pos = [k for k, e in enumerate(elems) if e != "|"]
+    sub = [r.uniform(1.0, 3.0) for _ in pos]
+    merge = [r.uniform(1.0, 3.0) for _ in range(elems.count("|"))]
+    i = r.randrange(len(pos)); sub[i] = r.uniform(0.2, 0.8)
+    e = list(elems); e[pos[i]] = "." if e[pos[i]] == "-" else "-"
+    return "".join(e), sub, merge
+
+def test_swap_split_and_glitch():
+    trie = MorseTrie(data=encode(["CQ", "TEST", "IZ6ABC", "QRZ"]))
+    # C con un dash sentito come dot
+    assert trie.search("-...|--.-", [2, 0.4, 2, 2, 2, 2, 2, 2], [2])[0][1] == "CQ"
+    # T E S T con lo spazio tra S e T non sentito: "...-" letto come V
+    assert trie.search("-|.|...-", [2]*6, [2, 2])[0][1] == "TEST"
+    # un dot in più (glitch): solo col budget pieno
+    assert trie.search("-|.|....|-", [3]*7, [3]*3, budget=2.0, limit=1)[0] == (1.5, "TEST")
+    assert trie.search("-|.|....|-", [3]*7, [3]*3, budget=1.4) == []
+
+def test_ranked_within_budget():
+    trie = MorseTrie(data=encode(["SOS", "SOT", "EOS"]))
+    got = trie.search("...|---|...", [1]*9, [3, 3], budget=2.5)
+    assert got[0] == (0.0, "SOS")
+    assert [c for c, _ in got] == sorted(c for c, _ in got)
+    assert len(trie.search("...|---|...", [1]*9, [3, 3], limit=1)) == 1
+
+def test_max_steps_bounds_the_work():
+    trie = MorseTrie(data=encode(callsigns(2000)))
+    q = observe("IZ6ABC", random.Random(1))
+    assert trie.search(*q, max_steps=1) == []
+
+@pytest.fixture(scope="module")
+def million(tmp_path_factory):
+    words = callsigns(1_000_000)
+    path = str(tmp_path_factory.mktemp("trie") / "calls.trie")
+    build(words, path)
+    return words, MorseTrie(path)
+
+def test_million_callsigns_sub_millisecond(million):
+    """Chiamata del correttore (limit=1) su 1M nominativi: p99 < 1 ms."""
+    words, trie = million
+    r = random.Random(5)
+    qs = [(observe(w, r), w) for w in (r.choice(words) for _ in range(300))]
+    for q, _ in qs[:50]: trie.search(*q, limit=1)      # pagine del file
+    ts = []; hit = 0
+    for q, w in qs:
+        dt = 1.0
+        for _ in range(3):        # il minimo di 3 toglie le pause dello scheduler
+            t = time.perf_counter(); got = trie.search(*q, limit=1); dt = min(dt, time.perf_counter() - t)
+        ts.append(dt); hit += got[0][1] == w
+    ts.sort()
+    assert ts[int(0.99*len(ts))] < 1e-3
+    assert hit >= 0.85*len(qs)    # il resto: un altro nominativo a costo minore
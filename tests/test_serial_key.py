@@ -0,0 +1,81 @@
+import errno, os, threading, time
+
+import pytest
+
+from cw import clock
+from cw.serial_key import SerialKey
+
+tty = pytest.importorskip("tty")
+
+@pytest.fixture
+def pty():
+    m, s = os.openpty(); tty.setraw(m)
+    yield m, os.ttyname(s)
+    os.close(m); os.close(s)
+
+def busy(dt):
+    end = clock.now() + dt
+    while clock.now() < end: pass
+
+def run_key(port, script, **kw):
+    """script(write) scrive gli stati; ritorna i fronti [(linea, chiuso, t)] e il tasto."""
+    got = []
+    key = SerialKey(port, lambda i, on, t: got.append((i, on, t)), mode="bytes", **kw).start()
+    try:
+        script(key)
+        time.sleep(0.05)
+    finally:
+        key.stop()
+    return got, key
+
+def test_edges_on_two_lines(pty):
+    m, port = pty
+    def script(key):
+        for b in (0b01, 0b11, 0b10, 0b00):
+            os.write(m, bytes([b])); time.sleep(0.01)
+    got, key = run_key(port, script, lines=("DSR", "CTS"))
+    assert [(i, on) for i, on, _ in got] == [(0, True), (1, True), (0, False), (1, False)]
+    assert key.edges == 4
+
+def test_debounce_drops_bounces_and_resamples(pty):
+    m, port = pty
+    def script(key):
+        os.write(m, b"\x01"); busy(0.0005)
+        os.write(m, b"\x00"); busy(0.0005)
+        os.write(m, b"\x01")                # rimbalzo: resta chiuso
+        time.sleep(0.02)
+        t = clock.now(); os.write(m, b"\x00"); busy(0.001)
+        os.write(m, b"\x01"); busy(0.0005)
+        os.write(m, b"\x00")                # apre, rimbalza e resta aperto
+        key.t_open = t
+        time.sleep(0.02)
+        os.write(m, b"\x01"); busy(0.001)
+        os.write(m, b"\x00")                # chiude e riapre dentro la finestra
+    got, key = run_key(port, script, debounce_ms=3.0)
+    assert [on for _, on, _ in got] == [True, False, True, False]
+    assert key.changes == 8
+    # l'apertura tardiva esce a fine finestra, con l'istante del campione
+    assert got[3][2] - got[2][2] == pytest.approx(0.003, abs=0.002)
+    assert got[1][2] - key.t_open < 0.002
+
+def test_timestamp_error(pty):
+    m, port = pty
+    sent = []
+    def script(key):
+        for n in range(60):
+            sent.append(clock.now()); os.write(m, bytes([(n + 1) & 1])); time.sleep(0.005)
+    got, _ = run_key(port, script)
+    assert len(got) == len(sent)
+    err = sorted(g[2] - t for g, t in zip(got, sent))
+    assert err[0] >= 0.0
+    assert err[len(err)//2] < 0.001 and err[-1] < 0.010
+
+def test_modem_mode_on_pty_fails_at_start(pty):
+    _, port = pty
+    before = threading.active_count()
+    key = SerialKey(port, lambda *a: None, lines=("CTS",))
+    with pytest.raises(OSError) as e:
+        key.start()
+    assert e.value.errno == errno.ENOTTY
+    assert key._fd is None and key._thread is None
+    assert threading.active_count() == before
@@ -0,0 +1,65 @@
+# tests/test_side_decoders.py
+"""Fili laterali: testo dai tempi per-pacchetto e allarmi con il numero del filo giusto."""
+import time
+
+import numpy as np
+
+from app import settings
+from app.decoder.side_decoders import SideDecoders
+from cw import clock
+from cw.events import EVENT_DTYPE, EV_SEQ, EV_TIMING
+from morse_keying import keying
+
+def packets(text, wire, wpm=20.0, t0=100.0, jitter=0.0):
+    """Una lettera per pacchetto, come CWCom: tempi dal primo mark, arrivo a fine lettera."""
+    edges, _ = keying(text, wpm, t0=t0, jitter=jitter)
+    u = 1.2 / wpm; recs = []; seq = []; prev = None
+    def flush():
+        recs.append((prev, EV_SEQ, wire, len(seq)))
+        recs.extend((prev, EV_TIMING, wire, v) for v in seq)
+    for (on, _), (off, _) in zip(edges[::2], edges[1::2]):
+        if prev is not None:
+            if on - prev > 2 * u:                    # pausa di lettera o parola: nuovo pacchetto
+                flush(); seq = []
+            else:
+                seq.append(-round((on - prev) * 1000))
+        seq.append(round((off - on) * 1000)); prev = off
+    flush()
+    return np.array(recs, dtype=EVENT_DTYPE)
+
+def decode(ev, center=None, tick_at=None):
+    text = {}
+    sd = SideDecoders(on_text=lambda w, s: text.__setitem__(w, text.get(w, "") + s))
+    if center is not None: sd.set_center(center)
+    sd.feed(ev)
+    sd.tick(tick_at if tick_at is not None else float(ev["t"][-1]) + 2.0)
+    return text, sd
+
+def test_side_wire_text_from_packet_timings():
+    text, _ = decode(packets("CQ DE IZ6ABC", 140, jitter=0.1))
+    assert " ".join(text[140].split()) == "CQ DE IZ6ABC"
+
+def test_two_wires_and_center_skipped():
+    ev = np.concatenate([packets("SOS", 140), packets("TEST", 141, wpm=25), packets("QRZ", 133)])
+    ev = ev[np.argsort(ev["t"], kind="stable")]
+    # riordinare per istante separa EV_SEQ dai suoi tempi solo se due pacchetti arrivano insieme
+    assert len(np.unique(ev["t"][ev["kind"] == EV_SEQ])) == (ev["kind"] == EV_SEQ).sum()
+    text, sd = decode(ev, center=133)
+    assert text[140].strip() == "SOS" and text[141].strip() == "TEST" and 133 not in text
+    sd.tick(float(ev["t"][-1]) + SideDecoders.IDLE_S + 1)
+    assert len(sd) == 0
+
+def test_engine_alert_on_side_wire(monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE", False)
+    monkeypatch.setattr(settings, "WARM_START", False)
+    monkeypatch.setattr(settings, "KEY_PORT", "")
+    from app.engine import Engine
+    eng = Engine("IZ0TEST")
+    eng.alerts.set_terms(["IZ6ABC"], background=False)
+    hits = []
+    eng.alerts.on_match = lambda w, term, ts: hits.append((w, term))
+    eng._on_events(packets("CQ DE IZ6ABC", 140, t0=clock.now() - 5.0))
+    deadline = time.time() + 3
+    while not hits and time.time() < deadline: time.sleep(0.01)
+    eng.close()
+    assert hits == [(140, "IZ6ABC")]
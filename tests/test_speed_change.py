@@ -0,0 +1,57 @@
+# tests/test_speed_change.py
+"""
+Cambio di stazione sullo stesso filo (35 -> 12 e 12 -> 35 WPM): i tre
+decoder devono riagganciare entro uno-due caratteri, senza riseminare a
+velocità costante con manipolazione irregolare.
+"""
+import time
+import pytest
+
+from app.decoder.morse_decoder import AdaptiveCWDecoder
+from app.decoder.viterbi_decoder import ViterbiCWDecoder
+from cw.cw_decoder import AdaptiveCWDecoder as LegacyCWDecoder
+from cw.speed_change import SpeedChangeDetector
+from tests.morse_keying import keying
+
+DECODERS = (AdaptiveCWDecoder, ViterbiCWDecoder, LegacyCWDecoder)
+
+def decode(cls, parts):
+    """parts = [(testo, wpm)] in sequenza, con una pausa di parola tra le parti."""
+    out = []; d = cls(on_symbol=None, on_text=out.append)
+    t = 1000.0
+    for text, wpm in parts:
+        edges, t = keying(text, wpm, t + 7 * 1.2 / wpm)
+        for te, on in edges:
+            d.feed(on, te)
+            if not on: d.tick(te + 0.001)
+        d.tick(t + 7 * 1.2 / wpm + 0.01)
+    return "".join(out).split()
+
+@pytest.mark.parametrize("cls", DECODERS, ids=lambda c: c.__module__.split(".")[-1])
+@pytest.mark.parametrize("before,after", [(35, 12), (12, 35)])
+def test_relock_within_two_characters(cls, before, after):
+    words = decode(cls, [("PARIS PARIS PARIS", before), ("PARIS CQ TEST", after)])
+    assert words[-2:] == ["CQ", "TEST"]
+    first = words[-3]                      # primo "PARIS" dopo il cambio
+    assert first.endswith("RIS"), words    # persi al più i primi due caratteri
+
+def test_no_false_reseed_at_steady_speed():
+    det = SpeedChangeDetector(); dit = 1.2 / 20
+    edges, _ = keying("PARIS CQ DE IZ6ABC TEST " * 60, 20, jitter=0.20, seed=7)
+    n = reseeds = 0
+    for (t0, on), (t1, _) in zip(edges, edges[1:]):
+        d = t1 - t0
+        r = det.mark(d, dit) if on else det.space(d, dit)
+        reseeds += r is not None; n += 1
+    assert n > 6000 and reseeds == 0
+
+def test_cost_per_element():
+    det = SpeedChangeDetector(); dit = 0.06
+    edges, _ = keying("PARIS " * 200, 20, jitter=0.1)
+    durs = [(t1 - t0, on) for (t0, on), (t1, _) in zip(edges, edges[1:])]
+    t = time.perf_counter()
+    for d, on in durs:
+        det.mark(d, dit) if on else det.space(d, dit)
+    per = (time.perf_counter() - t) / len(durs)
+    print(f"SpeedChangeDetector: {per*1e6:.2f} us/elemento")
+    assert per < 20e-6
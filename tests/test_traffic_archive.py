@@ -0,0 +1,79 @@
+# tests/test_traffic_archive.py
+"""Archivio del traffico: segmenti, blocchi zlib, indice invertito, filtri, ricostruzione."""
+import json, os, time, zlib
+
+from archive.traffic_archive import TrafficArchive, _LEN
+
+DAY = time.mktime((2026, 7, 14, 23, 58, 0, 0, 0, -1))        # a cavallo della mezzanotte locale
+# un run si chiude al primo append dello stesso filo dopo RUN_IDLE: con un run per
+# blocco i blocchi sono [R0] [R1] [R2] [R3] e, alla chiusura, [R4 R5] del giorno dopo
+RUNS = [(133, DAY +   0, "CQ CQ DE IZ6198SWL K"),
+        (140, DAY +  10, "QRZ DE IK1AB"),
+        (133, DAY +  20, "IZ6198SWL DE IK1AB 599"),
+        (140, DAY +  30, "IK1AB DE IZ6ABC TEST"),
+        (133, DAY + 200, "CQ DE IZ6198SWL PSE K"),             # giorno dopo
+        (140, DAY + 210, "IZ6ABC DE IK1AB TU")]
+
+def fill(root, seg_bytes=TrafficArchive.SEG_BYTES):
+    arc = TrafficArchive(str(root))
+    arc.BLOCK_RUNS = 1; arc.SEG_BYTES = seg_bytes
+    for wire, ts, text in RUNS:                                  # ogni run su più append()
+        for i, word in enumerate(text.split()):
+            arc.append(wire, word + " ", wpm=20.0, mode="PARIS", ts=ts + i)
+    arc.close()
+    return arc
+
+def texts(runs):
+    return [r[5] for r in runs]
+
+def segments(root):
+    return sorted(fn for fn in os.listdir(root) if fn.endswith(".twa"))
+
+def test_runs_blocks_and_day_rotation(tmp_path):
+    arc = fill(tmp_path)
+    assert texts(arc.query()) == [t for _, _, t in RUNS]
+    r = arc.query(wire=140)[0]
+    assert r[:3] == (140, DAY + 10, DAY + 12) and r[3:5] == (20.0, "PARIS")
+    segs = segments(tmp_path)
+    assert [s[:12] for s in segs] == ["seg-20260714", "seg-20260715"]
+    assert all(os.path.exists(tmp_path / (s[:-4] + ".idx.json")) for s in segs)
+    assert sorted(json.load(open(tmp_path / "manifest.json"))) == segs
+
+def test_size_rotation(tmp_path):
+    fill(tmp_path, seg_bytes=1)                                  # ogni blocco apre un segmento
+    assert len(segments(tmp_path)) == 5
+
+def test_zlib_blocks_round_trip(tmp_path):
+    fill(tmp_path)
+    got = []
+    for fn in segments(tmp_path):
+        data = (tmp_path / fn).read_bytes(); off = 0
+        while off < len(data):
+            ln, = _LEN.unpack_from(data, off)
+            got += [json.loads(l)[5] for l in zlib.decompress(data[off + 4:off + 4 + ln]).decode().splitlines()]
+            off += 4 + ln
+        assert off == len(data)
+    assert got == [t for _, _, t in RUNS]
+
+def test_term_prefix_wire_and_time_filters(tmp_path):
+    arc = fill(tmp_path)
+    assert texts(arc.query(term="ik1ab")) == [RUNS[i][2] for i in (1, 2, 3, 5)]
+    assert texts(arc.query(term="IZ6")) == [RUNS[i][2] for i in (0, 2, 3, 4, 5)]   # prefisso
+    assert texts(arc.query(term="IZ6A")) == [RUNS[i][2] for i in (3, 5)]
+    assert arc.query(term="VK") == []
+    assert texts(arc.query(wire=133, term="IK1AB")) == [RUNS[2][2]]
+    assert texts(arc.query(t0=DAY + 15, t1=DAY + 100)) == [RUNS[i][2] for i in (2, 3)]
+    assert texts(arc.query(t0=DAY + 100)) == [RUNS[i][2] for i in (4, 5)]
+    assert texts(arc.query(wire=140, t1=DAY + 100, term="QRZ")) == [RUNS[1][2]]
+    assert len(arc.query(limit=2)) == 2
+
+def test_reopen_rebuilds_missing_indexes(tmp_path):
+    fill(tmp_path, seg_bytes=1)
+    before = TrafficArchive(str(tmp_path)); want = [before.query(term="IZ6"), before.query(wire=140)]
+    before.close()
+    for fn in os.listdir(tmp_path):                              # chiusura brusca: niente indici né manifest
+        if fn.endswith(".json"): os.remove(tmp_path / fn)
+    arc = TrafficArchive(str(tmp_path))
+    assert [arc.query(term="IZ6"), arc.query(wire=140)] == want
+    assert texts(arc.query(t0=DAY + 100, term="IK")) == [RUNS[5][2]]
+    arc.close()